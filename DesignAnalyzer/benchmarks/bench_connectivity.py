@@ -0,0 +1,89 @@
+"""
+Connectivity queries on a synthetic netlist: a scan over the Net records
+(what answering "nets of instance X" took before) against the CSR arrays
+of connectivity.Connectivity, plus timings of fanout, fan-in cone and
+neighbour expansion on the CSR graph.
+
+Each net has one driver (an OUTPUT pin) and 1-4 sinks on random
+instances; pin directions are set directly rather than from a LEF.
+
+    python benchmarks/bench_connectivity.py [--nets 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '../src'))
+sys.path.append(os.path.join(HERE, '../lef_def'))
+
+from component_table import ComponentTable
+from connectivity import Connectivity, INPUT, OUTPUT
+from def_parser import Net, Connection
+
+
+def netlist(num_nets, seed=1):
+    rng = np.random.default_rng(seed)
+    num_insts = num_nets
+    sinks = rng.integers(1, 5, num_nets)
+    offsets = np.zeros(num_nets + 1, dtype=np.int64)
+    np.cumsum(sinks + 1, out=offsets[1:])
+    pin_inst = rng.integers(0, num_insts, int(offsets[-1])).astype(np.int32)
+    pin_inst[offsets[:-1]] = np.arange(num_nets) % num_insts      # every instance drives one net
+    pin_dirs = np.full(len(pin_inst), INPUT, dtype=np.int8)
+    pin_dirs[offsets[:-1]] = OUTPUT
+    return num_insts, offsets, pin_inst, pin_dirs
+
+
+def timed(func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nets", type=int, default=1000000)
+    args = parser.parse_args()
+
+    num_insts, offsets, pin_inst, pin_dirs = netlist(args.nets)
+    inst_name_ids = np.arange(num_insts, dtype=np.int32)
+    components = ComponentTable.from_columns({
+        "inst_name_id": inst_name_ids, "cell_name_id": np.zeros(num_insts, dtype=np.int32),
+        "type_id": np.zeros(num_insts, dtype=np.int32), "x": np.zeros(num_insts, dtype=np.int32),
+        "y": np.zeros(num_insts, dtype=np.int32), "orient_id": np.zeros(num_insts, dtype=np.int8),
+        "status": np.zeros(num_insts, dtype=np.int8)})
+
+    # Net records as the DEF parser makes them; instance names are their ids here.
+    pin_inst_list = pin_inst.tolist()
+    nets = [Net(name_id=n, connections=[Connection(pin_inst_list[p], 0) for p in range(b, e)])
+            for n, (b, e) in enumerate(zip(offsets[:-1].tolist(), offsets[1:].tolist()))]
+
+    build, graph = timed(lambda: Connectivity.from_nets(nets, components))
+    graph.pin_dirs = pin_dirs
+    print(f"{args.nets} nets, {len(pin_inst)} pin-refs, {num_insts} instances; CSR build {build:.2f} s")
+
+    inst = num_insts // 2
+    scan, scanned = timed(lambda: sorted({n for n, net in enumerate(nets)
+                                          for c in net.connections if c.cell_id == inst}))
+    csr, found = timed(lambda: graph.instance_nets(inst), 100)
+    assert scanned == found.tolist()
+    print(f"nets of one instance   scan {1000 * scan:9.1f} ms   CSR {1000 * csr:7.3f} ms")
+
+    net = args.nets // 2
+    fanout, sinks = timed(lambda: graph.fanout(net), 100)
+    print(f"fanout of one net                          {1000 * fanout:7.3f} ms  ({len(sinks)} sinks)")
+    for depth in (2, 4, 6):
+        cone_time, cone = timed(lambda: graph.fanin_cone([inst], depth), 10)
+        print(f"fan-in cone, depth {depth}                       {1000 * cone_time:7.3f} ms  ({len(cone)} instances)")
+    for depth in (1, 2, 3):
+        near_time, near = timed(lambda: graph.neighbors([inst], depth), 10)
+        print(f"neighbors, depth {depth}                         {1000 * near_time:7.3f} ms  ({len(near)} instances)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Time / peak-memory comparison of the in-memory DEF read against the
+streaming mmap reader.
+
+Each run happens in a fresh subprocess so that peak RSS is not polluted
+by the previous run.
+
+    python benchmarks/bench_def_reader.py [--components 2000000]
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '../src'))
+sys.path.append(os.path.join(HERE, '../lef_def'))
+
+AC97_DEF = os.path.join(HERE, '../test/design_files/design_2/ac97_ctrl.def')
+
+
+def write_synthetic_def(path, num_components):
+    """Write a placed + connected DEF with `num_components` cells and as many nets."""
+    with open(path, 'w') as f:
+        f.write("VERSION 5.8 ;\nDESIGN synthetic ;\nUNITS DISTANCE MICRONS 2000 ;\n")
+        f.write("DIEAREA ( 0 0 ) ( 10000000 10000000 ) ;\n\n")
+
+        f.write(f"COMPONENTS {num_components} ;\n")
+        for i in range(num_components):
+            x = (i % 5000) * 380
+            y = (i // 5000) * 2800
+            f.write(f"- u_core/u_blk{i % 64}/inst_{i} NAND2_X1 + PLACED ( {x} {y} ) N ;\n")
+        f.write("END COMPONENTS\n\n")
+
+        f.write(f"NETS {num_components} ;\n")
+        for i in range(num_components):
+            j = (i + 1) % num_components
+            f.write(f"- u_core/net_{i} ( u_core/u_blk{i % 64}/inst_{i} ZN )"
+                    f" ( u_core/u_blk{j % 64}/inst_{j} A1 ) ;\n")
+        f.write("END NETS\n\nEND DESIGN\n")
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def child(mode, def_path):
+    from def_parser import DefParser
+    from def_reader import DefLineReader
+
+    base_rss = peak_rss_mb()
+    start = time.perf_counter()
+
+    parser = DefParser()
+    if mode == 'read':
+        with open(def_path, 'r') as f:
+            parser.parse(f.read())
+    else:
+        parser.parse_lines(DefLineReader(def_path))
+
+    elapsed = time.perf_counter() - start
+    print(f"{elapsed:.3f} {peak_rss_mb() - base_rss:.1f} {len(parser.def_data.components)}")
+
+
+def run(def_path):
+    size_mb = os.path.getsize(def_path) / (1024 * 1024)
+    print(f"\n{os.path.basename(def_path)}  ({size_mb:.1f} MB)")
+    print(f"  {'mode':8s} {'time [s]':>10s} {'peak RSS [MB]':>15s} {'components':>12s}")
+
+    for mode in ('read', 'stream'):
+        out = subprocess.run([sys.executable, __file__, '--child', mode, def_path],
+                             check=True, capture_output=True, text=True).stdout
+        elapsed, rss, comps = out.split()[-3:]
+        print(f"  {mode:8s} {float(elapsed):10.3f} {float(rss):15.1f} {int(comps):12d}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--components', type=int, default=2000000)
+    arg_parser.add_argument('--child', nargs=2, metavar=('MODE', 'DEF'))
+    args = arg_parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    run(AC97_DEF)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic = os.path.join(tmp, 'synthetic.def')
+        write_synthetic_def(synthetic, args.components)
+        run(synthetic)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Placement density (density.py) on a synthetic standard cell placement with
+a few macros: time to compute one grid per resolution, the cached lookup,
+and a check that the binned area adds up to the total instance area.
+
+    python benchmarks/bench_density.py [--count 5000000] [--bins 250 1000 2000] [--macros 50]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '../src'))
+sys.path.append(os.path.join(HERE, '../lef_def'))
+
+from density import DensityEngine
+
+
+def placement(count, macros, seed=1):
+    rng = np.random.default_rng(seed)
+    side = np.sqrt(count) * 1.4
+    x = rng.uniform(0, side - 1.2, count)
+    y = rng.integers(0, int(side / 1.4), count) * 1.4
+    w = rng.choice([0.19, 0.38, 0.57, 0.76, 1.14], count)
+    cells = np.column_stack((x, y, x + w, y + 1.4))
+    corners = rng.uniform(0, side * 0.9, (macros, 2))
+    blocks = np.hstack((corners, corners + rng.uniform(side * 0.01, side * 0.08, (macros, 2))))
+    return np.concatenate((cells, blocks)), side
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=5000000)
+    parser.add_argument("--bins", type=int, nargs="*", default=[250, 1000, 2000])
+    parser.add_argument("--macros", type=int, default=50)
+    args = parser.parse_args()
+
+    bboxes, side = placement(args.count, args.macros)
+    engine = DensityEngine(bboxes, (0.0, 0.0, side, side))
+    total_area = float(np.prod(bboxes[:, 2:] - bboxes[:, :2], axis=1).sum())
+    print(f"{len(bboxes)} instances on {side:.0f} x {side:.0f} um")
+
+    for bins in args.bins:
+        start = time.perf_counter()
+        density_map = engine.density(bins)
+        compute = time.perf_counter() - start
+
+        start = time.perf_counter()
+        engine.density(bins)
+        cached = time.perf_counter() - start
+
+        binned_area = float(density_map.utilization.sum()) * np.prod(density_map.bin_size())
+        assert abs(binned_area - total_area) < 1e-6 * total_area
+        print(f"{bins:>5} x {bins:<5} {compute:7.3f} s   cached {1e6 * cached:6.1f} us   "
+              f"peak {density_map.utilization.max():.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Hierarchical queries on synthetic instance names: a regex over every name
+(what "all cells under a module" took before) against the module trie of
+hierarchy.HierarchyIndex, plus the per-module count and area rollup.
+
+Names are u<a>/u<b>/u<c>/<cell><n> over a random, uneven module tree.
+
+    python benchmarks/bench_hierarchy.py [--count 1000000]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '../src'))
+sys.path.append(os.path.join(HERE, '../lef_def'))
+
+from hierarchy import HierarchyIndex
+
+
+def instance_names(count, seed=1):
+    rng = np.random.default_rng(seed)
+    top = rng.integers(0, 8, count)
+    mid = rng.integers(0, 16, count)
+    low = rng.integers(0, 32, count)
+    return [f"u{a}/u{b}/u{c}/g{n}" for n, (a, b, c) in enumerate(zip(top.tolist(), mid.tolist(), low.tolist()))]
+
+
+def timed(func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1000000)
+    args = parser.parse_args()
+
+    names = instance_names(args.count)
+    ids = np.arange(len(names))
+    areas = np.random.default_rng(2).uniform(0.5, 5.0, len(names))
+
+    build, hierarchy = timed(lambda: HierarchyIndex(ids, names))
+    print(f"{args.count} names, {len(hierarchy)} modules; trie build {build:.2f} s")
+
+    for module in ("u3", "u3/u7", "u3/u7/u11"):
+        pattern = re.compile("^" + re.escape(module) + "/")
+        scan, scanned = timed(lambda: [i for i, name in enumerate(names) if pattern.search(name)])
+        trie, found = timed(lambda: hierarchy.subtree_rows(hierarchy.find(module)), 100)
+        assert sorted(scanned) == sorted(found.tolist())
+        print(f"under {module:10} regex {1000 * scan:8.1f} ms   trie {1000 * trie:7.3f} ms  ({len(found)} instances)")
+
+    rollup, sums = timed(lambda: hierarchy.rollup(areas))
+    assert np.isclose(sums[0], areas.sum())
+    print(f"area rollup over all modules {1000 * rollup:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
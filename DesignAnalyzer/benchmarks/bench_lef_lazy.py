@@ -0,0 +1,77 @@
+"""
+Load time and memory of eager against lazy macro bodies (LEF_LAZY_MACROS).
+
+Each LEF is read in a fresh subprocess per mode. 'load s' and 'RSS MB' are
+the time and peak-RSS growth of LefParser itself; 'touch s' is the time to
+then access the pins of `--touch` percent of the macros, which in lazy mode
+is when their bodies get parsed.
+
+    python benchmarks/bench_lef_lazy.py [--touch 10] [LEF ...]
+"""
+import argparse
+import glob
+import os
+import resource
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '../src'))
+sys.path.append(os.path.join(HERE, '../lef_def'))
+
+DESIGN_FILES = os.path.join(HERE, '../test/design_files')
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def child(path, lazy, touch):
+    os.environ["LEF_LAZY_MACROS"] = "1" if lazy else "0"
+    from lef_parser import LefParser
+
+    with open(path, 'r', encoding='utf-8', errors='surrogateescape', newline='') as f:
+        text = f.read()
+    base_rss = peak_rss_mb()
+
+    start = time.perf_counter()
+    parser = LefParser(text, source_path=path)
+    load_time = time.perf_counter() - start
+    rss = peak_rss_mb() - base_rss
+
+    macros = list(parser.get_macros().values())
+    start = time.perf_counter()
+    for macro in macros[:len(macros) * touch // 100]:
+        macro.pins
+    touch_time = time.perf_counter() - start
+
+    print(f"{len(macros)} {load_time:.4f} {rss:.1f} {touch_time:.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("lefs", nargs="*")
+    parser.add_argument("--touch", type=int, default=10, help="percent of macros whose pins are accessed")
+    parser.add_argument("--child", nargs=3, metavar=("LEF", "LAZY", "TOUCH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1] == "1", int(args.child[2]))
+        return
+
+    lefs = args.lefs or sorted(glob.glob(os.path.join(DESIGN_FILES, '*', '*.lef*')))
+
+    print(f"{'file':<34}{'macros':>7} {'mode':<6}{'load s':>9}{'RSS MB':>8}{'touch s':>9}")
+    for path in lefs:
+        name = os.path.relpath(path, DESIGN_FILES)
+        for lazy in ("0", "1"):
+            out = subprocess.run([sys.executable, __file__, "--child", path, lazy, str(args.touch)],
+                                 check=True, capture_output=True, text=True).stdout.split()
+            print(f"{name:<34}{out[0]:>7} {'lazy' if lazy == '1' else 'eager':<6}"
+                  f"{out[1]:>9}{out[2]:>8}{out[3]:>9}")
+
+
+if __name__ == '__main__':
+    main()
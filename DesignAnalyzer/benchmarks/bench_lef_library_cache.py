@@ -0,0 +1,80 @@
+"""
+LEF load time and memory: parsing against the shared library cache.
+
+Each LEF is loaded with load_lef_file() in a fresh subprocess, once with
+the library cache disabled (a plain parse) and once from a warm library
+cache entry. 'RSS MB' is the peak-RSS growth of the load; 'all pins s' and
+'all pins MB' are the time and growth to then access the pins of every
+macro. Pages of the mmap'd entry are shared by all processes using it.
+
+    python benchmarks/bench_lef_library_cache.py [LEF ...]
+"""
+import argparse
+import glob
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '../src'))
+sys.path.append(os.path.join(HERE, '../lef_def'))
+
+DESIGN_FILES = os.path.join(HERE, '../test/design_files')
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def child(path, cached):
+    os.environ["LEF_LIBRARY_CACHE"] = "1" if cached else "0"
+    os.environ["DESIGN_CACHE"] = "1" if cached else "0"
+    from lef_parser import load_lef_file
+
+    base_rss = peak_rss_mb()
+    start = time.perf_counter()
+    parser, _, _ = load_lef_file(path)
+    load_time = time.perf_counter() - start
+    rss = peak_rss_mb() - base_rss
+
+    start = time.perf_counter()
+    for macro in parser.get_macros().values():
+        macro.pins
+    touch_time = time.perf_counter() - start
+
+    print(f"{load_time:.4f} {rss:.1f} {touch_time:.4f} {peak_rss_mb() - base_rss - rss:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("lefs", nargs="*")
+    parser.add_argument("--child", nargs=2, metavar=("LEF", "CACHED"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1] == "1")
+        return
+
+    lefs = args.lefs or sorted(glob.glob(os.path.join(DESIGN_FILES, '*', '*.lef*')))
+    env = dict(os.environ, LEF_LIBRARY_CACHE_DIR=tempfile.mkdtemp(prefix="lef_library_"))
+
+    def run(path, cached):
+        return subprocess.run([sys.executable, __file__, "--child", path, cached],
+                              check=True, capture_output=True, text=True, env=env).stdout.split()
+
+    print(f"{'file':<34}{'mode':<8}{'load s':>9}{'RSS MB':>8}{'all pins s':>12}{'all pins MB':>13}")
+    for path in lefs:
+        name = os.path.relpath(path, DESIGN_FILES)
+        run(path, "1")  # write the entry
+        for cached in ("0", "1"):
+            out = run(path, cached)
+            print(f"{name:<34}{'library' if cached == '1' else 'parse':<8}{out[0]:>9}{out[1]:>8}"
+                  f"{out[2]:>12}{out[3]:>13}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Parse time of the single-pass LEF reader against the regex reader
+(LEF_READ_REGEX=1) on every LEF under test/design_files.
+
+Besides the time, each row lists what the parser recovered (macros, pins,
+port and OBS rectangles, layers, sites, vias) so that speed is not bought
+with missing geometry.
+
+    python benchmarks/bench_lef_parser.py [--skip-regex] [LEF ...]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '../src'))
+sys.path.append(os.path.join(HERE, '../lef_def'))
+
+from lef_parser import LefParser
+
+DESIGN_FILES = os.path.join(HERE, '../test/design_files')
+
+
+def parse(text, regex):
+    if regex:
+        os.environ["LEF_READ_REGEX"] = "1"
+    else:
+        os.environ.pop("LEF_READ_REGEX", None)
+
+    start = time.perf_counter()
+    parser = LefParser(text)
+    return time.perf_counter() - start, parser
+
+
+def contents(parser):
+    macros = parser.get_macros().values()
+    port_rects = sum(len(rects) for m in macros for pin in m.pins.values()
+                     for port in pin.ports for rects in port.layer_rects.values())
+    obs_rects = sum(len(rects) for m in macros for rects in m.obs.values())
+    return (f"{len(macros):>8}{sum(len(m.pins) for m in macros):>7}{port_rects:>8}{obs_rects:>7}"
+            f"{len(parser.get_layers()):>7}{len(parser.get_sites()):>6}{len(parser.get_vias()):>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("lefs", nargs="*")
+    parser.add_argument("--skip-regex", action="store_true", help="only time the single-pass reader")
+    args = parser.parse_args()
+
+    lefs = args.lefs or sorted(glob.glob(os.path.join(DESIGN_FILES, '*', '*.lef*')))
+
+    print(f"{'file':<34}{'KB':>6} {'reader':<8}{'time s':>9}"
+          f"{'macros':>8}{'pins':>7}{'ports':>8}{'obs':>7}{'layers':>7}{'sites':>6}{'vias':>6}")
+    for path in lefs:
+        with open(path, 'r') as f:
+            text = f.read()
+        name = os.path.relpath(path, DESIGN_FILES)
+
+        modes = [False] if args.skip_regex else [True, False]
+        for regex in modes:
+            seconds, lef = parse(text, regex)
+            print(f"{name:<34}{len(text) // 1024:>6} {'regex' if regex else 'single':<8}{seconds:>9.3f}"
+                  f"{contents(lef)}")
+
+
+if __name__ == '__main__':
+    main()
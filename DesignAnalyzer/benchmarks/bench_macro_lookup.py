@@ -0,0 +1,74 @@
+"""
+Per-component macro lookup: the old walk over every loaded LEF file against
+one gather on the MacroRegistry arrays.
+
+Builds `--libs` synthetic libraries of `--macros` macros each and resolves
+`--components` cell name ids drawn from all of them.
+
+    python benchmarks/bench_macro_lookup.py [--components 1000000] [--libs 8]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '../src'))
+sys.path.append(os.path.join(HERE, '../lef_def'))
+
+from global_name_index import gname_index
+from lef_parser import Macro
+from macro_registry import MacroRegistry
+
+
+def library(lib, count):
+    macros = {}
+    for i in range(count):
+        macro = Macro(f"LIB{lib}_CELL{i}", "")
+        macro.size = [0.19 * (1 + i % 8), 1.4]
+        macro.class_ = "CORE"
+        macros[macro.name] = macro
+    return macros
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--components", type=int, default=1000000)
+    parser.add_argument("--libs", type=int, default=8)
+    parser.add_argument("--macros", type=int, default=500)
+    args = parser.parse_args()
+
+    libraries = [library(lib, args.macros) for lib in range(args.libs)]
+    registry = MacroRegistry()
+    for lib, macros in enumerate(libraries):
+        registry.add_library(f"lib{lib}.lef", macros)
+
+    names = [name for macros in libraries for name in macros]
+    rng = np.random.default_rng(1)
+    cell_name_ids = np.asarray(gname_index.set_many(names), dtype=np.int32)[
+        rng.integers(0, len(names), args.components)]
+
+    # Old LefParserImplement.get_macro: names, then a probe per library.
+    start = time.perf_counter()
+    widths = []
+    for cell_name in gname_index.get_names(cell_name_ids):
+        for macros in libraries:
+            if cell_name in macros:
+                widths.append(macros[cell_name].size[0])
+                break
+    walk = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found, gathered, _, _ = registry.lookup(cell_name_ids)
+    gather = time.perf_counter() - start
+
+    assert found.all() and np.allclose(gathered, widths)
+    print(f"{args.components} components, {args.libs} libraries x {args.macros} macros")
+    print(f"per-library walk {walk:8.3f} s")
+    print(f"registry gather  {gather:8.3f} s  ({walk / gather:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
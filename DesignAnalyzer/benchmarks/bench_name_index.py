@@ -0,0 +1,138 @@
+"""
+Intern / lookup throughput of NameIndex at 1, 4 and 16 threads.
+
+Each thread interns a DEF-like token stream: one unique instance name per
+three tokens, the rest drawn from a small shared vocabulary of cell and pin
+names. The same stream is run through
+
+    locked      the previous NameIndex (one lock around every call), for reference
+    set         NameIndex.set() on the shared index
+    set_many    NameIndex.set_many() in batches of 4096
+    local       a private NameIndex per thread, merged into the shared one at the end
+
+and the shared index is then read back with getName() and get_names().
+
+    python benchmarks/bench_name_index.py [--tokens 300000] [--threads 1 4 16]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '../src'))
+
+from global_name_index import NameIndex
+
+BATCH = 4096
+
+
+class LockedNameIndex:
+    """The NameIndex before lock-free reads: every call takes the lock."""
+
+    def __init__(self):
+        self.name_to_id = {}
+        self.id_to_name = {}
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def set(self, name):
+        name = sys.intern(name)
+        with self._lock:
+            if name in self.name_to_id:
+                return self.name_to_id[name]
+            id_ = self._counter
+            self._counter += 1
+            self.name_to_id[name] = id_
+            self.id_to_name[id_] = name
+            return id_
+
+    def getName(self, id_):
+        with self._lock:
+            if id_ not in self.id_to_name:
+                raise KeyError(id_)
+            return self.id_to_name[id_]
+
+
+def token_stream(thread_no, count):
+    vocab = [f"NAND{i % 4 + 2}_X{i % 3 + 1}" for i in range(40)] + ["A1", "A2", "ZN", "PLACED", "N", "FS"]
+    tokens = []
+    for i in range(count):
+        if i % 3 == 0:
+            tokens.append(f"u_core/u_blk{i % 64}/t{thread_no}_inst_{i}")
+        else:
+            tokens.append(vocab[i % len(vocab)])
+    return tokens
+
+
+def intern_each(index, tokens):
+    set_ = index.set
+    for token in tokens:
+        set_(token)
+
+
+def intern_set_many(index, tokens):
+    for i in range(0, len(tokens), BATCH):
+        index.set_many(tokens[i:i + BATCH])
+
+
+def intern_local(index, tokens):
+    local = NameIndex()
+    set_ = local.set
+    for token in tokens:
+        set_(token)
+    index.merge(local)
+
+
+MODES = {
+    "locked": (LockedNameIndex, intern_each),
+    "set": (NameIndex, intern_each),
+    "set_many": (NameIndex, intern_set_many),
+    "local": (NameIndex, intern_local),
+}
+
+
+def run_threads(num_threads, work):
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(num_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def bench(mode, num_threads, tokens_per_thread):
+    factory, intern = MODES[mode]
+    index = factory()
+    streams = [token_stream(n, tokens_per_thread) for n in range(num_threads)]
+
+    intern_time = run_threads(num_threads, lambda n: intern(index, streams[n]))
+
+    ids = list(range(len(index.id_to_name)))
+    if mode == "locked":
+        read = lambda n: [index.getName(i) for i in ids]
+    else:
+        read = lambda n: index.get_names(ids)
+    read_time = run_threads(num_threads, read)
+
+    total = num_threads * tokens_per_thread
+    return total / intern_time / 1e6, num_threads * len(ids) / read_time / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=300000, help="tokens interned per thread")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'threads':>8}{'intern Mtok/s':>16}{'lookup Mid/s':>16}")
+    for num_threads in args.threads:
+        for mode in MODES:
+            intern_rate, read_rate = bench(mode, num_threads, args.tokens)
+            print(f"{mode:<10}{num_threads:>8}{intern_rate:>16.2f}{read_rate:>16.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Name-table memory of the NameIndex backends on hierarchical names.
+
+Interns `--names` names shaped like 'u_core/u_alu12/add_345/U6789' (a few
+thousand distinct hierarchy paths, unique leaves) into each backend in a
+fresh subprocess and reports the growth of peak RSS, the intern time and
+the lookup time of get_names() over all ids.
+
+    python benchmarks/bench_name_index_memory.py [--names 2000000]
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '../src'))
+
+BACKENDS = ("dict", "compact-flat", "compact")
+
+
+def hierarchical_names(count):
+    for i in range(count):
+        yield f"u_core/u_alu{i % 16}/add_{(i // 16) % 256}/U{i}"
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def child(backend, count):
+    os.environ["NAME_INDEX"] = backend
+    from global_name_index import make_name_index
+
+    index = make_name_index()
+    base_rss = peak_rss_mb()
+
+    start = time.perf_counter()
+    set_ = index.set
+    for name in hierarchical_names(count):
+        set_(name)
+    intern_time = time.perf_counter() - start
+    rss = peak_rss_mb() - base_rss
+
+    start = time.perf_counter()
+    index.get_names(range(len(index)))
+    lookup_time = time.perf_counter() - start
+
+    print(f"{rss:.1f} {intern_time:.2f} {lookup_time:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=2000000)
+    parser.add_argument("--child", nargs=2, metavar=("BACKEND", "COUNT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], int(args.child[1]))
+        return
+
+    print(f"{args.names} hierarchical names")
+    print(f"{'backend':<14}{'RSS MB':>10}{'intern s':>10}{'lookup s':>10}")
+    for backend in BACKENDS:
+        out = subprocess.run([sys.executable, __file__, "--child", backend, str(args.names)],
+                             check=True, capture_output=True, text=True).stdout.split()
+        print(f"{backend:<14}{out[0]:>10}{out[1]:>10}{out[2]:>10}")
+
+
+if __name__ == '__main__':
+    main()
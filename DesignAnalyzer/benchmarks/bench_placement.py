@@ -0,0 +1,172 @@
+"""
+Placing every instance's pin and OBS rectangles into die coordinates:
+a Python loop over the nested pin/port/layer lists against one vectorized
+transform per macro over MacroShapes (placement.place_component_shapes).
+
+Uses the components of a DEF and the macros of its LEFs, repeated
+`--repeat` times with random orientations to reach a larger design.
+Before timing, transform_rects and instance_bboxes are checked against
+the DEF orientations of an off-center pin on a non-square macro, and
+every placed shape of the design against a per-corner reference.
+
+    python benchmarks/bench_placement.py [--repeat 20] [DEF LEF ...]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '../src'))
+sys.path.append(os.path.join(HERE, '../lef_def'))
+
+from component_table import ORIENTATIONS, ComponentTable
+from def_parser import ParseWorker
+from lef_parser import LefParserImplement
+from parse_progress import ParseProgress
+from placement import dbu_to_microns, instance_bboxes, place_component_shapes, transform_rects
+
+DESIGN = os.path.join(HERE, '../test/design_files/design_2')
+
+# DEF orientations as maps of a macro point (x, y), for a macro of size
+# (w, h) with its lower left corner at (0, 0); the rotated or flipped macro
+# again has its lower left corner at the DEF location.
+REFERENCE_MAP = {
+    "N":  lambda x, y, w, h: (x, y),
+    "W":  lambda x, y, w, h: (h - y, x),
+    "S":  lambda x, y, w, h: (w - x, h - y),
+    "E":  lambda x, y, w, h: (y, w - x),
+    "FN": lambda x, y, w, h: (w - x, y),
+    "FW": lambda x, y, w, h: (y, x),
+    "FS": lambda x, y, w, h: (x, h - y),
+    "FE": lambda x, y, w, h: (h - y, w - x),
+}
+
+# A 4 x 2 macro with a pin at (0.5, 0, 1.5, 0.5), placed at (10, 20): where
+# the pin lands for each orientation.
+REFERENCE_SIZE = (4.0, 2.0)
+REFERENCE_PIN = (0.5, 0.0, 1.5, 0.5)
+REFERENCE_LOCATION = (10.0, 20.0)
+REFERENCE_PLACED = {
+    "N":  (10.5, 20.0, 11.5, 20.5),
+    "W":  (11.5, 20.5, 12.0, 21.5),
+    "S":  (12.5, 21.5, 13.5, 22.0),
+    "E":  (10.0, 22.5, 10.5, 23.5),
+    "FN": (12.5, 20.0, 13.5, 20.5),
+    "FW": (10.0, 20.5, 10.5, 21.5),
+    "FS": (10.5, 21.5, 11.5, 22.0),
+    "FE": (11.5, 22.5, 12.0, 23.5),
+}
+# The macro boundary: W, E, FW and FE swap width and height.
+REFERENCE_BBOX = {
+    "N":  (10.0, 20.0, 14.0, 22.0),
+    "W":  (10.0, 20.0, 12.0, 24.0),
+    "S":  (10.0, 20.0, 14.0, 22.0),
+    "E":  (10.0, 20.0, 12.0, 24.0),
+    "FN": (10.0, 20.0, 14.0, 22.0),
+    "FW": (10.0, 20.0, 12.0, 24.0),
+    "FS": (10.0, 20.0, 14.0, 22.0),
+    "FE": (10.0, 20.0, 12.0, 24.0),
+}
+
+
+def check_orientations():
+    orient_ids = np.arange(len(ORIENTATIONS))
+    locations = np.tile(REFERENCE_LOCATION, (len(orient_ids), 1))
+    placed = transform_rects([REFERENCE_PIN], REFERENCE_SIZE, locations, orient_ids)[:, 0]
+    for orient, rect in zip(ORIENTATIONS, placed):
+        assert np.allclose(rect, REFERENCE_PLACED[orient]), (orient, rect.tolist(), REFERENCE_PLACED[orient])
+    bboxes = instance_bboxes(locations, np.tile(REFERENCE_SIZE, (len(orient_ids), 1)), orient_ids)
+    for orient, bbox in zip(ORIENTATIONS, bboxes):
+        assert np.allclose(bbox, REFERENCE_BBOX[orient]), (orient, bbox.tolist(), REFERENCE_BBOX[orient])
+
+
+def reference_rects(rects, size, location, orient):
+    """Place rects corner by corner with REFERENCE_MAP."""
+    (x1, y1, x2, y2), (w, h) = np.asarray(rects, dtype=np.float64).T, size
+    ax, ay = REFERENCE_MAP[orient](x1, y1, w, h)
+    bx, by = REFERENCE_MAP[orient](x2, y2, w, h)
+    return np.column_stack((np.minimum(ax, bx), np.minimum(ay, by),
+                            np.maximum(ax, bx), np.maximum(ay, by))) + np.tile(location, 2)
+
+
+def check_design(components, registry, units):
+    """The vectorized placement of every macro matches the reference for one instance per orientation."""
+    locations = dbu_to_microns(components.locations, units)
+    for cell_name_id, rows, placed, shapes in place_component_shapes(components, registry, units):
+        macro = registry.get_by_id(cell_name_id)
+        origin = macro.origin[:2] if len(macro.origin) >= 2 else (0.0, 0.0)
+        rects = shapes.rects + np.tile(origin, 2)
+        orient_ids = components.orient_ids[rows]
+        for orient_id in np.unique(orient_ids):
+            k = int(np.flatnonzero(orient_ids == orient_id)[0])
+            expected = reference_rects(rects, macro.size[:2], locations[rows[k]], ORIENTATIONS[orient_id])
+            assert np.allclose(placed[k], expected, atol=1e-6), (macro.name, ORIENTATIONS[orient_id])
+
+
+def loop_placement(components, registry, units):
+    """Baseline: per instance, per rect, in Python (orientation N only, as the old code could)."""
+    total = 0
+    for cell_name_id, x, y in zip(components.cell_name_ids.tolist(), components.x.tolist(),
+                                  components.y.tolist()):
+        macro = registry.get_by_id(cell_name_id)
+        if macro is None:
+            continue
+        x, y = x / units, y / units
+        placed = []
+        for pin in macro.pins.values():
+            for port in pin.ports:
+                for layer, rects in port.layer_rects.items():
+                    for x1, y1, x2, y2 in rects:
+                        placed.append((layer, x + x1, y + y1, x + x2, y + y2))
+        for layer, rects in macro.obs.items():
+            for x1, y1, x2, y2 in rects:
+                placed.append((layer, x + x1, y + y1, x + x2, y + y2))
+        total += len(placed)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    check_orientations()
+
+    files = args.files or [os.path.join(DESIGN, 'ac97_ctrl.def'), os.path.join(DESIGN, 'nangate45.lef')]
+    lef = LefParserImplement()
+    for path in files[1:]:
+        lef.parse(path)
+    def_parser = ParseWorker(files[0]).load(ParseProgress())
+    units = def_parser.def_data.units.microns
+
+    components = ComponentTable.concatenate([def_parser.def_data.components] * args.repeat)
+    columns = components.columns()
+    columns["orient_id"] = np.random.default_rng(1).integers(0, 8, len(components)).astype(np.int8)
+    components = ComponentTable.from_columns(columns)
+
+    for macro in lef.registry._macros.values():     # parse bodies outside the timings
+        macro.pins
+        macro.shapes
+    check_design(components, lef.registry, units)
+
+    start = time.perf_counter()
+    loop_total = loop_placement(components, lef.registry, units)
+    loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vector_total = sum(placed.shape[0] * placed.shape[1]
+                       for _, _, placed, _ in place_component_shapes(components, lef.registry, units))
+    vector = time.perf_counter() - start
+
+    assert loop_total == vector_total
+    print(f"{len(components)} instances, {vector_total} rects")
+    print(f"python loop        {loop:8.3f} s")
+    print(f"vectorized / macro {vector:8.3f} s  ({loop / vector:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Instance R-tree construction: one Index.insert() per instance against
+libspatialindex bulk loading (spatial_index.bulk_load_rtree), on a synthetic
+placement of standard-cell sized boxes in rows.
+
+Also times 1000 window queries on each tree and checks that both trees
+return the same ids.
+
+    python benchmarks/bench_rtree_bulk.py [--sizes 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from rtree import index
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '../src'))
+sys.path.append(os.path.join(HERE, '../lef_def'))
+
+from spatial_index import bulk_load_rtree
+
+
+def placement(count, seed=1):
+    rng = np.random.default_rng(seed)
+    side = np.sqrt(count) * 1.4
+    x = rng.uniform(0, side, count).round(2)
+    y = (rng.integers(0, int(side / 1.4) + 1, count) * 1.4)
+    w = rng.choice([0.19, 0.38, 0.57, 0.76, 1.14], count)
+    return np.arange(count, dtype=np.int64), np.column_stack((x, y, x + w, y + 1.4)), side
+
+
+def queries(tree, windows):
+    start = time.perf_counter()
+    hits = [sorted(tree.intersection(w)) for w in windows]
+    return time.perf_counter() - start, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="*", default=[100000, 1000000])
+    args = parser.parse_args()
+
+    print(f"{'instances':>10}{'insert s':>10}{'bulk s':>9}{'speedup':>9}{'query insert s':>16}{'query bulk s':>14}")
+    for count in args.sizes:
+        ids, bboxes, side = placement(count)
+        rng = np.random.default_rng(2)
+        corners = rng.uniform(0, side - 20, (1000, 2))
+        windows = np.column_stack((corners, corners + 20)).tolist()
+
+        start = time.perf_counter()
+        incremental = index.Index()
+        for id_, bbox in zip(ids.tolist(), bboxes.tolist()):
+            incremental.insert(id_, bbox)
+        insert = time.perf_counter() - start
+
+        start = time.perf_counter()
+        bulk = bulk_load_rtree(ids, bboxes)
+        bulk_time = time.perf_counter() - start
+
+        query_insert, hits_insert = queries(incremental, windows)
+        query_bulk, hits_bulk = queries(bulk, windows)
+        assert hits_insert == hits_bulk
+
+        print(f"{count:>10}{insert:>10.2f}{bulk_time:>9.2f}{insert / bulk_time:>8.1f}x"
+              f"{query_insert:>16.3f}{query_bulk:>14.3f}")
+        del incremental, bulk
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Spatial index backends (spatial_index.py) on one design: build time and
+window query time per backend, for small (a few cells), medium (about 1%
+of the die) and large (about 25% of the die) windows. Checks that all
+backends return the same ids and prints the backend to put in
+SPATIAL_INDEX for this design's size distribution.
+
+The instance bboxes come from a DEF and its LEFs, tiled `--tile` times
+in each direction to reach a larger design, or from a synthetic
+placement (standard cell rows, optionally with macros) when no files are
+given.
+
+    python benchmarks/bench_spatial_index.py [--tile 4] [DEF LEF ...]
+    python benchmarks/bench_spatial_index.py --synthetic 1000000 [--macros 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '../src'))
+sys.path.append(os.path.join(HERE, '../lef_def'))
+
+from spatial_index import BACKENDS
+
+DESIGN = os.path.join(HERE, '../test/design_files/design_2')
+
+WINDOWS = (("small", 20), ("medium", 100), ("large", 4))   # (name, queries)
+
+
+def design_bboxes(files, tile):
+    from def_parser import ParseWorker
+    from lef_parser import LefParserImplement
+    from parse_progress import ParseProgress
+    from placement import dbu_to_microns, instance_bboxes
+
+    lef = LefParserImplement()
+    for path in files[1:]:
+        lef.parse(path)
+    def_data = ParseWorker(files[0]).load(ParseProgress()).def_data
+    components = def_data.components
+
+    found, widths, heights, _ = lef.registry.lookup(components.cell_name_ids)
+    bboxes = instance_bboxes(dbu_to_microns(components.locations[found], def_data.units.microns),
+                             np.column_stack((widths[found], heights[found])), components.orient_ids[found])
+
+    span = bboxes[:, 2:].max(axis=0) - bboxes[:, :2].min(axis=0)
+    tiles = [bboxes + np.tile(span * (i, j), 2) for i in range(tile) for j in range(tile)]
+    return np.concatenate(tiles)
+
+
+def synthetic_bboxes(count, macros, seed=1):
+    rng = np.random.default_rng(seed)
+    side = np.sqrt(count) * 1.4
+    x = rng.uniform(0, side, count).round(2)
+    y = rng.integers(0, int(side / 1.4) + 1, count) * 1.4
+    w = rng.choice([0.19, 0.38, 0.57, 0.76, 1.14], count)
+    cells = np.column_stack((x, y, x + w, y + 1.4))
+    corners = rng.uniform(0, side * 0.9, (macros, 2))
+    sizes = rng.uniform(side * 0.01, side * 0.08, (macros, 2))
+    return np.concatenate((cells, np.hstack((corners, corners + sizes))))
+
+
+def make_windows(bboxes, rng):
+    low, high = bboxes[:, :2].min(axis=0), bboxes[:, 2:].max(axis=0)
+    span = high - low
+    cell = np.median(bboxes[:, 2:] - bboxes[:, :2], axis=0)
+    sides = {"small": cell * 4, "medium": span * 0.1, "large": span * 0.5}
+    windows = {}
+    for name, count in WINDOWS:
+        corners = low + rng.uniform(0, 1, (count, 2)) * np.maximum(span - sides[name], 0)
+        windows[name] = [tuple(c) + tuple(c + sides[name]) for c in corners.tolist()]
+    return windows
+
+
+def describe(bboxes):
+    extent = bboxes[:, 2:] - bboxes[:, :2]
+    median = np.median(extent, axis=0)
+    p99 = np.percentile(extent, 99, axis=0)
+    large = np.mean((extent > 4 * median).any(axis=1))
+    print(f"{len(bboxes)} boxes, median {median[0]:.2f} x {median[1]:.2f}, "
+          f"p99 {p99[0]:.2f} x {p99[1]:.2f}, max {extent[:, 0].max():.2f} x {extent[:, 1].max():.2f}, "
+          f"{100 * large:.2f}% over 4x median")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--tile", type=int, default=4)
+    parser.add_argument("--synthetic", type=int, default=0, help="number of synthetic standard cells")
+    parser.add_argument("--macros", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        bboxes = synthetic_bboxes(args.synthetic, args.macros)
+    else:
+        files = args.files or [os.path.join(DESIGN, 'ac97_ctrl.def'), os.path.join(DESIGN, 'nangate45.lef')]
+        bboxes = design_bboxes(files, args.tile)
+    ids = np.arange(len(bboxes), dtype=np.int64)
+    describe(bboxes)
+    windows = make_windows(bboxes, np.random.default_rng(2))
+
+    print(f"{'backend':>8}{'build s':>9}" + "".join(f"{name + ' ms/q':>15}" for name, _ in WINDOWS))
+    results = {}
+    reference = None
+    for name, backend in BACKENDS.items():
+        start = time.perf_counter()
+        spatial_index = backend(ids, bboxes)
+        build = time.perf_counter() - start
+
+        per_query = []
+        hits = []
+        for window_name, _ in WINDOWS:
+            start = time.perf_counter()
+            found = [spatial_index.query(w) for w in windows[window_name]]
+            per_query.append((time.perf_counter() - start) / len(found))
+            hits.extend(np.sort(f) for f in found)
+
+        if reference is None:
+            reference = hits
+        assert all(np.array_equal(a, b) for a, b in zip(reference, hits)), f"{name} returns different ids"
+
+        results[name] = (build, per_query)
+        print(f"{name:>8}{build:>9.3f}" + "".join(f"{1000 * q:>15.3f}" for q in per_query))
+
+    # Interactive use is dominated by small and medium windows (zoomed views,
+    # picking); the build is paid once per load.
+    best = min(results, key=lambda n: results[n][0] + 100 * (results[n][1][0] + results[n][1][1]))
+    print(f"best for this design: SPATIAL_INDEX={best}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Tile-partitioned analysis (tile_partition.py): counts overlapping instance
+pairs of a synthetic random placement on the whole die, then on k-d tiles
+through map_tiles, serially and in a process pool. Pairs are counted
+once, by the tile that owns the lower left corner of their intersection,
+so all runs must give the same count.
+
+    python benchmarks/bench_tile_partition.py [--count 1000000] [--tiles 16] [--workers 4]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, '../src'))
+sys.path.append(os.path.join(HERE, '../lef_def'))
+
+from tile_partition import TilePartition, map_tiles
+
+
+def overlapping_pairs(tile):
+    """Number of pairs of boxes with a positive-area overlap that this tile owns."""
+    order = np.argsort(tile.bboxes[:, 0], kind='stable')
+    boxes = tile.bboxes[order]
+    total = 0
+    # Sweep in x: box i can only overlap the boxes starting before it ends.
+    for k in range(1, len(boxes)):
+        a, b = boxes[:-k], boxes[k:]
+        reach = b[:, 0] < a[:, 2]
+        if not reach.any():
+            break
+        hit = reach & (b[:, 1] < a[:, 3]) & (a[:, 1] < b[:, 3])
+        x = np.maximum(a[hit, 0], b[hit, 0])
+        y = np.maximum(a[hit, 1], b[hit, 1])
+        total += int(np.count_nonzero(tile.owns_points(x, y)))
+    return total
+
+
+def placement(count, seed=1):
+    rng = np.random.default_rng(seed)
+    side = np.sqrt(count) * 1.2
+    x = rng.uniform(0, side, count)
+    y = rng.integers(0, int(side / 1.4) + 1, count) * 1.4
+    w = rng.choice([0.19, 0.38, 0.57, 0.76, 1.14], count)
+    return np.column_stack((x, y, x + w, y + 1.4))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1000000)
+    parser.add_argument("--tiles", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    bboxes = placement(args.count)
+    ids = np.arange(len(bboxes))
+    halo = float((bboxes[:, 2:] - bboxes[:, :2]).max())
+
+    start = time.perf_counter()
+    whole = map_tiles(overlapping_pairs, TilePartition(ids, bboxes, 1), sum, num_workers=1)
+    whole_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    partition = TilePartition(ids, bboxes, args.tiles, halo)
+    split = time.perf_counter() - start
+    sizes = [int(np.count_nonzero(partition.owner == t)) for t in range(len(partition))]
+
+    start = time.perf_counter()
+    serial = map_tiles(overlapping_pairs, partition, sum, num_workers=1)
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pooled = map_tiles(overlapping_pairs, partition, sum, num_workers=args.workers)
+    pooled_time = time.perf_counter() - start
+
+    assert whole == serial == pooled, (whole, serial, pooled)
+    print(f"{args.count} boxes, {whole} overlapping pairs, {os.cpu_count()} cores")
+    print(f"{args.tiles} tiles of {min(sizes)}..{max(sizes)} boxes, partition {split:.3f} s")
+    print(f"whole die              {whole_time:8.3f} s")
+    print(f"tiles, serial          {serial_time:8.3f} s")
+    print(f"tiles, {args.workers} processes    {pooled_time:8.3f} s")
+
+
+if __name__ == '__main__':
+    main()
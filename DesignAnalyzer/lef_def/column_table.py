@@ -0,0 +1,102 @@
+import numpy as np
+
+
+class ColumnTable:
+    """Append-only table of contiguous NumPy columns.
+
+    Subclasses list their columns in COLUMNS as (name, dtype) pairs and the
+    name-id columns in NAME_ID_COLUMNS. Rows are staged in a small Python list
+    and flushed into the columns CHUNK rows at a time, so building a table
+    pays one array copy per chunk instead of one per row; the columns grow
+    by doubling.
+    """
+    COLUMNS = ()
+    NAME_ID_COLUMNS = ()
+    CHUNK = 65536
+
+    def __init__(self, capacity=0):
+        self._columns = {name: np.empty(capacity, dtype) for name, dtype in self.COLUMNS}
+        self._size = 0
+        self._pending = []
+
+    def append(self, *row):
+        self._pending.append(row)
+        if len(self._pending) >= self.CHUNK:
+            self._flush()
+
+    def extend(self, other):
+        self._flush()
+        self._append_columns(other.columns())
+
+    @classmethod
+    def concatenate(cls, tables):
+        merged = cls()
+        for table in tables:
+            merged.extend(table)
+        return merged
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Wrap existing column arrays (e.g. memory-mapped ones) without copying."""
+        table = cls()
+        table._columns = dict(columns)
+        table._size = len(table._columns[cls.COLUMNS[0][0]])
+        return table
+
+    def columns(self):
+        """Trimmed column arrays, keyed by column name."""
+        self._flush()
+        return {name: self._columns[name][:self._size] for name, _ in self.COLUMNS}
+
+    def column(self, name) -> np.ndarray:
+        self._flush()
+        return self._columns[name][:self._size]
+
+    def remap_ids(self, remap):
+        """Rewrite the name-id columns through a local-id -> global-id array."""
+        self._flush()
+        remap = np.asarray(remap, dtype=np.int32)
+        for name in self.NAME_ID_COLUMNS:
+            self._columns[name] = remap[self._columns[name][:self._size]]
+
+    def name_ids(self):
+        """Sorted unique ids held by the name-id columns."""
+        columns = self.columns()
+        if not self.NAME_ID_COLUMNS:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate([columns[name] for name in self.NAME_ID_COLUMNS]).astype(np.int64))
+
+    def __len__(self):
+        return self._size + len(self._pending)
+
+    def __getstate__(self):
+        return {name: column.copy() for name, column in self.columns().items()}
+
+    def __setstate__(self, state):
+        self._columns = state
+        self._size = len(state[self.COLUMNS[0][0]])
+        self._pending = []
+
+    def _flush(self):
+        if not self._pending:
+            return
+        block = np.array(self._pending, dtype=np.int64)
+        self._pending = []
+        self._append_columns({name: block[:, j] for j, (name, _) in enumerate(self.COLUMNS)})
+
+    def _append_columns(self, columns):
+        count = len(columns[self.COLUMNS[0][0]])
+        self._reserve(self._size + count)
+        for name, _ in self.COLUMNS:
+            self._columns[name][self._size:self._size + count] = columns[name]
+        self._size += count
+
+    def _reserve(self, needed):
+        capacity = len(self._columns[self.COLUMNS[0][0]])
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, self.CHUNK)
+        for name, dtype in self.COLUMNS:
+            grown = np.empty(capacity, dtype)
+            grown[:self._size] = self._columns[name][:self._size]
+            self._columns[name] = grown
@@ -0,0 +1,112 @@
+import numpy as np
+
+from typing import Tuple
+
+from column_table import ColumnTable
+
+# Fixed code tables for the small enumerations stored per component.
+ORIENTATIONS = ("N", "W", "S", "E", "FN", "FW", "FS", "FE")
+PLACEMENT_STATUSES = ("UNPLACED", "PLACED", "FIXED", "COVER")
+
+ORIENT_CODE = {name: code for code, name in enumerate(ORIENTATIONS)}
+STATUS_CODE = {name: code for code, name in enumerate(PLACEMENT_STATUSES)}
+
+COMPONENT_COLUMNS = (
+    ("inst_name_id", np.int32),
+    ("cell_name_id", np.int32),
+    ("type_id", np.int32),
+    ("x", np.int32),
+    ("y", np.int32),
+    ("orient_id", np.int8),     # index into ORIENTATIONS
+    ("status", np.int8),        # index into PLACEMENT_STATUSES
+)
+
+# Name-id columns that must be rewritten when ids move to another NameIndex.
+NAME_ID_COLUMNS = ("inst_name_id", "cell_name_id", "type_id")
+
+
+class ComponentRow:
+    """Read-only view of one row, shaped like the old Component dataclass."""
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    @property
+    def inst_name_id(self) -> int:
+        return int(self._table.inst_name_ids[self._index])
+
+    @property
+    def cell_name_id(self) -> int:
+        return int(self._table.cell_name_ids[self._index])
+
+    @property
+    def type_id(self) -> int:
+        return int(self._table.type_ids[self._index])
+
+    @property
+    def location(self) -> Tuple[int, int]:
+        return int(self._table.x[self._index]), int(self._table.y[self._index])
+
+    @property
+    def orient(self) -> str:
+        return ORIENTATIONS[self._table.orient_ids[self._index]]
+
+    @property
+    def status(self) -> str:
+        return PLACEMENT_STATUSES[self._table.statuses[self._index]]
+
+    def __repr__(self):
+        return (f"ComponentRow(inst_name_id={self.inst_name_id}, cell_name_id={self.cell_name_id}, "
+                f"type_id={self.type_id}, location={self.location}, orient={self.orient}, "
+                f"status={self.status})")
+
+
+class ComponentTable(ColumnTable):
+    """Columnar store of DEF components.
+
+    Indexing and iteration return ComponentRow views, so code written for the
+    old List[Component] keeps working; the column properties return NumPy
+    arrays for vectorized work.
+    """
+    COLUMNS = COMPONENT_COLUMNS
+    NAME_ID_COLUMNS = NAME_ID_COLUMNS
+
+    def append(self, inst_name_id, cell_name_id, type_id, x, y, orient_id=0, status=0):
+        super().append(inst_name_id, cell_name_id, type_id, x, y, orient_id, status)
+
+    # Vectorized accessors
+    @property
+    def inst_name_ids(self) -> np.ndarray: return self.column("inst_name_id")
+    @property
+    def cell_name_ids(self) -> np.ndarray: return self.column("cell_name_id")
+    @property
+    def type_ids(self) -> np.ndarray: return self.column("type_id")
+    @property
+    def x(self) -> np.ndarray: return self.column("x")
+    @property
+    def y(self) -> np.ndarray: return self.column("y")
+    @property
+    def orient_ids(self) -> np.ndarray: return self.column("orient_id")
+    @property
+    def statuses(self) -> np.ndarray: return self.column("status")
+
+    @property
+    def locations(self) -> np.ndarray:
+        """(N, 2) array of placement locations in DEF database units."""
+        return np.column_stack((self.x, self.y))
+
+    # Row-view API
+    def __getitem__(self, index):
+        self._flush()
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("component index out of range")
+        return ComponentRow(self, index)
+
+    def __iter__(self):
+        self._flush()
+        for index in range(self._size):
+            yield ComponentRow(self, index)
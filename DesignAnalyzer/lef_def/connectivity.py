@@ -0,0 +1,218 @@
+import logging
+
+import numpy as np
+
+from global_name_index import gname_index
+
+########################################################################
+#
+# Connectivity of the DEF NETS in compressed sparse row (CSR) form.
+#
+# Every '( inst pin )' of a net is a pin-ref p, and all per pin-ref arrays
+# are indexed by p:
+#
+#   net -> pin-refs      net_offsets (M + 1); the pin-refs of net n are
+#                        net_offsets[n]:net_offsets[n + 1], in file order
+#   pin-ref columns      pin_inst (component row, -1 for a top level PIN),
+#                        pin_name_ids, pin_net, pin_dirs (PIN_DIRECTIONS code
+#                        from the LEF macro pin)
+#   instance -> pin-refs inst_offsets (N + 1) over inst_pins; inst_nets is
+#                        pin_net[inst_pins], so the nets of instance i are
+#                        inst_nets[inst_offsets[i]:inst_offsets[i + 1]]
+#
+# Instances are the rows of the component table the graph was built from.
+# Queries take and return arrays and expand a whole frontier per step, so
+# fanout, fan-in cones and neighbourhoods never walk the nets one by one.
+#
+########################################################################
+
+PIN_DIRECTIONS = ("UNKNOWN", "INPUT", "OUTPUT", "INOUT", "FEEDTHRU")
+PIN_DIRECTION_CODE = {name: code for code, name in enumerate(PIN_DIRECTIONS)}
+INPUT = PIN_DIRECTION_CODE["INPUT"]
+OUTPUT = PIN_DIRECTION_CODE["OUTPUT"]
+
+
+def csr_gather(offsets, values, rows):
+    """Concatenated values[offsets[r]:offsets[r + 1]] of all rows, with the row of each value.
+
+    values=None returns the positions themselves.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64) if values is None else values[:0], rows[:0]
+    owner = np.repeat(np.arange(len(rows)), lengths)
+    positions = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths) + starts[owner]
+    return positions if values is None else values[positions], rows[owner]
+
+
+class Connectivity:
+    """Net <-> instance graph of a design; see the module comment."""
+
+    def __init__(self, net_name_ids, net_offsets, pin_inst, pin_name_ids, pin_dirs, inst_name_ids):
+        self.net_name_ids = net_name_ids
+        self.net_offsets = net_offsets
+        self.pin_inst = pin_inst
+        self.pin_name_ids = pin_name_ids
+        self.pin_dirs = pin_dirs
+        self.inst_name_ids = inst_name_ids
+
+        num_nets = len(net_name_ids)
+        self.pin_net = np.repeat(np.arange(num_nets, dtype=np.int32), np.diff(net_offsets))
+
+        placed = np.flatnonzero(pin_inst >= 0)
+        self.inst_pins = placed[np.argsort(pin_inst[placed], kind='stable')]
+        self.inst_offsets = np.zeros(len(inst_name_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pin_inst[placed], minlength=len(inst_name_ids)), out=self.inst_offsets[1:])
+        self.inst_nets = self.pin_net[self.inst_pins]
+
+        self.net_degree = np.diff(net_offsets)
+        self._net_rows = _dense_rows(net_name_ids)
+        self._inst_rows = _dense_rows(inst_name_ids)
+
+    @classmethod
+    def from_nets(cls, nets, components, registry=None):
+        """Build from parsed Net records, the component table their instances refer to, and
+        the MacroRegistry for pin directions (directions stay UNKNOWN without it)."""
+        inst_name_ids = components.inst_name_ids
+        net_name_ids = np.fromiter((net.name_id for net in nets), dtype=np.int32, count=len(nets))
+        net_offsets = np.zeros(len(nets) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter((len(net.connections) for net in nets), dtype=np.int64, count=len(nets)),
+                  out=net_offsets[1:])
+
+        total = int(net_offsets[-1])
+        cell_ids = np.fromiter((c.cell_id for net in nets for c in net.connections), dtype=np.int64, count=total)
+        pin_name_ids = np.fromiter((c.pin_id for net in nets for c in net.connections), dtype=np.int32,
+                                   count=total)
+
+        inst_rows = _dense_rows(inst_name_ids)
+        known = (cell_ids >= 0) & (cell_ids < len(inst_rows))
+        pin_inst = np.full(total, -1, dtype=np.int32)
+        pin_inst[known] = inst_rows[cell_ids[known]]
+
+        top_level = gname_index.get_id("PIN") if gname_index.has_name("PIN") else -1
+        unknown = (pin_inst < 0) & (cell_ids != top_level)
+        if unknown.any():
+            logging.warning(f"{int(unknown.sum())} net connections refer to unknown instances, e.g. "
+                            f"{gname_index.getName(int(cell_ids[np.flatnonzero(unknown)[0]]))}.")
+
+        pin_dirs = np.zeros(total, dtype=np.int8)
+        if registry is not None and total:
+            pin_dirs = _pin_directions(pin_inst, pin_name_ids, components.cell_name_ids, registry)
+
+        return cls(net_name_ids, net_offsets, pin_inst, pin_name_ids, pin_dirs, inst_name_ids)
+
+    # Ids
+    def net_row(self, net_name_id):
+        return _row(self._net_rows, net_name_id)
+
+    def instance_row(self, inst_name_id):
+        return _row(self._inst_rows, inst_name_id)
+
+    def num_nets(self):
+        return len(self.net_name_ids)
+
+    def num_instances(self):
+        return len(self.inst_name_ids)
+
+    # Queries
+    def net_pins(self, net):
+        """Pin-ref indices of a net."""
+        return np.arange(self.net_offsets[net], self.net_offsets[net + 1])
+
+    def net_instances(self, nets):
+        """Unique instance rows on any of the nets."""
+        insts, _ = csr_gather(self.net_offsets, self.pin_inst, np.atleast_1d(nets))
+        return np.unique(insts[insts >= 0])
+
+    def instance_nets(self, insts):
+        """Unique nets touching any of the instance rows."""
+        nets, _ = csr_gather(self.inst_offsets, self.inst_nets, np.atleast_1d(insts))
+        return np.unique(nets)
+
+    def drivers(self, nets):
+        """Instance rows driving (OUTPUT pins on) any of the nets."""
+        pins, _ = csr_gather(self.net_offsets, None, np.atleast_1d(nets))
+        pins = pins[(self.pin_dirs[pins] == OUTPUT) & (self.pin_inst[pins] >= 0)]
+        return np.unique(self.pin_inst[pins])
+
+    def fanout(self, net):
+        """Instance rows of the sinks of a net: every pin-ref that is not an OUTPUT."""
+        pins = self.net_pins(net)
+        pins = pins[(self.pin_dirs[pins] != OUTPUT) & (self.pin_inst[pins] >= 0)]
+        return np.unique(self.pin_inst[pins])
+
+    def fanin_cone(self, insts, depth=None, max_fanout=None):
+        """Instance rows in the transitive fan-in of insts (not including them), up to `depth`
+        levels back; nets with more than max_fanout pin-refs (clock, reset) are not followed."""
+        insts = np.unique(np.asarray(insts, dtype=np.int64).ravel())
+        seen = np.zeros(len(self.inst_name_ids), dtype=bool)
+        seen[insts] = True
+        cone = []
+        frontier = insts
+        level = 0
+        while len(frontier) and (depth is None or level < depth):
+            pins, _ = csr_gather(self.inst_offsets, self.inst_pins, frontier)
+            nets = np.unique(self.pin_net[pins[self.pin_dirs[pins] == INPUT]])
+            if max_fanout is not None:
+                nets = nets[self.net_degree[nets] <= max_fanout]
+            found = self.drivers(nets)
+            frontier = found[~seen[found]]
+            seen[frontier] = True
+            cone.append(frontier)
+            level += 1
+        return np.concatenate(cone) if cone else insts[:0]
+
+    def neighbors(self, insts, depth=1, max_fanout=None):
+        """Instance rows within `depth` net hops of insts (not including them), ignoring
+        direction; nets with more than max_fanout pin-refs are not followed."""
+        insts = np.unique(np.asarray(insts, dtype=np.int64).ravel())
+        seen = np.zeros(len(self.inst_name_ids), dtype=bool)
+        seen[insts] = True
+        found_all = []
+        frontier = insts
+        for _ in range(depth):
+            if not len(frontier):
+                break
+            nets = self.instance_nets(frontier)
+            if max_fanout is not None:
+                nets = nets[self.net_degree[nets] <= max_fanout]
+            found = self.net_instances(nets)
+            frontier = found[~seen[found]]
+            seen[frontier] = True
+            found_all.append(frontier)
+        return np.concatenate(found_all) if found_all else insts[:0]
+
+
+def _dense_rows(name_ids):
+    """name id -> row array (-1 where the id has no row)."""
+    name_ids = np.asarray(name_ids, dtype=np.int64)
+    rows = np.full(int(name_ids.max()) + 1 if len(name_ids) else 0, -1, dtype=np.int32)
+    rows[name_ids] = np.arange(len(name_ids), dtype=np.int32)
+    return rows
+
+
+def _row(rows, name_id):
+    if 0 <= name_id < len(rows) and rows[name_id] >= 0:
+        return int(rows[name_id])
+    return None
+
+
+def _pin_directions(pin_inst, pin_name_ids, cell_name_ids, registry):
+    """PIN_DIRECTIONS code of every pin-ref, looked up once per (macro, pin) pair."""
+    placed = pin_inst >= 0
+    cells = np.full(len(pin_inst), -1, dtype=np.int64)
+    cells[placed] = cell_name_ids[pin_inst[placed]]
+    pairs = (cells << 32) | pin_name_ids.astype(np.int64)
+    unique_pairs, inverse = np.unique(pairs, return_inverse=True)
+
+    codes = np.zeros(len(unique_pairs), dtype=np.int8)
+    pin_names = gname_index.get_names((unique_pairs & 0xFFFFFFFF).tolist())
+    for k, (pair, pin_name) in enumerate(zip(unique_pairs.tolist(), pin_names)):
+        macro = registry.get_by_id(pair >> 32) if pair >= 0 else None
+        pin = macro.pins.get(pin_name) if macro is not None else None
+        if pin is not None and pin.direction:
+            codes[k] = PIN_DIRECTION_CODE.get(pin.direction.split()[0].upper(), 0)
+    return codes[inverse.ravel()]
@@ -5,15 +5,24 @@ import json
 import re
 
 import os
-import threading
+import itertools
 import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+import numpy as np
 
 
 from dataclasses import dataclass, field
 from typing import List, Tuple, Optional, Dict
 import re
 
-from global_name_index import gname_index
+from global_name_index import gname_index, NameIndex
+from def_reader import DefLineReader, index_def_sections, gaps_between
+from component_table import ComponentTable, ORIENT_CODE, STATUS_CODE
+from routing_table import NetRouting
+from design_cache import DesignCache
+from parse_progress import ParseProgress, ParseCancelled, CancelToken, log_section_summary, abandon_pool
 
 
 @dataclass
@@ -68,13 +77,6 @@ class Region:
     name_id: int
     coordinates: List[Tuple[int, int]]
 
-@dataclass
-class Component:
-    inst_name_id: int
-    cell_name_id: int
-    type_id: int
-    location: Tuple[int, int]
-
 @dataclass
 class Pin:
     name_id: int
@@ -88,6 +90,7 @@ class Blockage:
     ll_y: int
     ur_x: int
     ur_y: int
+    layer_id: Optional[int] = None      # None for a placement blockage
 
 @dataclass
 class SpecialNet:
@@ -105,61 +108,66 @@ class DefData:
     nets: List[Net] = field(default_factory=list)
     vias: List[Via] = field(default_factory=list)
     regions: List[Region] = field(default_factory=list)
-    components: List[Component] = field(default_factory=list)
+    components: ComponentTable = field(default_factory=ComponentTable)
+    net_routing: NetRouting = field(default_factory=NetRouting)
+    specialnet_routing: NetRouting = field(default_factory=NetRouting)
     pins: List[Pin] = field(default_factory=list)
     blockages: List[Blockage] = field(default_factory=list)
     specialnets: List[SpecialNet] = field(default_factory=list)
     property_definitions: Dict[int, int] = field(default_factory=dict)
 
 class DefParser:
-    def __init__(self):
+    def __init__(self, name_index=None):
         self.def_data = DefData()
+        self.name_index = name_index if name_index is not None else gname_index.current()
+        self.progress = None    # optional ParseProgress fed with sections and records
 
     def parse_version(self, line: str):
         if line.startswith("VERSION"):
             version = line.split()[1]
-            self.def_data.version_id = gname_index.set(version)
+            self.def_data.version_id = self.name_index.set(version)
 
     def parse_design_name(self, line: str):
         if line.startswith("DESIGN"):
             design = line.split()[1].strip(";")
-            self.def_data.design_name_id = gname_index.set(design)
+            self.def_data.design_name_id = self.name_index.set(design)
 
     def parse_units(self, line: str):
         line = line.rstrip(';').strip()
         if line.startswith("UNITS") and "MICRONS" in line:
             parts = line.split()
-            distance_id = gname_index.set("MICRONS")
+            distance_id = self.name_index.set("MICRONS")
             self.def_data.units = Units(distance_id=distance_id, microns=int(parts[-1]))
 
     def parse_diearea(self, line: str):
-        coords = list(map(int, re.findall(r'\d+', line)))
-        self.def_data.diearea = DieArea(*coords)
+        coords = list(map(int, re.findall(r'-?\d+', line)))
+        xs, ys = coords[0::2], coords[1::2]
+        self.def_data.diearea = DieArea(min(xs), min(ys), max(xs), max(ys))
 
     def parse_row(self, line: str):
         parts = line.split()
-        name_id = gname_index.set(parts[1])
-        type_id = gname_index.set(parts[2])
+        name_id = self.name_index.set(parts[1])
+        type_id = self.name_index.set(parts[2])
         x, y = int(parts[3]), int(parts[4])
-        orientation_id = gname_index.set(parts[5])
+        orientation_id = self.name_index.set(parts[5])
         step = tuple(map(int, re.findall(r'\d+', ' '.join(parts[6:]))))
         self.def_data.rows.append(Row(name_id, type_id, x, y, orientation_id, step))
 
     def parse_track(self, line: str):
         parts = line.split()
-        direction_id = gname_index.set(parts[1])
+        direction_id = self.name_index.set(parts[1])
         step = int(parts[6])
-        layer_id = gname_index.set(parts[-1])
+        layer_id = self.name_index.set(parts[-1])
         self.def_data.tracks.append(Track(direction_id, step, layer_id))
 
     def parse_via(self, lines: List[str]):
-        name_id = gname_index.set(lines[0].split()[1])
+        name_id = self.name_index.set(lines[0].split()[1])
         via = Via(name_id)
         for line in lines[1:]:
             if line.startswith("+ CUT"):
                 via.cut_size = tuple(map(int, re.findall(r'\d+', line)))
             elif line.startswith("+ LAYER"):
-                via.layer_ids.append(gname_index.set(line.split()[2]))
+                via.layer_ids.append(self.name_index.set(line.split()[2]))
             elif line.startswith("+ SPACING"):
                 via.cut_spacing = tuple(map(int, re.findall(r'\d+', line)))
             elif line.startswith("+ ENCLOSURE"):
@@ -168,28 +176,43 @@ class DefParser:
                 via.row_col = tuple(map(int, re.findall(r'\d+', line)))
         self.def_data.vias.append(via)
 
+    _placement_re = re.compile(r'\+\s*(PLACED|FIXED|COVER|UNPLACED)\b(?:\s*\(\s*(-?\d+)\s+(-?\d+)\s*\)\s*(\w+))?')
+
     def parse_component(self, line: str):
         try:
 
             line = line.rstrip(';')
             parts = line.split()
-            inst_id = gname_index.set(parts[1])
-            cell_id = gname_index.set(parts[2])
-            type_str = parts[3] if '+' not in parts[3] else parts[4]
-            type_id = gname_index.set(type_str)
-            coords = re.findall(r'\(\s*(\d+)\s+(\d+)\s*\)', line)
-            x, y = map(int, coords[0]) if coords else (0, 0)
-            self.def_data.components.append(Component(inst_id, cell_id, type_id, (x, y)))
+            inst_id = self.name_index.set(parts[1])
+            cell_id = self.name_index.set(parts[2])
+            # Type is the first '+' statement keyword; a bare '- inst cell ;' has none.
+            if len(parts) > 4 and parts[3] == '+':
+                type_str = parts[4]
+            elif len(parts) > 3:
+                type_str = parts[3].lstrip('+')
+            else:
+                type_str = "NONE"
+            type_id = self.name_index.set(type_str)
+
+            x, y, orient, status = 0, 0, 0, 0
+            placement = self._placement_re.search(line)
+            if placement:
+                status = STATUS_CODE[placement.group(1)]
+                if placement.group(2) is not None:
+                    x, y = int(placement.group(2)), int(placement.group(3))
+                    orient = ORIENT_CODE.get(placement.group(4), 0)
+
+            self.def_data.components.append(inst_id, cell_id, type_id, x, y, orient, status)
 
         except Exception as e:
             print(f"Error DEF parsing : line : {line}")
 
     def parse_pin(self, line: str):
         parts = line.split()
-        name_id = gname_index.set(parts[1])
-        net_id = gname_index.set(parts[-1])
-        direction_id = gname_index.set("INPUT")
-        use_id = gname_index.set("SIGNAL")
+        name_id = self.name_index.set(parts[1])
+        net_id = self.name_index.set(parts[-1])
+        direction_id = self.name_index.set("INPUT")
+        use_id = self.name_index.set("SIGNAL")
         self.def_data.pins.append(Pin(name_id, net_id, direction_id, use_id))
 
     def parse_blockage(self, line: str):
@@ -197,47 +220,204 @@ class DefParser:
         if len(coords) == 4:
             self.def_data.blockages.append(Blockage(*coords))
 
+    def parse_blockages_section(self, stream):
+        """One Blockage per RECT (and per POLYGON, as its bounding box) of each record."""
+        for line in stream:
+            if line.startswith("END BLOCKAGES"):
+                break
+            if not line.startswith("-"):
+                continue
+            tokens = " ".join(self._collect_record(line, stream)).rstrip(';').split()
+            layer_id = self.name_index.set(tokens[2]) if tokens[1] == "LAYER" and len(tokens) > 2 else None
+            i = 2
+            while i < len(tokens):
+                if tokens[i] in ("RECT", "POLYGON"):
+                    i, points = self._read_points(tokens, i + 1)
+                    if len(points) >= 2:
+                        xs, ys = [p[0] for p in points], [p[1] for p in points]
+                        self.def_data.blockages.append(Blockage(min(xs), min(ys), max(xs), max(ys), layer_id))
+                else:
+                    i += 1
+
     def parse_property_definition(self, line: str):
         match = re.match(r'PROPERTYDEFINITIONS\s+(\w+)\s+(\w+)', line)
         if match:
-            key_id = gname_index.set(match.group(1))
-            value_id = gname_index.set(match.group(2))
+            key_id = self.name_index.set(match.group(1))
+            value_id = self.name_index.set(match.group(2))
             self.def_data.property_definitions[key_id] = value_id
 
     def parse_specialnet(self, lines: List[str]):
-        name_id = gname_index.set(lines[0].split()[1])
+        tokens = " ".join(lines).rstrip(';').split()
+        name_id = self.name_index.set(tokens[1])
         component_ids = []
-        for line in lines[1:]:
-            comps = re.findall(r'\( (.*?) \)', line)
-            component_ids.extend(gname_index.set(c) for c in comps)
+        i = 2
+        while i < len(tokens) and tokens[i] == "(":
+            close = tokens.index(")", i)
+            component_ids.append(self.name_index.set(" ".join(tokens[i + 1:close])))
+            i = close + 1
         self.def_data.specialnets.append(SpecialNet(name_id=name_id, component_ids=component_ids))
 
+        self.parse_routing(tokens, i, name_id, self.def_data.specialnet_routing, special=True)
+
+    _point_re = re.compile(r'\(\s*(-?\d+)\s+(-?\d+)\s*\)')
+
     def parse_region(self, line: str):
-        match = re.findall(r'(\S+)\s+\(\s*(\d+)\s+(\d+)\s*\)', line)
-        if match:
-            name_id = gname_index.set(match[0][0])
-            coordinates = [(int(x), int(y)) for _, x, y in match]
+        parts = line.split()
+        points = self._point_re.findall(line)
+        if parts[0] == "-" and len(parts) > 1 and points:
+            name_id = self.name_index.set(parts[1])
+            coordinates = [(int(x), int(y)) for x, y in points]
             self.def_data.regions.append(Region(name_id=name_id, coordinates=coordinates))
 
     def parse_net(self, lines: List[str]):
-        name_id = gname_index.set(lines[0].split()[1])
+        tokens = " ".join(lines).rstrip(';').split()
+        name_id = self.name_index.set(tokens[1])
         connections = []
-        for line in lines[1:]:
-            tokens = re.findall(r'\( (\S+) (\S+) \)', line)
-            for cell, pin in tokens:
-                cell_id = gname_index.set(cell)
-                pin_id = gname_index.set(pin)
-                connections.append(Connection(cell_id, pin_id))
+        i = 2
+        while i < len(tokens) and tokens[i] == "(":
+            close = tokens.index(")", i)
+            cell_id = self.name_index.set(tokens[i + 1])
+            pin_id = self.name_index.set(tokens[i + 2])
+            connections.append(Connection(cell_id, pin_id))
+            i = close + 1
         self.def_data.nets.append(Net(name_id=name_id, connections=connections))
 
-    def parse(self, def_file_content: str):
-        lines = def_file_content.splitlines()
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            if not line or line.startswith("#"):
+        self.parse_routing(tokens, i, name_id, self.def_data.net_routing, special=False)
+
+    def parse_routing(self, tokens, i, net_id, routing, special):
+        """Walk the '+ ROUTED/FIXED/COVER/SHIELD ... NEW ...' options of a net record.
+
+        Consecutive points of a path become wire segments, via names become via
+        instances at the current point, and RECT/POLYGON shapes become rects.
+        Special nets carry an explicit width after the layer name; regular net
+        wires get width 0 (the layer default).
+        """
+        intern = self.name_index.set
+        wires, vias, rects = routing.wires, routing.vias, routing.rects
+        n = len(tokens)
+
+        layer_id = None         # None while outside a wire path
+        width = 0
+        last = None             # current point of the path
+        virtual = False
+        rect_pending = False
+
+        while i < n:
+            tok = tokens[i]
+
+            if tok == "+":
+                keyword = tokens[i + 1] if i + 1 < n else ""
+                i += 2
+                if layer_id is not None and keyword in _PATH_OPTIONS:
+                    i += _PATH_OPTIONS[keyword]
+                    continue
+
+                layer_id, last = None, None
+                if keyword in _WIRE_STATEMENTS:
+                    if keyword == "SHIELD":
+                        i += 1      # shielded net name
+                    if i < n and tokens[i] != "+":
+                        layer_id, width, i = self._start_path(tokens, i, special)
+                elif keyword in ("RECT", "POLYGON") and i < n:
+                    shape_layer = intern(tokens[i])
+                    i, points = self._read_points(tokens, i + 1)
+                    if points:
+                        xs, ys = [p[0] for p in points], [p[1] for p in points]
+                        rects.append(min(xs), min(ys), max(xs), max(ys), net_id, shape_layer)
+                elif keyword == "VIA" and i < n:
+                    via_id = intern(tokens[i])
+                    i += 2 if i + 1 < n and tokens[i + 1] in _ORIENTATIONS else 1
+                    i, points = self._read_points(tokens, i)
+                    for x, y in points:
+                        vias.append(x, y, via_id, net_id)
+
+            elif tok == "NEW" or (layer_id is None and tok in _WIRE_STATEMENTS):
+                layer_id, width, i = self._start_path(tokens, i + 1, special)
+                last = None
+
+            elif layer_id is None:
                 i += 1
+
+            elif tok == "(":
+                close = tokens.index(")", i) if ")" in tokens[i:] else n
+                values = tokens[i + 1:close]
+                i = close + 1
+
+                if rect_pending:
+                    rect_pending = False
+                    if last is not None and len(values) == 4:
+                        dx1, dy1, dx2, dy2 = map(int, values)
+                        rects.append(last[0] + dx1, last[1] + dy1, last[0] + dx2, last[1] + dy2,
+                                     net_id, layer_id)
+                    continue
+
+                try:
+                    x = last[0] if values[0] == "*" else int(values[0])
+                    y = last[1] if values[1] == "*" else int(values[1])
+                except (IndexError, TypeError, ValueError):
+                    # e.g. '( * 100 )' with no point before it: skip the point, keep the net.
+                    logging.warning(f"DEF net {self.name_index.getName(net_id)}: malformed routing point "
+                                    f"( {' '.join(values)} ) skipped")
+                    continue
+                if last is not None and not virtual and (x, y) != last:
+                    wires.append(last[0], last[1], x, y, width, net_id, layer_id)
+                last, virtual = (x, y), False
+
+            elif tok in _PATH_KEYWORDS:
+                if tok == "VIRTUAL":
+                    virtual = True
+                elif tok == "RECT":
+                    rect_pending = True
+                i += 1 + _PATH_KEYWORDS[tok]
+
+            else:
+                # A via name placed at the current point, with an optional orientation.
+                if last is not None:
+                    vias.append(last[0], last[1], intern(tok), net_id)
+                i += 2 if i + 1 < n and tokens[i + 1] in _ORIENTATIONS else 1
+
+        routing.end_net(net_id)
+
+    def _start_path(self, tokens, i, special):
+        layer_id = self.name_index.set(tokens[i])
+        i += 1
+        width = 0
+        if special and i < len(tokens) and tokens[i].isdigit():
+            width = int(tokens[i])
+            i += 1
+        return layer_id, width, i
+
+    @staticmethod
+    def _read_points(tokens, i):
+        """Read consecutive '( x y )' points, resolving '*' against the previous point."""
+        points = []
+        while i < len(tokens) and tokens[i] == "(":
+            close = tokens.index(")", i)
+            values = tokens[i + 1:close]
+            i = close + 1
+            if len(values) < 2:
                 continue
+            prev = points[-1] if points else (0, 0)
+            x = prev[0] if values[0] == "*" else int(values[0])
+            y = prev[1] if values[1] == "*" else int(values[1])
+            points.append((x, y))
+        return i, points
+
+    def parse(self, def_file_content: str):
+        self.parse_lines(def_file_content.splitlines())
+
+    def parse_lines(self, lines):
+        """Parse DEF from any iterable of lines (a list, a file or a DefLineReader)."""
+        stream = _LineStream(lines)
+        progress = self.progress
+
+        for line in stream:
+            if progress is not None:
+                keyword = line.split(None, 1)[0]
+                if keyword in _TIMED_SECTIONS:
+                    progress.enter(keyword)
+                elif keyword == "END":
+                    progress.enter("OTHER")
 
             if line.startswith("VERSION"):
                 self.parse_version(line)
@@ -253,76 +433,146 @@ class DefParser:
                 self.parse_track(line)
             elif line.startswith("VIA"):
                 via_lines = [line]
-                i += 1
-                while i < len(lines) and not lines[i].strip().startswith("END"):
-                    via_lines.append(lines[i].strip())
-                    i += 1
+                for line in stream:
+                    if line.startswith("END"):
+                        break
+                    via_lines.append(line)
                 self.parse_via(via_lines)
             elif line.startswith("COMPONENTS"):
-                i += 1
-                while i < len(lines):
-                    line = lines[i].strip()
-                    if line.startswith("END COMPONENTS"):
-                        break
-                    if line.startswith("-"):
-                        self.parse_component(line)
-                    i += 1
+                self.parse_components_section(stream)
             elif line.startswith("PIN"):
                 self.parse_pin(line)
+            elif line.startswith("BLOCKAGES"):
+                self.parse_blockages_section(stream)
             elif line.startswith("BLOCKAGE"):
                 self.parse_blockage(line)
             elif line.startswith("PROPERTYDEFINITIONS"):
                 self.parse_property_definition(line)
-            elif line.startswith("SPECIALNETS"):
-                i += 1
-                while i < len(lines):
-                    line = lines[i].strip()
-                    if line.startswith("END SPECIALNETS"):
+                for line in stream:
+                    if line.startswith("END PROPERTYDEFINITIONS"):
                         break
-                    if line.startswith("-"):
-                        specialnet_lines = [line]
-                        i += 1
-                        while i < len(lines) and not lines[i].strip().startswith("+"):
-                            specialnet_lines.append(lines[i].strip())
-                            i += 1
-                        self.parse_specialnet(specialnet_lines)
-                    else:
-                        i += 1
+            elif line.startswith("SPECIALNETS"):
+                self.parse_specialnets_section(stream)
             elif line.startswith("REGIONS"):
-                i += 1
-                while i < len(lines):
-                    line = lines[i].strip()
+                for line in stream:
                     if line.startswith("END REGIONS"):
                         break
                     self.parse_region(line)
-                    i += 1
             elif line.startswith("NETS"):
-                i += 1
-                while i < len(lines):
-                    line = lines[i].strip()
-                    if line.startswith("END NETS"):
-                        break
-                    if line.startswith("-"):
-                        net_lines = [line]
-                        i += 1
-                        while i < len(lines) and not lines[i].strip().startswith("+"):
-                            net_lines.append(lines[i].strip())
-                            i += 1
-                        self.parse_net(net_lines)
-                    else:
-                        i += 1
+                self.parse_nets_section(stream)
 
-            i += 1
+            if progress is not None and keyword in _RECORD_SECTIONS:
+                progress.enter("OTHER")     # their END line was consumed by the section parser
+
+    def parse_components_section(self, stream):
+        progress = self.progress
+        for line in stream:
+            if line.startswith("END COMPONENTS"):
+                break
+            if line.startswith("-"):
+                # Records may span lines ('- I1 B' then '+ PLACED ( 100 100 ) N ;').
+                self.parse_component(" ".join(self._collect_record(line, stream)))
+                if progress is not None:
+                    progress.record()
+
+    def parse_specialnets_section(self, stream):
+        progress = self.progress
+        for line in stream:
+            if line.startswith("END SPECIALNETS"):
+                break
+            if line.startswith("-"):
+                self.parse_specialnet(self._collect_record(line, stream))
+                if progress is not None:
+                    progress.record()
+
+    def parse_nets_section(self, stream):
+        progress = self.progress
+        for line in stream:
+            if line.startswith("END NETS"):
+                break
+            if line.startswith("-"):
+                self.parse_net(self._collect_record(line, stream))
+                if progress is not None:
+                    progress.record()
+
+    def _collect_record(self, first_line, stream):
+        """Gather a '- name ... ;' record, stopping early at the next record or END."""
+        record_lines = [first_line]
+        if first_line.endswith(";"):
+            return record_lines
+
+        for line in stream:
+            if line.startswith(("-", "END")):
+                stream.push_back(line)
+                break
+            record_lines.append(line)
+            if line.endswith(";"):
+                break
+        return record_lines
+
+
+# Sections timed separately by ParseProgress; everything else is accounted to "OTHER".
+_RECORD_SECTIONS = {"COMPONENTS", "NETS", "SPECIALNETS"}
+_TIMED_SECTIONS = _RECORD_SECTIONS | {"PINS", "VIAS", "REGIONS", "BLOCKAGES", "PROPERTYDEFINITIONS",
+                                      "GROUPS", "FILLS", "NONDEFAULTRULES", "STYLES"}
+
+_WIRE_STATEMENTS = {"ROUTED", "FIXED", "COVER", "NOSHIELD", "SHIELD"}
+_ORIENTATIONS = {"N", "S", "E", "W", "FN", "FS", "FE", "FW"}
+
+# '+ KEYWORD' options that stay inside the current wire path -> number of argument tokens
+_PATH_OPTIONS = {"SHAPE": 1, "STYLE": 1, "MASK": 1}
+
+# Bare path keywords -> number of argument tokens to skip
+_PATH_KEYWORDS = {"MASK": 1, "VIRTUAL": 0, "RECT": 0, "TAPER": 0, "TAPERRULE": 1, "STYLE": 1,
+                  "DO": 6}
+
+
+class _LineStream:
+    """Stripped, non-empty DEF lines with comments removed and one line of push-back."""
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._pending = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._pending is not None:
+            line, self._pending = self._pending, None
+            return line
+
+        for line in self._lines:
+            if "#" in line:
+                line = line.split("#", 1)[0]
+            line = line.strip()
+            if line:
+                return line
+
+        raise StopIteration
+
+    def push_back(self, line):
+        self._pending = line
 
 
 class ParseWorker(QObject):
     finished = pyqtSignal(dict)
+    progress = pyqtSignal(dict)     # throttled ParseProgress snapshots
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, cancel_token=None):
         super().__init__()
         self.file_path = file_path
-
-        self.num_threads = 10
+        self.cancel_token = cancel_token if cancel_token is not None else CancelToken()
+        # The table of the design being loaded, taken now: gname_index follows
+        # the active workspace, so it is not read again from the parse thread.
+        self.name_index = gname_index.current()
+
+        # DEF_READ_MT=<n> with n > 1 parses in n processes; unset, 0 or 1 streams in this thread.
+        num_workers = os.environ.get("DEF_READ_MT", "")
+        if num_workers.isdigit() and int(num_workers) > 1:
+            self.num_workers = int(num_workers)
+        else:
+            self.num_workers = 1
 
     def merge_def_data(self, def_data_list):
         merged = DefData()
@@ -343,13 +593,13 @@ class ParseWorker(QObject):
             merged.vias.extend(data.vias)
             merged.regions.extend(data.regions)
 
-            print(f"Merging {len(data.components)} components...")
             merged.components.extend(data.components)
 
-
             merged.pins.extend(data.pins)
             merged.blockages.extend(data.blockages)
             merged.specialnets.extend(data.specialnets)
+            merged.net_routing.extend(data.net_routing)
+            merged.specialnet_routing.extend(data.specialnet_routing)
 
             for k, v in data.property_definitions.items():
                 if k not in merged.property_definitions:
@@ -360,82 +610,239 @@ class ParseWorker(QObject):
 
     @pyqtSlot()
     def run(self):
-        with open(self.file_path, 'r') as def_file:
-            def_file_content = def_file.read()
+        # finished is emitted exactly once whatever happens, so the caller
+        # never waits on a load that died.
+        progress = None
+        try:
+            progress = ParseProgress(total_bytes=os.path.getsize(self.file_path),
+                                     report=self._report_progress, cancel_token=self.cancel_token)
+            combined_parser = self.load(progress)
+        except ParseCancelled:
+            progress.finish()
+            self._emit_finished(None, progress, cancelled=True)
+            return
+        except Exception as e:
+            logging.exception(f"Parse DEF {self.file_path} failed")
+            self._emit_finished(None, progress, error=f"{type(e).__name__}: {e}")
+            return
 
-        if os.environ.get("DEF_READ_MT"):
-            chunks = self.create_chunks(def_file_content, num_threads=self.num_threads)
-            parsers = self.parse_in_threads(chunks)
-            combined_parser = self.merge_parsers(parsers)
-        else:
-            print("Running DEF parser single thread...")
-            parser = DefParser()
-            parser.parse(def_file_content)
-            combined_parser = parser
+        self._emit_finished(combined_parser, progress)
 
+    def _emit_finished(self, parser, progress, cancelled=False, error=None):
         self.finished.emit({
             "file_path": self.file_path,
-            "parser": combined_parser
+            "parser": parser,
+            "cancelled": cancelled,
+            "error": error,
+            "sections": progress.summary() if progress is not None else [],
+            "elapsed": progress.elapsed() if progress is not None else 0.0
         })
 
-    def create_chunks(self, def_file_content: str, num_threads: int) -> list:
-        lines = def_file_content.splitlines()
-        total_lines = len(lines)
-        chunk_size = (total_lines + num_threads - 1) // num_threads
-
-        section_keywords = ["COMPONENTS", "REGIONS", "SPECIALNETS", "NETS"]
-        line_chunks = [
-            lines[i * chunk_size:(i + 1) * chunk_size]
-            for i in range(num_threads)
-            if i * chunk_size < total_lines
-        ]
-
-        for i in range(1, len(line_chunks)):
-            prev_chunk = line_chunks[i - 1]
-            for line in reversed(prev_chunk):
-                for section in section_keywords:
-                    if section in line and not line.strip().startswith(f"END {section}"):
-                        line_chunks[i].insert(0, section)
-                        break
-                else:
-                    continue
-                break
-
-        return ['\n'.join(chunk) for chunk in line_chunks]
-
-    def parse_in_threads(self, chunks: list) -> list:
-        parsers = [DefParser() for _ in range(len(chunks))]
-        threads = []
+    def cancel(self):
+        """Ask the running parse to stop; safe to call from any thread."""
+        self.cancel_token.cancel()
+
+    def _report_progress(self, snapshot):
+        snapshot["file_path"] = self.file_path
+        self.progress.emit(snapshot)
+
+    def load(self, progress):
+        cache = DesignCache(name_index=self.name_index)
+        progress.enter("CACHE LOAD")
+        cached_data = cache.load_def(self.file_path)
+
+        if cached_data is not None:
+            progress.position = lambda: progress.total_bytes
+            combined_parser = DefParser(name_index=self.name_index)
+            combined_parser.def_data = cached_data
+        elif self.num_workers > 1:
+            print(f"Running DEF parser in {self.num_workers} processes...")
+            combined_parser = self.parse_in_processes(progress)
+        else:
+            print("Running DEF parser single thread (streaming)...")
+            reader = DefLineReader(self.file_path)
+            progress.position = lambda: reader.position
+            progress.enter("OTHER")
+
+            parser = DefParser(name_index=self.name_index)
+            parser.progress = progress
+            parser.parse_lines(reader)
+            parser.progress = None
+            combined_parser = parser
 
-        def parse_chunk(index):
-            parsers[index].parse(chunks[index])
-            print(f"DEF parser {index} finished...")
+        if cached_data is None:
+            progress.enter("CACHE WRITE")
+            cache.save_def(self.file_path, combined_parser.def_data)
 
-        for i in range(len(chunks)):
-            thread = threading.Thread(target=parse_chunk, args=(i,))
-            threads.append(thread)
-            thread.start()
+        progress.finish()
+        return combined_parser
 
-        for thread in threads:
-            thread.join()
+    def parse_in_processes(self, progress=None):
+        """Parse COMPONENTS/NETS/SPECIALNETS record ranges in a process pool.
+
+        Everything outside those section bodies is small and is parsed here.
+        Each worker interns names into its own NameIndex; results are merged
+        in file order after remapping the local ids into self.name_index. Worker
+        time is reported per section as "<SECTION> (workers)", summed over
+        the workers; waiting on the pool plus the remap here is "POOL".
+        """
+        progress = progress if progress is not None else ParseProgress()
+        done_bytes = 0
+        progress.position = lambda: done_bytes
+
+        progress.enter("INDEX")
+        sections = index_def_sections(self.file_path, num_chunks=self.num_workers * 4)
+        file_size = os.path.getsize(self.file_path)
+
+        progress.enter("OTHER")
+        parser = DefParser(name_index=self.name_index)
+        gaps = gaps_between(sections, file_size)
+        parser.parse_lines(itertools.chain.from_iterable(
+            DefLineReader(self.file_path, start, end) for start, end in gaps))
+        done_bytes = sum(end - start for start, end in gaps)
+
+        def_data_list = [parser.def_data]
+
+        progress.enter("POOL")
+        pool_context = multiprocessing.get_context("spawn")
+        # Not a 'with' block: leaving one waits for every range in flight,
+        # which would make a cancel wait too.
+        pool = ProcessPoolExecutor(max_workers=self.num_workers, mp_context=pool_context)
+        try:
+            futures = [(pool.submit(_parse_def_range, self.file_path, section.name, start, end),
+                        section.name, end - start)
+                       for section in sections
+                       for start, end in section.ranges]
+
+            for future, section_name, num_bytes in futures:
+                # Poll so that a cancel does not wait for the whole file.
+                while not future.done():
+                    progress.check_cancelled()
+                    wait([future], timeout=0.1)
+
+                def_data, local_names, seconds, records = future.result()
+                remap = self.name_index.set_many(local_names)
+                remap_def_data(def_data, remap)
+                def_data_list.append(def_data)
+
+                done_bytes += num_bytes
+                progress.add(f"{section_name} (workers)", seconds, records)
+        except BaseException:
+            abandon_pool(pool)
+            raise
+        pool.shutdown()
+
+        combined_parser = DefParser(name_index=self.name_index)
+        combined_parser.def_data = self.merge_def_data(def_data_list)
+        return combined_parser
 
-        return parsers
 
-    def merge_parsers(self, parsers: list):
-        combined_parser = DefParser()
-        combined_parser.def_data = self.merge_def_data([p.def_data for p in parsers])
-        return combined_parser
+def _parse_def_range(file_path, section_name, start, end):
+    """Process-pool entry point: parse one record range of a section with a local name table."""
+    started = time.perf_counter()
+    parser = DefParser(name_index=NameIndex())
+    stream = _LineStream(DefLineReader(file_path, start, end))
+
+    if section_name == "COMPONENTS":
+        parser.parse_components_section(stream)
+        records = len(parser.def_data.components)
+    elif section_name == "NETS":
+        parser.parse_nets_section(stream)
+        records = len(parser.def_data.nets)
+    elif section_name == "SPECIALNETS":
+        parser.parse_specialnets_section(stream)
+        records = len(parser.def_data.specialnets)
+    else:
+        records = 0
+
+    return parser.def_data, parser.name_index.names(), time.perf_counter() - started, records
+
+
+def remap_def_data(def_data, remap):
+    """Rewrite every name id held by a DefData through a local-id -> global-id table."""
+    def m(id_):
+        return int(remap[id_]) if id_ is not None else None
+
+    def_data.version_id = m(def_data.version_id)
+    def_data.design_name_id = m(def_data.design_name_id)
+    if def_data.units:
+        def_data.units.distance_id = m(def_data.units.distance_id)
+
+    def_data.components.remap_ids(remap)
+    def_data.net_routing.remap_ids(remap)
+    def_data.specialnet_routing.remap_ids(remap)
+
+    for row in def_data.rows:
+        row.name_id, row.type_id, row.orientation_id = m(row.name_id), m(row.type_id), m(row.orientation_id)
+    for track in def_data.tracks:
+        track.direction_id, track.layer_id = m(track.direction_id), m(track.layer_id)
+    for net in def_data.nets:
+        net.name_id = m(net.name_id)
+        for conn in net.connections:
+            conn.cell_id, conn.pin_id = m(conn.cell_id), m(conn.pin_id)
+    for via in def_data.vias:
+        via.name_id = m(via.name_id)
+        via.layer_ids = [m(i) for i in via.layer_ids]
+    for region in def_data.regions:
+        region.name_id = m(region.name_id)
+    for blockage in def_data.blockages:
+        blockage.layer_id = m(blockage.layer_id)
+    for pin in def_data.pins:
+        pin.name_id, pin.net_id = m(pin.name_id), m(pin.net_id)
+        pin.direction_id, pin.use_id = m(pin.direction_id), m(pin.use_id)
+    for snet in def_data.specialnets:
+        snet.name_id = m(snet.name_id)
+        snet.component_ids = [m(i) for i in snet.component_ids]
+
+    def_data.property_definitions = {m(k): m(v) for k, v in def_data.property_definitions.items()}
+
+
+def def_data_name_ids(def_data):
+    """Sorted unique name ids held by a DefData; the fields are those of remap_def_data."""
+    ids = [def_data.version_id, def_data.design_name_id]
+    if def_data.units:
+        ids.append(def_data.units.distance_id)
+    for row in def_data.rows:
+        ids.extend((row.name_id, row.type_id, row.orientation_id))
+    for track in def_data.tracks:
+        ids.extend((track.direction_id, track.layer_id))
+    for net in def_data.nets:
+        ids.append(net.name_id)
+        for conn in net.connections:
+            ids.extend((conn.cell_id, conn.pin_id))
+    for via in def_data.vias:
+        ids.append(via.name_id)
+        ids.extend(via.layer_ids)
+    ids.extend(region.name_id for region in def_data.regions)
+    ids.extend(blockage.layer_id for blockage in def_data.blockages)
+    for pin in def_data.pins:
+        ids.extend((pin.name_id, pin.net_id, pin.direction_id, pin.use_id))
+    for snet in def_data.specialnets:
+        ids.append(snet.name_id)
+        ids.extend(snet.component_ids)
+    for k, v in def_data.property_definitions.items():
+        ids.extend((k, v))
+
+    scalar_ids = np.array([i for i in ids if i is not None], dtype=np.int64)
+    all_ids = np.unique(np.concatenate((scalar_ids, def_data.components.name_ids(),
+                                        def_data.net_routing.name_ids(), def_data.specialnet_routing.name_ids())))
+    return all_ids[all_ids >= 0]
 
 
     
 class DefParserImplement(QObject):
     
     def_parser_finished_signal = pyqtSignal(str)
+    def_parser_progress_signal = pyqtSignal(dict)
+    def_parser_cancelled_signal = pyqtSignal(str)
 
     def __init__(self):
         super().__init__()
         
         self.parser_dict = {}
+        self.generation = 0     # bumped whenever a DEF file is (re)loaded
+        self._components = None     # (generation, ComponentTable of all files)
+        self.pending = 0            # parses started and not finished or cancelled yet
 
         self.all_workers = []
         self.all_threads = []
@@ -444,6 +851,7 @@ class DefParserImplement(QObject):
         if file_path:
             worker = ParseWorker(file_path)
             thread = QThread()
+            self.pending += 1
 
             self.all_workers.append(worker)
             self.all_threads.append(thread)
@@ -451,6 +859,7 @@ class DefParserImplement(QObject):
             worker.moveToThread(thread)
             thread.started.connect(worker.run)
 
+            worker.progress.connect(self.def_parser_progress_signal)
             worker.finished.connect(self.on_parse_finished)
             worker.finished.connect(thread.quit)
             thread.finished.connect(thread.deleteLater)
@@ -458,17 +867,40 @@ class DefParserImplement(QObject):
 
             logging.info(f"Parse DEF {file_path} started...")
 
+    def cancel(self):
+        """Cancel every DEF load still in progress."""
+        for worker in self.all_workers:
+            worker.cancel()
+
     def on_parse_finished(self, result):
+        self.pending -= 1
         file_path = result["file_path"]
         parser = result["parser"]
 
+        if result.get("cancelled"):
+            log_section_summary(f"Parse DEF {file_path} cancelled", result["sections"], result["elapsed"])
+            self.def_parser_cancelled_signal.emit(f"DEF parser cancelled: {file_path}")
+            return
+
+        if result.get("error") is not None:
+            # Not registered; the load goes on with the other files.
+            logging.error(f"Parse DEF {file_path} failed: {result['error']}")
+            self.def_parser_finished_signal.emit(f"DEF parser failed: {file_path}")
+            return
+
         self.parser_dict[file_path] = parser
+        self.generation += 1
 
-        logging.info(f"Parse DEF {file_path} finished.")
+        log_section_summary(f"Parse DEF {file_path} finished", result["sections"], result["elapsed"])
 
         self.def_parser_finished_signal.emit("DEF parser finished.")
 
-    
+    def clear(self):
+        """Drop every loaded DEF file."""
+        self.parser_dict.clear()
+        self._components = None
+        self.generation += 1
+
     def get_via_names(self, layer):
         result = []
 
@@ -490,15 +922,40 @@ class DefParserImplement(QObject):
 
         return unit
 
-    def get_components(self):
-
-        all_components = []
-        for d, parser in self.parser_dict.items():
-            components = parser.def_data.components
-
-            all_components.extend(components)
+    def get_die_area(self):
+        """(ll_x, ll_y, ur_x, ur_y) in DEF units around the DIEAREA of all files, or None."""
+        areas = [parser.def_data.diearea for parser in self.parser_dict.values()
+                 if parser.def_data.diearea is not None]
+        if not areas:
+            return None
+        return (min(a.ll_x for a in areas), min(a.ll_y for a in areas),
+                max(a.ur_x for a in areas), max(a.ur_y for a in areas))
 
-        return all_components
+    def get_components(self):
+        """Components of all DEF files, concatenated once per generation."""
+        if self._components is None or self._components[0] != self.generation:
+            self._components = (self.generation, ComponentTable.concatenate(
+                parser.def_data.components for parser in self.parser_dict.values()))
+        return self._components[1]
+
+    def get_region_rects(self, region_name):
+        """Rects (ll_x, ll_y, ur_x, ur_y) in DEF units of the REGION of that name in all files."""
+        rects = []
+        for parser in self.parser_dict.values():
+            for region in parser.def_data.regions:
+                if gname_index.getName(region.name_id) == region_name:
+                    points = region.coordinates
+                    for (x1, y1), (x2, y2) in zip(points[::2], points[1::2]):
+                        rects.append((min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)))
+        return rects
+
+    def get_blockage_rects(self, placement_only=True):
+        """Rects in DEF units of the BLOCKAGES of all files (placement blockages only by default)."""
+        return [(b.ll_x, b.ll_y, b.ur_x, b.ur_y) for parser in self.parser_dict.values()
+                for b in parser.def_data.blockages if b.layer_id is None or not placement_only]
+
+    def get_nets(self):
+        return [net for parser in self.parser_dict.values() for net in parser.def_data.nets]
     
     def get_instances_coords(self):
 
@@ -508,8 +965,8 @@ class DefParserImplement(QObject):
         for d, parser in self.parser_dict.items():
             components = parser.def_data.components
 
-            i_list = [gname_index.getName(comp.inst_name_id) for comp in components]
-            c_list = [f"({comp.location[0]} {comp.location[1]})" for comp in components]
+            i_list = gname_index.get_names(components.inst_name_ids)
+            c_list = [f"({x} {y})" for x, y in zip(components.x.tolist(), components.y.tolist())]
 
             inst_list.extend(i_list)
             coord_list.extend(c_list)
@@ -519,6 +976,3 @@ class DefParserImplement(QObject):
             "inst": inst_list,
             "coords": coord_list
         }
-
-
-
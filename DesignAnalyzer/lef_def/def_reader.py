@@ -0,0 +1,127 @@
+import mmap
+import os
+import re
+
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+
+class DefLineReader:
+    """Streams the lines of a DEF file through a read-only mmap.
+
+    Lines are decoded one at a time, so the file is never held in memory as
+    one Python string or one list of lines. Pages that have already been
+    consumed are released back to the kernel every `release_window` bytes,
+    which keeps resident memory bounded by the parsed result rather than by
+    the file size.
+    """
+
+    def __init__(self, file_path, start=0, end=None, release_window=64 * 1024 * 1024):
+        self.file_path = file_path
+        self.start = start
+        self.end = end
+        self.release_window = release_window
+
+        self.position = start   # byte offset of the next unread line
+        self.size = 0
+
+    def __iter__(self):
+        with open(self.file_path, 'rb') as f:
+            self.size = os.fstat(f.fileno()).st_size
+            if self.size == 0:
+                return
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, "madvise"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+
+                end = self.size if self.end is None else min(self.end, self.size)
+                released = self.start - self.start % mmap.PAGESIZE
+
+                mm.seek(self.start)
+                while mm.tell() < end:
+                    line = mm.readline()
+                    self.position = mm.tell()
+
+                    if self.position - released >= self.release_window:
+                        released = self._release(mm, released)
+
+                    yield line.decode('utf-8', errors='replace')
+
+    def _release(self, mm, released):
+        """Drop already-parsed pages from the mapping; returns the new low mark."""
+        upto = self.position - self.position % mmap.PAGESIZE
+        if hasattr(mm, "madvise") and upto > released:
+            mm.madvise(mmap.MADV_DONTNEED, released, upto - released)
+        return upto
+
+
+# Sections whose '- name ... ;' records are independent and can be parsed in parallel.
+PARALLEL_SECTIONS = ("COMPONENTS", "NETS", "SPECIALNETS")
+
+_SECTION_RE = re.compile(rb'^[ \t]*(END[ \t]+)?(COMPONENTS|NETS|SPECIALNETS)\b', re.MULTILINE)
+_RECORD_RE = re.compile(rb'^[ \t]*-[ \t\r\n]', re.MULTILINE)
+
+
+@dataclass
+class DefSection:
+    name: str
+    header_start: int   # byte offset of the 'NETS 123 ;' line
+    body_start: int     # first byte after the header line
+    body_end: int       # byte offset of the 'END NETS' line
+    ranges: List[Tuple[int, int]] = field(default_factory=list)  # record-aligned [start, end) chunks
+
+
+def index_def_sections(file_path, num_chunks):
+    """Locate the parallel sections of a DEF file and cut each body into record-aligned ranges.
+
+    Only the header/END lines and one record start per cut are searched for,
+    so indexing is a handful of C-level regex scans over the mmap.
+    """
+    sections = []
+
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return sections
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            open_section = None
+            for match in _SECTION_RE.finditer(mm):
+                name = match.group(2).decode()
+                if match.group(1) is None:
+                    body_start = mm.find(b'\n', match.end()) + 1 or len(mm)
+                    open_section = DefSection(name, match.start(), body_start, body_start)
+                elif open_section is not None and open_section.name == name:
+                    open_section.body_end = match.start()
+                    open_section.ranges = _record_ranges(mm, open_section, num_chunks)
+                    sections.append(open_section)
+                    open_section = None
+
+    return sections
+
+
+def _record_ranges(mm, section, num_chunks):
+    """Split a section body at the record start nearest after each equal byte cut."""
+    start, end = section.body_start, section.body_end
+    step = (end - start) / max(num_chunks, 1)
+
+    cuts = [start]
+    for i in range(1, num_chunks):
+        match = _RECORD_RE.search(mm, int(start + i * step), end)
+        if match is None:
+            break
+        if match.start() > cuts[-1]:
+            cuts.append(match.start())
+    cuts.append(end)
+
+    return [(a, b) for a, b in zip(cuts, cuts[1:]) if b > a]
+
+
+def gaps_between(sections, file_size):
+    """Byte ranges of a file that lie outside all section bodies."""
+    gaps, pos = [], 0
+    for section in sections:
+        gaps.append((pos, section.body_start))
+        pos = section.body_end
+    gaps.append((pos, file_size))
+    return [(a, b) for a, b in gaps if b > a]
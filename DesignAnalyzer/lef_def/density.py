@@ -0,0 +1,119 @@
+import numpy as np
+
+########################################################################
+#
+# Placement density: the fraction of each bin of a regular grid covered by
+# instance area, with boxes split exactly over the bins they overlap.
+#
+# Overlap with a bin is separable, (x overlap) * (y overlap), so a box that
+# spans at most two bins per axis adds at most four terms. Those boxes (all
+# standard cells once bins are at least a cell wide) are accumulated with
+# four np.bincount calls over the whole array. Boxes spanning more bins
+# (macros, or every box on a very fine grid) add the outer product of their
+# x and y overlap vectors to their block of bins, one box at a time.
+#
+# Overlapping instances add up, so a bin can exceed 1.0.
+#
+########################################################################
+
+
+class DensityMap:
+    """One computed grid: utilization[iy, ix] of the bins over `extent` (x1, y1, x2, y2)."""
+    __slots__ = ('utilization', 'extent', 'nx', 'ny')
+
+    def __init__(self, utilization, extent):
+        self.utilization = utilization
+        self.extent = extent
+        self.ny, self.nx = utilization.shape
+
+    def bin_size(self):
+        x1, y1, x2, y2 = self.extent
+        return (x2 - x1) / self.nx, (y2 - y1) / self.ny
+
+    def hotspots(self, threshold=1.0):
+        """(iy, ix) of the bins at or above threshold."""
+        return np.argwhere(self.utilization >= threshold)
+
+
+class DensityEngine:
+    """Density maps of a fixed set of boxes, cached per grid resolution."""
+
+    def __init__(self, bboxes, extent=None):
+        self.bboxes = np.ascontiguousarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        if extent is None:
+            if len(self.bboxes):
+                extent = (*self.bboxes[:, :2].min(axis=0), *self.bboxes[:, 2:].max(axis=0))
+            else:
+                extent = (0.0, 0.0, 1.0, 1.0)
+        self.extent = tuple(float(v) for v in extent)
+        self._maps = {}
+
+    def density(self, nx, ny=None):
+        """DensityMap of an nx by ny grid (ny defaults to nx), computed once per resolution."""
+        ny = ny or nx
+        density_map = self._maps.get((nx, ny))
+        if density_map is None:
+            density_map = DensityMap(bin_utilization(self.bboxes, self.extent, nx, ny), self.extent)
+            self._maps[(nx, ny)] = density_map
+        return density_map
+
+    def clear(self):
+        self._maps.clear()
+
+
+def bin_utilization(bboxes, extent, nx, ny):
+    """(ny, nx) covered area / bin area of the boxes over extent."""
+    x0, y0, x1, y1 = extent
+    bw = (x1 - x0) / nx
+    bh = (y1 - y0) / ny
+    area = np.zeros(nx * ny)
+
+    # Clip to the extent and work in bin units.
+    bx1 = np.clip((bboxes[:, 0] - x0) * (1 / bw), 0, nx)
+    by1 = np.clip((bboxes[:, 1] - y0) * (1 / bh), 0, ny)
+    bx2 = np.clip((bboxes[:, 2] - x0) * (1 / bw), 0, nx)
+    by2 = np.clip((bboxes[:, 3] - y0) * (1 / bh), 0, ny)
+    keep = (bx2 > bx1) & (by2 > by1)
+    if not keep.all():
+        bx1, by1, bx2, by2 = bx1[keep], by1[keep], bx2[keep], by2[keep]
+
+    ix1 = np.minimum(bx1.astype(np.int64), nx - 1)
+    iy1 = np.minimum(by1.astype(np.int64), ny - 1)
+    ix2 = np.minimum(np.ceil(bx2).astype(np.int64) - 1, nx - 1)
+    iy2 = np.minimum(np.ceil(by2).astype(np.int64) - 1, ny - 1)
+
+    small = (ix2 - ix1 <= 1) & (iy2 - iy1 <= 1)
+    large = np.flatnonzero(~small)
+
+    # Boxes over at most 2 x 2 bins: split at the first bin edge in each axis.
+    # A box within one bin gets zero weight in the second column or row.
+    if len(large):
+        sx1, sy1, sx2, sy2, sc, sr = bx1[small], by1[small], bx2[small], by2[small], ix1[small], iy1[small]
+    else:
+        sx1, sy1, sx2, sy2, sc, sr = bx1, by1, bx2, by2, ix1, iy1
+    split_x = np.minimum(sx2, sc + 1)
+    split_y = np.minimum(sy2, sr + 1)
+    first_x, first_y = split_x - sx1, split_y - sy1
+    area += np.bincount(sr * nx + sc, weights=first_x * first_y, minlength=nx * ny)
+
+    # Only the boxes crossing a bin edge have a second column or row.
+    cross_x = np.flatnonzero(sx2 > split_x)
+    cross_y = np.flatnonzero(sy2 > split_y)
+    cross_xy = cross_x[sy2[cross_x] > split_y[cross_x]]
+    second_x = sx2 - split_x
+    second_y = sy2 - split_y
+    for k, wx, wy, dx, dy in ((cross_x, second_x, first_y, 1, 0), (cross_y, first_x, second_y, 0, 1),
+                              (cross_xy, second_x, second_y, 1, 1)):
+        area += np.bincount((sr[k] + dy) * nx + sc[k] + dx, weights=wx[k] * wy[k], minlength=nx * ny)
+
+    # Larger boxes, one outer product each.
+    grid = area.reshape(ny, nx)
+    for k in large.tolist():
+        xs = np.arange(ix1[k], ix2[k] + 1)
+        ys = np.arange(iy1[k], iy2[k] + 1)
+        ox = np.minimum(bx2[k], xs + 1) - np.maximum(bx1[k], xs)
+        oy = np.minimum(by2[k], ys + 1) - np.maximum(by1[k], ys)
+        grid[iy1[k]:iy2[k] + 1, ix1[k]:ix2[k] + 1] += np.outer(oy, ox)
+
+    # Everything is in bin units, so covered area / bin area is the sum itself.
+    return grid
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+
+import numpy as np
+
+from global_name_index import gname_index
+from component_table import ComponentTable, COMPONENT_COLUMNS
+
+########################################################################
+#
+# On-disk cache of parsed DEF / LEF files.
+#
+#   <cache dir>/<file>.<path hash>.def/   meta.json, names.bin, comp_<col>.npy, rest.pkl
+#   <cache dir>/<file>.<path hash>.lef/   meta.json, parser.pkl
+#
+# The cache dir is DESIGN_CACHE_DIR if set, else '.da_cache' next to the
+# input file. DESIGN_CACHE=0 disables the cache. LEF files go to the shared
+# library cache (library_cache.py) instead, unless LEF_LIBRARY_CACHE=0.
+#
+########################################################################
+
+CACHE_FORMAT_VERSION = 8
+
+_SAMPLE_BLOCK = 1024 * 1024
+_SAMPLE_COUNT = 16
+
+
+def cache_enabled():
+    return os.environ.get("DESIGN_CACHE", "1") != "0"
+
+
+def file_key(file_path):
+    """Identity of an input file: path, size, mtime and a sampled content hash.
+
+    Files up to _SAMPLE_COUNT blocks are hashed whole; larger files hash
+    _SAMPLE_COUNT evenly spaced blocks, which is constant time and still
+    catches edits that preserve size and mtime in practice.
+    """
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(stat.st_size).encode())
+    with open(path, 'rb') as f:
+        if stat.st_size <= _SAMPLE_BLOCK * _SAMPLE_COUNT:
+            digest.update(f.read())
+        else:
+            stride = (stat.st_size - _SAMPLE_BLOCK) // (_SAMPLE_COUNT - 1)
+            for i in range(_SAMPLE_COUNT):
+                f.seek(i * stride)
+                digest.update(f.read(_SAMPLE_BLOCK))
+
+    return {
+        "version": CACHE_FORMAT_VERSION,
+        "path": path,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": digest.hexdigest(),
+    }
+
+
+class DesignCache:
+    def __init__(self, cache_dir=None, name_index=None):
+        self.cache_dir = cache_dir or os.environ.get("DESIGN_CACHE_DIR")
+        # Cached DEF names are interned into this table (default: the active design's).
+        self.name_index = name_index if name_index is not None else gname_index.current()
+
+    def entry_dir(self, file_path, kind):
+        path = os.path.abspath(file_path)
+        root = self.cache_dir or os.path.join(os.path.dirname(path), ".da_cache")
+        name = hashlib.blake2b(path.encode(), digest_size=8).hexdigest()
+        return os.path.join(root, f"{os.path.basename(path)}.{name}.{kind}")
+
+    # DEF
+    def load_def(self, file_path):
+        """Return the cached DefData of file_path, or None when missing or stale."""
+        entry = self._valid_entry(file_path, "def")
+        if entry is None:
+            return None
+
+        with open(os.path.join(entry, "names.bin"), 'rb') as f:
+            blob = f.read().decode('utf-8')
+        names = blob.split('\0') if blob else []
+        remap = self._intern(names)
+
+        with open(os.path.join(entry, "rest.pkl"), 'rb') as f:
+            def_data = pickle.load(f)
+
+        def_data.components = ComponentTable.from_columns({
+            name: np.load(os.path.join(entry, f"comp_{name}.npy"), mmap_mode='r')
+            for name, _ in COMPONENT_COLUMNS
+        })
+        if remap is not None:
+            from def_parser import remap_def_data   # def_parser imports this module
+            remap_def_data(def_data, remap)
+
+        logging.info(f"DEF {file_path} loaded from cache {entry}")
+        return def_data
+
+    def save_def(self, file_path, def_data):
+        """Write def_data with dense local ids, and only the names it refers to."""
+        from def_parser import remap_def_data, def_data_name_ids    # def_parser imports this module
+
+        def write(tmp):
+            used = def_data_name_ids(def_data)
+            with open(os.path.join(tmp, "names.bin"), 'wb') as f:
+                f.write('\0'.join(self.name_index.get_names(used)).encode('utf-8'))
+
+            # The trailing -1 keeps a -1 id (none) at -1 in both directions.
+            to_local = np.full(len(self.name_index) + 1, -1, dtype=np.int32)
+            to_local[used] = np.arange(len(used), dtype=np.int32)
+            remap_def_data(def_data, to_local)
+            try:
+                for name, column in def_data.components.columns().items():
+                    np.save(os.path.join(tmp, f"comp_{name}.npy"), column)
+
+                components, def_data.components = def_data.components, ComponentTable()
+                try:
+                    with open(os.path.join(tmp, "rest.pkl"), 'wb') as f:
+                        pickle.dump(def_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+                finally:
+                    def_data.components = components
+            finally:
+                remap_def_data(def_data, np.append(used, -1).astype(np.int32))
+
+        self._write_entry(file_path, "def", write)
+
+    # LEF
+    def load_lef(self, file_path):
+        """Return the cached LefParser of file_path, or None when missing or stale."""
+        entry = self._valid_entry(file_path, "lef")
+        if entry is None:
+            return None
+
+        with open(os.path.join(entry, "parser.pkl"), 'rb') as f:
+            parser = pickle.load(f)
+
+        logging.info(f"LEF {file_path} loaded from cache {entry}")
+        return parser
+
+    def save_lef(self, file_path, lef_parser):
+        def write(tmp):
+            with open(os.path.join(tmp, "parser.pkl"), 'wb') as f:
+                pickle.dump(lef_parser, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._write_entry(file_path, "lef", write)
+
+    # Entry handling
+    def _valid_entry(self, file_path, kind):
+        if not cache_enabled():
+            return None
+
+        entry = self.entry_dir(file_path, kind)
+        try:
+            with open(os.path.join(entry, "meta.json"), 'r') as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if meta != file_key(file_path):
+            logging.info(f"Cache for {file_path} is stale, re-parsing.")
+            return None
+        return entry
+
+    def _write_entry(self, file_path, kind, write):
+        if not cache_enabled():
+            return
+
+        entry = self.entry_dir(file_path, kind)
+        tmp = f"{entry}.tmp{os.getpid()}"
+        try:
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.makedirs(tmp)
+            write(tmp)
+            with open(os.path.join(tmp, "meta.json"), 'w') as f:
+                json.dump(file_key(file_path), f, indent=4)
+
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp, entry)
+        except OSError as e:
+            logging.warning(f"Could not write cache for {file_path}: {e}")
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _intern(self, names):
+        """Intern cached names; returns the id remap, or None when ids line up already."""
+        remap = np.array(self.name_index.set_many(names), dtype=np.int32)
+        if np.array_equal(remap, np.arange(len(names), dtype=np.int32)):
+            return None
+        return remap
@@ -1,19 +1,24 @@
 
 import logging
 
-from rtree import index
-
 from global_name_index import gname_index
 
 from dataclasses import dataclass, field
 from typing import List, Tuple, Optional, Dict
+from collections.abc import Mapping
 
-from sklearn.cluster import KMeans
 import numpy as np
-import random
+from PyQt5.QtCore import QObject, pyqtSignal
 
 from def_parser import DefParserImplement
+from component_table import ComponentTable
+from connectivity import Connectivity
+from density import DensityEngine
+from hierarchy import HierarchyIndex
 from lef_parser import LefParserImplement
+from placement import dbu_to_microns, instance_bboxes
+from spatial_index import build_spatial_index
+from tile_partition import TilePartition, map_tiles
 
 @dataclass
 class Instance:
@@ -25,16 +30,141 @@ class Instance:
 class InstanceMap:
     instance_data: Dict[int, Instance] = field(default_factory=dict)
 
-class DesignData:
+
+class InstanceArrays(Mapping):
+    """Read-only inst_name_id -> Instance mapping over the resolved instance columns.
+
+    Resolution fills the columns in bulk; an Instance object is only made
+    when one is looked up, e.g. for the instances being drawn.
+    """
+
+    def __init__(self, inst_name_ids, cell_name_ids, type_ids, bboxes, orient_ids=None):
+        self.inst_name_ids = inst_name_ids
+        self.cell_name_ids = cell_name_ids
+        self.type_ids = type_ids
+        self.bboxes = bboxes        # (N, 4) x1, y1, x2, y2 in microns
+        self.orient_ids = orient_ids if orient_ids is not None else np.zeros(len(inst_name_ids), dtype=np.int8)
+
+        # Name ids are dense, so a flat array finds the row of an id.
+        size = int(inst_name_ids.max()) + 1 if len(inst_name_ids) else 0
+        self._rows = np.full(size, -1, dtype=np.int64)
+        self._rows[inst_name_ids] = np.arange(len(inst_name_ids))
+
+    def row(self, inst_name_id):
+        if 0 <= inst_name_id < len(self._rows):
+            row = self._rows[inst_name_id]
+            if row >= 0:
+                return int(row)
+        raise KeyError(inst_name_id)
+
+    def resolved(self, inst_name_ids):
+        """Mask of the instance ids that have a row (e.g. not those of macros missing in LEF)."""
+        ids = np.asarray(inst_name_ids, dtype=np.int64).ravel()
+        mask = (ids >= 0) & (ids < len(self._rows))
+        mask[mask] = self._rows[ids[mask]] >= 0
+        return mask
+
+    def locations(self, inst_name_ids):
+        """(n, 4) bboxes of the resolved ones of a sequence of instance ids, in one gather."""
+        ids = np.asarray(inst_name_ids, dtype=np.int64).ravel()
+        return self.bboxes[self._rows[ids[self.resolved(ids)]]]
+
+    def __getitem__(self, inst_name_id):
+        row = self.row(inst_name_id)
+        return Instance(cell_name_id=int(self.cell_name_ids[row]),
+                        type_id=int(self.type_ids[row]),
+                        location=self.bboxes[row].tolist())
+
+    def __contains__(self, inst_name_id):
+        return 0 <= inst_name_id < len(self._rows) and self._rows[inst_name_id] >= 0
+
+    def __iter__(self):
+        return iter(np.flatnonzero(self._rows >= 0).tolist())
+
+    def __len__(self):
+        return int(np.count_nonzero(self._rows >= 0))
+
+
+class DesignData(QObject):
+    """Structures derived from the loaded LEF and DEF files.
+
+    Each structure records the generations of the inputs it was built from
+    (LefParserImplement.generation, DefParserImplement.generation); the
+    ensure_*() methods rebuild it only when those moved on, and then emit
+    the matching ready signal with the structure's own generation.
+    """
+
+    instances_ready_signal = pyqtSignal(int)
+    nets_ready_signal = pyqtSignal(int)
+
     def __init__(self, _lefParserImplement, _defParserImplement):
+        super().__init__()
+
         self.lefParserImplement = _lefParserImplement
         self.defParserImplement = _defParserImplement
 
-        self.inst_rtree = None
+        self.inst_index = None      # spatial_index.SpatialIndex over the instance bboxes
         self.inst_bbox = None
+        self._density = None        # DensityEngine of the current instances
+        self._inst_hierarchy = None     # HierarchyIndex over the instance names, with cell areas
+        self._net_hierarchy = None
 
         self.instData = InstanceMap()
-
+        self.nets = []
+        self.connectivity = None    # connectivity.Connectivity, rows are component rows
+
+        self._built_from = {}       # structure -> input generations it was built from
+        self.generations = {"instances": 0, "nets": 0}
+
+    def _input_generations(self, structure):
+        # Both structures need both inputs: instances their macro sizes and
+        # the connectivity its pin directions from LEF.
+        return (self.lefParserImplement.generation, self.defParserImplement.generation)
+
+    def is_stale(self, structure):
+        return self._built_from.get(structure) != self._input_generations(structure)
+
+    def invalidate(self, structure=None):
+        """Force a rebuild of one structure (or all) on the next ensure_*()."""
+        if structure is None:
+            self._built_from.clear()
+        else:
+            self._built_from.pop(structure, None)
+
+    def ensure_instances(self):
+        """Resolve the instances if LEF or DEF changed since the last time; True if rebuilt."""
+        if not self.is_stale("instances"):
+            return False
+        self.resolveCompToInst()
+        if self.is_stale("instances"):     # resolution failed, already logged
+            return False
+        self.instances_ready_signal.emit(self.generations["instances"])
+        return True
+
+    def ensure_nets(self):
+        """Build the connectivity graph of all DEF nets if LEF or DEF changed; True if rebuilt."""
+        if not self.is_stale("nets"):
+            return False
+        self._built_from["nets"] = self._input_generations("nets")
+        self.nets = self.defParserImplement.get_nets()
+        self.connectivity = Connectivity.from_nets(self.nets, self.defParserImplement.get_components(),
+                                                   self.lefParserImplement.registry)
+        self._net_hierarchy = None
+        self.generations["nets"] += 1
+        self.nets_ready_signal.emit(self.generations["nets"])
+        return True
+
+    def clear(self):
+        """Drop every derived structure; ensure_*() builds them again from the parsers."""
+        self.inst_index = None
+        self.inst_bbox = None
+        self._density = None
+        self._inst_hierarchy = None
+        self._net_hierarchy = None
+        self.instData = InstanceMap()
+        self.nets = []
+        self.connectivity = None
+        self._built_from.clear()
 
     def resolveCompToInst(self):
         if not self.defParserImplement or not self.lefParserImplement:
@@ -46,80 +176,134 @@ class DesignData:
         design_units = int(design_units)
 
         components = self.defParserImplement.get_components()
-        if not isinstance(components, list):
-            logging.error(f"'components' should be a list, got {type(components)}")
+        if not isinstance(components, ComponentTable):
+            logging.error(f"'components' should be a ComponentTable, got {type(components)}")
             return
 
-        self.inst_rtree = index.Index()
-
-        # Step 2: Get LEF macro data
-        for comp in components:
-
-            instance_name = gname_index.getName(comp.inst_name_id)
-            cell_name = gname_index.getName(comp.cell_name_id)
-            type = gname_index.getName(comp.type_id)
-            location = comp.location
-
-            if not instance_name or not cell_name or not location:
-                logging.warning(f"Invalid component entry: {comp}")
-                continue
+        # Step 2: Get LEF macro data, one gather over the macro registry
+        cell_name_ids = components.cell_name_ids
+        found, widths, heights, _ = self.lefParserImplement.registry.lookup(cell_name_ids)
 
-            x_dbu, y_dbu = location
-            x_dbu = int(x_dbu)
-            y_dbu = int(y_dbu)
+        if not found.all():
+            missing_ids, first_rows, counts = np.unique(cell_name_ids[~found], return_index=True,
+                                                        return_counts=True)
+            missing_rows = np.flatnonzero(~found)[first_rows]
+            for cell_name_id, row, count in zip(missing_ids.tolist(), missing_rows.tolist(), counts.tolist()):
+                logging.warning(f"Macro {gname_index.getName(cell_name_id)} not found in LEF for {count} "
+                                f"instances, e.g. {gname_index.getName(int(components.inst_name_ids[row]))}.")
 
-            x_um = x_dbu / design_units
-            y_um = y_dbu / design_units
+        # Step 3: bboxes and the R-tree, in bulk. Orientation swaps width and
+        # height of W/E/FW/FE instances; units are converted once.
+        locations = dbu_to_microns(components.locations[found], design_units)
+        sizes = np.column_stack((widths[found], heights[found]))
+        orient_ids = components.orient_ids[found]
+        bboxes = instance_bboxes(locations, sizes, orient_ids)
+        inst_name_ids = components.inst_name_ids[found]
 
-            macro = self.lefParserImplement.get_macro(cell_name)
-            if not macro:
-                logging.warning(f"Macro {cell_name} not found in LEF for instance {instance_name}.")
-                continue
+        self.instData.instance_data = InstanceArrays(inst_name_ids, cell_name_ids[found],
+                                                     components.type_ids[found], bboxes, orient_ids)
+        self.inst_index = build_spatial_index(inst_name_ids, bboxes)
 
-            width, height = macro.size
+        self.inst_bbox = self.inst_index.get_bounds()
 
-            bbox = [x_um, y_um, x_um + width, y_um + height]
+        self._density = None
+        self._inst_hierarchy = None
 
-            inst = Instance(cell_name_id=comp.cell_name_id, 
-                                    type_id=comp.type_id, 
-                                    location=bbox)
-            self.instData.instance_data[comp.inst_name_id] = inst
-
-            self.inst_rtree.insert(comp.inst_name_id, bbox)
-
-        self.inst_bbox = self.inst_rtree.get_bounds()
+        self._built_from["instances"] = self._input_generations("instances")
+        self.generations["instances"] += 1
 
         print(f"Resolved {len(self.instData.instance_data)} instances")
 
 
-    def iterate_pruned_rtrees(original_rtree, numIter):
-        all_objs = list(original_rtree.intersection(original_rtree.bounds, objects=True))
-        total = len(all_objs)
-
-        # Compute centroids for clustering
-        centroids = [
-            ((obj.bbox[0] + obj.bbox[2]) / 2, (obj.bbox[1] + obj.bbox[3]) / 2)
-            for obj in all_objs
-        ]
-
-        # Cluster into numIter groups for even spatial distribution
-        kmeans = KMeans(n_clusters=numIter, random_state=42)
-        labels = kmeans.fit_predict(centroids)
-
-        # Group objects by cluster
-        clustered_objs = [[] for _ in range(numIter)]
-        for i, obj in enumerate(all_objs):
-            clustered_objs[labels[i]].append(obj)
-
-        # Optional: shuffle each cluster to avoid spatial bias inside cluster
-        for group in clustered_objs:
-            random.shuffle(group)
-
-        # Each iteration, create a new R-tree and process it
-        for i in range(numIter):
-            props = index.Property()
-            new_rtree = index.Index(properties=props)
-            for obj in clustered_objs[i]:
-                new_rtree.insert(obj.id, obj.bbox, obj.object)
-
-            work_on_pruned_rtree(new_rtree)
+    # Spatial queries over the resolved instances; all return inst_name_id arrays.
+    def instances_in_window(self, window):
+        """Instances touching the window (x1, y1, x2, y2), in microns."""
+        self.ensure_instances()
+        return self.inst_index.query(window)
+
+    def instances_at(self, x, y):
+        self.ensure_instances()
+        return self.inst_index.query((x, y, x, y))
+
+    def instances_overlapping(self, rects):
+        """Instances sharing a positive area with any of the rects (microns)."""
+        self.ensure_instances()
+        found = []
+        for x1, y1, x2, y2 in rects:
+            ids = self.inst_index.query((x1, y1, x2, y2))
+            boxes = self.inst_index.boxes(ids)
+            overlap = (boxes[:, 0] < x2) & (boxes[:, 2] > x1) & (boxes[:, 1] < y2) & (boxes[:, 3] > y1)
+            found.append(ids[overlap])
+        return np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+    def nearest_instances(self, x, y, k=1):
+        self.ensure_instances()
+        return self.inst_index.nearest((x, y), k)
+
+    def instances_within(self, x, y, distance):
+        self.ensure_instances()
+        return self.inst_index.within_distance((x, y), distance)
+
+    def region_rects(self, region_name=None):
+        """(n, 4) rects in microns of a DEF REGION, or of the placement blockages without a name."""
+        if region_name:
+            rects = self.defParserImplement.get_region_rects(region_name)
+        else:
+            rects = self.defParserImplement.get_blockage_rects()
+        rects = np.array(rects, dtype=np.float64).reshape(-1, 4)
+        return dbu_to_microns(rects, int(self.defParserImplement.get_unit()))
+
+    def density(self, nx, ny=None):
+        """Placement DensityMap on an nx by ny grid over the die (instance bounds without DIEAREA).
+
+        Maps are cached per resolution until the instances are resolved again.
+        """
+        self.ensure_instances()
+        if self._density is None:
+            die_area = self.defParserImplement.get_die_area()
+            if die_area is not None:
+                extent = dbu_to_microns(die_area, int(self.defParserImplement.get_unit()))
+            else:
+                extent = self.inst_bbox
+            self._density = DensityEngine(self.instData.instance_data.bboxes, extent)
+        return self._density.density(nx, ny)
+
+    def instance_hierarchy(self):
+        """HierarchyIndex of the resolved instances; rows are instance_data rows."""
+        self.ensure_instances()
+        if self._inst_hierarchy is None:
+            instances = self.instData.instance_data
+            hierarchy = HierarchyIndex(instances.inst_name_ids)
+            bboxes = instances.bboxes
+            self._inst_hierarchy = (hierarchy, hierarchy.rollup((bboxes[:, 2] - bboxes[:, 0]) *
+                                                                (bboxes[:, 3] - bboxes[:, 1])))
+        return self._inst_hierarchy[0]
+
+    def module_stats(self, path="", depth=1):
+        """(module paths, instance counts, cell areas in square microns) of the modules `depth`
+        levels below path; None if there is no such module."""
+        hierarchy = self.instance_hierarchy()
+        node = hierarchy.find(path)
+        if node is None:
+            return None
+        nodes = hierarchy.descendants(node, depth)
+        areas = self._inst_hierarchy[1]
+        return ([hierarchy.path(n) for n in nodes], [hierarchy.count(n) for n in nodes],
+                [float(areas[n]) for n in nodes])
+
+    def net_hierarchy(self):
+        """HierarchyIndex of the DEF nets; rows are connectivity net rows."""
+        self.ensure_nets()
+        if self._net_hierarchy is None:
+            self._net_hierarchy = HierarchyIndex(self.connectivity.net_name_ids)
+        return self._net_hierarchy
+
+    def partition_instances(self, num_tiles, halo=0.0):
+        """Balanced TilePartition of the resolved instances, ids are inst_name_ids."""
+        self.ensure_instances()
+        instances = self.instData.instance_data
+        return TilePartition(instances.inst_name_ids, instances.bboxes, num_tiles, halo)
+
+    def map_instance_tiles(self, func, num_tiles, halo=0.0, reduce=None, num_workers=None, cancel_token=None):
+        """Run an analysis over tiles of the instances in a process pool (see tile_partition.py)."""
+        return map_tiles(func, self.partition_instances(num_tiles, halo), reduce, num_workers, cancel_token)
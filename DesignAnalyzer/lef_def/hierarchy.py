@@ -0,0 +1,145 @@
+import re
+
+import numpy as np
+
+from global_name_index import gname_index
+
+########################################################################
+#
+# Module hierarchy of a set of hierarchical names (instances or nets).
+#
+# Names are split on the DEF divider character ("/", an escaped "\/" is
+# part of a flat name) into module path components and a leaf. The names
+# are sorted once; every name under a module path P starts with "P/", and
+# strings sharing a prefix are contiguous in sorted order, so each module
+# is one range start:end of the sorted names. The trie of modules is built
+# in a single pass over the sorted names.
+#
+# A subtree query is then a trie walk plus a slice of `order` (the rows
+# of the names in sorted order), counts are end - start, and a rollup of
+# any per-row value (cell area, ...) is one cumulative sum shared by every
+# module.
+#
+########################################################################
+
+
+class HierarchyIndex:
+    """Module trie over hierarchical names; node 0 is the top level."""
+
+    def __init__(self, name_ids, names=None, divider="/"):
+        self.name_ids = np.asarray(name_ids, dtype=np.int64)
+        self.divider = divider
+        names = gname_index.get_names(self.name_ids) if names is None else list(names)
+
+        self.order = np.array(sorted(range(len(names)), key=names.__getitem__), dtype=np.int64)
+        sorted_names = [names[row] for row in self.order.tolist()]
+
+        self.parent = [-1]
+        self.node_names = [""]
+        self.depth = [0]
+        self.start = [0]
+        self.end = [len(sorted_names)]
+        self._children = [{}]
+
+        split = self._splitter(divider)
+        stack = [0]
+        path = []
+        for position, name in enumerate(sorted_names):
+            parts = split(name)
+            parts.pop()
+            common = 0
+            while common < len(path) and common < len(parts) and path[common] == parts[common]:
+                common += 1
+            while len(path) > common:
+                self.end[stack.pop()] = position
+                path.pop()
+            for part in parts[common:]:
+                node = self._add_node(stack[-1], part, position)
+                stack.append(node)
+                path.append(part)
+        for node in stack[1:]:
+            self.end[node] = len(sorted_names)
+
+        self.parent = np.array(self.parent, dtype=np.int32)
+        self.depth = np.array(self.depth, dtype=np.int32)
+        self.start = np.array(self.start, dtype=np.int64)
+        self.end = np.array(self.end, dtype=np.int64)
+
+    @staticmethod
+    def _splitter(divider):
+        escaped = re.compile(r'(?<!\\)' + re.escape(divider))
+
+        def split(name):
+            if "\\" in name:
+                return escaped.split(name)
+            return name.split(divider)
+        return split
+
+    def _add_node(self, parent, name, start):
+        node = len(self.parent)
+        self.parent.append(parent)
+        self.node_names.append(name)
+        self.depth.append(self.depth[parent] + 1)
+        self.start.append(start)
+        self.end.append(start)
+        self._children.append({})
+        self._children[parent][name] = node
+        return node
+
+    def __len__(self):
+        """Number of modules, the top level included."""
+        return len(self.node_names)
+
+    # Nodes
+    def find(self, path):
+        """Node of a module path ("" or the divider alone for the top level), or None."""
+        node = 0
+        path = path.strip(self.divider) if path else ""
+        if not path:
+            return node
+        for part in self._splitter(self.divider)(path):
+            node = self._children[node].get(part)
+            if node is None:
+                return None
+        return node
+
+    def path(self, node):
+        parts = []
+        while node > 0:
+            parts.append(self.node_names[node])
+            node = int(self.parent[node])
+        return self.divider.join(reversed(parts))
+
+    def children(self, node):
+        return list(self._children[node].values())
+
+    def descendants(self, node, depth=1):
+        """Modules `depth` levels below node (fewer where a branch ends earlier, those are kept)."""
+        frontier = [node]
+        for _ in range(depth):
+            below = []
+            for parent in frontier:
+                children = self.children(parent)
+                below.extend(children if children else [parent])
+            if below == frontier:
+                break
+            frontier = below
+        return frontier
+
+    # Queries
+    def count(self, node):
+        """Names in the subtree of node."""
+        return int(self.end[node] - self.start[node])
+
+    def subtree_rows(self, node):
+        """Rows (in the input order) of the names under node, sorted by name."""
+        return self.order[self.start[node]:self.end[node]]
+
+    def subtree_ids(self, node):
+        return self.name_ids[self.subtree_rows(node)]
+
+    def rollup(self, values):
+        """Per node sums of a per-row value over each subtree."""
+        sums = np.zeros(len(self.order) + 1)
+        np.cumsum(np.asarray(values, dtype=np.float64)[self.order], out=sums[1:])
+        return sums[self.end] - sums[self.start]
@@ -1,6 +1,12 @@
+import itertools
 import json
 
 import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 import re
 from collections import defaultdict
@@ -8,6 +14,18 @@ from collections import defaultdict
 from collections import defaultdict
 import re
 
+import numpy as np
+
+from PyQt5.QtCore import QThread, pyqtSignal, QObject, pyqtSlot
+
+from global_name_index import gname_index
+from design_cache import DesignCache
+from library_cache import LibraryCache, library_cache_enabled, content_hash
+from parse_progress import ParseProgress, ParseCancelled, CancelToken, log_section_summary, abandon_pool
+from lef_reader import lef_statements, find_block_end
+from macro_registry import MacroRegistry
+from tech_model import TechModel
+
 # Define compact __slots__ structs
 
 class Foreign:
@@ -38,23 +56,176 @@ class Pin:
         self.supplysensitivity = None
         self.ports = []
 
+class MacroSource:
+    """A LEF file as it was when it was read, so a lazy macro body can be found again.
+
+    Macro._body holds (source, begin, end); any object with a
+    load_body(macro, begin, end) method can serve as the source.
+    """
+    __slots__ = ('path', 'size', 'mtime_ns')
+    def __init__(self, path):
+        stat = os.stat(path)
+        self.path = path
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+
+    def read(self, begin, end):
+        """Bytes [begin, end) of the file, or None if it changed since it was read."""
+        stat = os.stat(self.path)
+        if (stat.st_size, stat.st_mtime_ns) != (self.size, self.mtime_ns):
+            return None
+        with open(self.path, 'rb') as f:
+            f.seek(begin)
+            return f.read(end - begin)
+
+    def load_body(self, macro, begin, end):
+        data = self.read(begin, end)
+        if data is None:
+            logging.error(f"LEF {self.path} changed since it was read, macro {macro.name} has no pins/OBS")
+            macro._raw = ""
+            return
+        text = data.decode('utf-8', 'surrogateescape')
+        _read_macro_statements(macro, lef_statements(text.splitlines(keepends=True)))
+        macro._raw = text.strip()
+
+_materialize_lock = threading.Lock()
+
+class MacroShapes:
+    """Pin and OBS rectangles of a macro packed into arrays.
+
+    Row i is rects[i] = (x1, y1, x2, y2) in macro coordinates (float32) on
+    layer layer_ids[i] (gname_index id of the layer name) of pin pin_ids[i]
+    (index into pin_names, -1 for OBS). Rows are grouped by pin in pin
+    order with OBS last: pin p owns rows pin_offsets[p]:pin_offsets[p + 1],
+    the OBS rows are pin_offsets[-2]:pin_offsets[-1].
+    """
+    __slots__ = ('pin_names', 'pin_ids', 'layer_ids', 'rects', 'pin_offsets')
+    def __init__(self, pin_names, pin_ids, layer_ids, rects, pin_offsets):
+        self.pin_names = pin_names
+        self.pin_ids = pin_ids
+        self.layer_ids = layer_ids
+        self.rects = rects
+        self.pin_offsets = pin_offsets
+
+    @classmethod
+    def from_lists(cls, pins, obs):
+        """Pack {pin name: Pin} and {layer: [rect, ...]} as read by LefParser."""
+        pin_ids, layers, rects, offsets = [], [], [], [0]
+        for pin_id, pin in enumerate(pins.values()):
+            for port in pin.ports:
+                for layer, layer_rects in port.layer_rects.items():
+                    pin_ids.extend([pin_id] * len(layer_rects))
+                    layers.extend([layer] * len(layer_rects))
+                    rects.extend(layer_rects)
+            offsets.append(len(rects))
+        for layer, layer_rects in obs.items():
+            pin_ids.extend([-1] * len(layer_rects))
+            layers.extend([layer] * len(layer_rects))
+            rects.extend(layer_rects)
+        offsets.append(len(rects))
+
+        return cls(list(pins),
+                   np.array(pin_ids, dtype=np.int32),
+                   np.array(gname_index.set_many(layers), dtype=np.int32),
+                   np.array(rects, dtype=np.float32).reshape(len(rects), 4),
+                   np.array(offsets, dtype=np.int32))
+
+    def pin_rows(self, pin_id):
+        return slice(int(self.pin_offsets[pin_id]), int(self.pin_offsets[pin_id + 1]))
+
+    def obs_rows(self):
+        return slice(int(self.pin_offsets[-2]), int(self.pin_offsets[-1]))
+
+    def __len__(self):
+        return len(self.rects)
+
 class Macro:
-    __slots__ = ('name', 'raw', 'class_', 'origin', 'foreign', 'size', 'symmetry', 'site', 'pins', 'obs')
+    """A LEF macro. When read lazily (LEF_LAZY_MACROS, or from the library
+    cache), only the header fields are set up front; `_body` is the
+    (source, begin, end) span of the macro body and pins/obs/raw are loaded
+    from it on first access.
+    """
+    __slots__ = ('name', '_raw', 'class_', 'origin', 'foreign', 'size', 'symmetry', 'site', '_pins', '_obs', '_body',
+                 '_shapes')
     def __init__(self, name, raw):
         self.name = name
-        self.raw = raw
+        self._raw = raw
         self.class_ = None
         self.origin = []
         self.foreign = None
         self.size = []
         self.symmetry = []
         self.site = None
-        self.pins = {}  # pin_name -> Pin
-        self.obs = {}  # layer -> list of rects
+        self._pins = {}  # pin_name -> Pin
+        self._obs = {}  # layer -> list of rects
+        self._body = None
+        self._shapes = None
+
+    @property
+    def pins(self):
+        if self._body is not None:
+            self._materialize()
+        return self._pins
+
+    @pins.setter
+    def pins(self, pins):
+        self._pins = pins
+        self._shapes = None
+
+    @property
+    def obs(self):
+        if self._body is not None:
+            self._materialize()
+        return self._obs
+
+    @obs.setter
+    def obs(self, obs):
+        self._obs = obs
+        self._shapes = None
+
+    @property
+    def raw(self):
+        if self._body is not None:
+            self._materialize()
+        return self._raw
+
+    @raw.setter
+    def raw(self, raw):
+        self._raw = raw
+
+    @property
+    def shapes(self):
+        """MacroShapes of the pins and OBS, built on first access.
+
+        A body still in the library cache is packed straight from its
+        arrays, without building the pin dicts.
+        """
+        if self._shapes is None:
+            body = self._body
+            if body is not None and hasattr(body[0], "load_shapes"):
+                self._shapes = body[0].load_shapes(body[1])
+            else:
+                self._shapes = MacroShapes.from_lists(self.pins, self.obs)
+        return self._shapes
+
+    def is_loaded(self) -> bool:
+        return self._body is None
+
+    def _materialize(self):
+        with _materialize_lock:
+            if self._body is None:
+                return
+            source, begin, end = self._body
+            source.load_body(self, begin, end)
+            self._body = None
 
 class LefParser:
-    def __init__(self, lef_text):
+    def __init__(self, lef_text, progress=None, source_path=None):
         self.text = lef_text
+        self.progress = progress
+        self.source = None
+        if source_path is not None and os.environ.get("LEF_LAZY_MACROS", "1") != "0":
+            self.source = MacroSource(source_path)
         self.sites = {}  # site_name -> raw block
         self.macros = {}  # macro_name -> Macro
         self.layers = {}  # layer_name -> raw block
@@ -64,11 +235,108 @@ class LefParser:
         self._parse()
 
     def _parse(self):
+        if os.environ.get("LEF_READ_REGEX"):
+            self._parse_regex()
+            return
+
+        progress = self.progress or ParseProgress()
+        lines = self.text.splitlines(keepends=True)
+        cursor = [0]
+        statements = lef_statements(lines, cursor)
+        line_offsets = self._line_offsets(lines) if self.source is not None else None
+
+        def raw(first, last):
+            return "".join(lines[first:last + 1])
+
+        for tokens, first, last in statements:
+            keyword = tokens[0]
+            if keyword == "MACRO" and len(tokens) > 1:
+                progress.enter("MACRO")
+                macro = self._read_macro(tokens[1], statements, lines, first, cursor, line_offsets)
+                self.macros[macro.name] = macro
+                progress.record()
+            elif keyword in ("SITE", "LAYER", "VIARULE") and len(tokens) > 1:
+                progress.enter(keyword)
+                last = _skip_block(tokens[1], statements)
+                blocks = {"SITE": self.sites, "LAYER": self.layers, "VIARULE": self.via_rules}[keyword]
+                blocks[tokens[1]] = raw(first, last)
+            elif keyword == "VIA" and len(tokens) > 1:
+                progress.enter("VIA")
+                layers, last = _read_geometry(statements, end_name=tokens[1])
+                self.vias[tokens[1]] = {"raw": raw(first, last), "layers": layers}
+            elif keyword == "PROPERTYDEFINITIONS":
+                progress.enter("PROPERTYDEFINITIONS")
+                for tokens, first, last in statements:
+                    if tokens[0] == "END":
+                        break
+                    if len(tokens) >= 3:
+                        self.property_definitions[f"{tokens[0]} {tokens[1]}"] = " ".join(tokens[2:])
+            elif keyword == "NONDEFAULTRULE" and len(tokens) > 1:
+                progress.enter("VIA")
+                self._read_nondefault_rule(tokens[1], statements, raw)
+            elif keyword == "ARRAY" and len(tokens) > 1:
+                progress.enter("OTHER")
+                _skip_block(tokens[1], statements)
+            elif keyword == "UNITS" or (keyword == "SPACING" and len(tokens) == 1):
+                progress.enter("OTHER")
+                _skip_block(keyword, statements)
+            elif keyword == "BEGINEXT":
+                progress.enter("OTHER")
+                for tokens, first, last in statements:
+                    if tokens[0] == "ENDEXT":
+                        break
+            elif keyword == "END" and tokens[1:2] == ["LIBRARY"]:
+                break
+
+    # Single-pass reader
+    def _line_offsets(self, lines):
+        """Byte offset in the source file of the start of each line, plus the file size."""
+        if self.text.isascii():
+            lengths = map(len, lines)
+        else:
+            lengths = (len(line.encode('utf-8', 'surrogateescape')) for line in lines)
+        return [0, *itertools.accumulate(lengths)]
+
+    def _read_nondefault_rule(self, name, statements, raw):
+        """Skip a NONDEFAULTRULE block, keeping the vias it defines (they are referenced by name)."""
+        for tokens, first, last in statements:
+            keyword = tokens[0]
+            if keyword == "END" and (len(tokens) == 1 or tokens[1] == name):
+                break
+            elif keyword == "VIA" and len(tokens) > 1:
+                layers, last = _read_geometry(statements, end_name=tokens[1])
+                self.vias[tokens[1]] = {"raw": raw(first, last), "layers": layers}
+            elif keyword == "LAYER" and len(tokens) > 1:
+                _skip_block(tokens[1], statements)
+            elif keyword == "SPACING" and len(tokens) == 1:
+                _skip_block("SPACING", statements)
+
+    def _read_macro(self, name, statements, lines, start, cursor, line_offsets):
+        """Read a macro; in lazy mode only its header, recording the body's byte span."""
+        macro = Macro(name, None)
+        lazy = line_offsets is not None
+
+        end = _read_macro_statements(macro, statements, lines if lazy else None, cursor)
+        if lazy:
+            macro._body = (self.source, line_offsets[start + 1], line_offsets[end])
+        else:
+            macro.raw = "".join(lines[start + 1:end]).strip()
+        return macro
+
+    # Regex reader (LEF_READ_REGEX=1), kept for comparison
+    def _parse_regex(self):
+        progress = self.progress or ParseProgress()
+        progress.enter("SITE")
         self._parse_sites()
+        progress.enter("MACRO")
         self._parse_macros()
+        progress.enter("LAYER")
         self._parse_layers()
+        progress.enter("VIA")
         self._parse_vias()
+        progress.enter("VIARULE")
         self._parse_via_rules()
+        progress.enter("PROPERTYDEFINITIONS")
         self._parse_property_definitions()
 
     def _extract_blocks(self, keyword):
@@ -190,6 +458,12 @@ class LefParser:
                     value = " ".join(tokens[2:])
                     self.property_definitions[key] = value
 
+    def __getstate__(self):
+        # The raw text is only needed while parsing; keep it out of caches and pickles.
+        state = self.__dict__.copy()
+        state.pop('text', None)
+        return state
+
     # Accessors
     def get_sites(self): return self.sites
     def get_macros(self): return self.macros
@@ -198,27 +472,364 @@ class LefParser:
     def get_via_rules(self): return self.via_rules
     def get_property_definitions(self): return self.property_definitions
 
-    
 
-class LefParserImplement:
+def _skip_block(name, statements):
+    """Consume statements up to 'END name' (or a bare 'END'); returns the line index of that END."""
+    last = None
+    for tokens, first, last in statements:
+        if tokens[0] == "END" and (len(tokens) == 1 or tokens[1] == name):
+            break
+    return last
+
+
+def _read_macro_statements(macro, statements, lines=None, cursor=None):
+    """Fill `macro` from its body statements; returns the line index of 'END <name>'.
+
+    With `lines` and `cursor` given, only the header (CLASS, SIZE, ORIGIN,
+    FOREIGN, SYMMETRY, SITE) is read: at the first PIN/OBS the rest of the
+    body is skipped line-wise up to the END, without tokenizing it.
+    """
+    name = macro.name
+    for tokens, first, last in statements:
+        keyword = tokens[0]
+
+        if keyword == "END" and len(tokens) > 1:
+            if tokens[1] == name:
+                return first
+        elif keyword in ("PIN", "OBS", "DENSITY", "TIMING") and lines is not None:
+            end = find_block_end(lines, cursor[0], name)
+            cursor[0] = end + 1
+            return end
+        elif keyword == "PIN" and len(tokens) > 1:
+            macro._pins[tokens[1]] = _read_pin(statements)
+        elif keyword == "OBS":
+            obs, _ = _read_geometry(statements)
+            for layer, rects in obs.items():
+                macro._obs.setdefault(layer, []).extend(rects)
+        elif keyword == "DENSITY":
+            _read_geometry(statements)
+        elif keyword == "CLASS":
+            macro.class_ = " ".join(tokens[1:])
+        elif keyword == "SIZE" and len(tokens) >= 4:
+            macro.size = [float(tokens[1]), float(tokens[3])]
+        elif keyword == "ORIGIN":
+            macro.origin = _numbers(tokens[1:])[:2]
+        elif keyword == "FOREIGN" and macro.foreign is None and len(tokens) > 1:
+            macro.foreign = Foreign(tokens[1], (_numbers(tokens[2:])[:2] or [0.0, 0.0]))
+        elif keyword == "SYMMETRY":
+            macro.symmetry = tokens[1:]
+        elif keyword == "SITE" and macro.site is None and len(tokens) > 1:
+            macro.site = tokens[1]
+
+    return cursor[0] if cursor is not None else None
+
+
+def _read_pin(statements):
+    pin = Pin()
+    for tokens, first, last in statements:
+        keyword = tokens[0]
+        if keyword == "END" and len(tokens) > 1:
+            break
+        elif keyword == "PORT":
+            layer_rects, _ = _read_geometry(statements)
+            pin.ports.append(PinPort(layer_rects))
+        elif keyword == "DIRECTION":
+            pin.direction = " ".join(tokens[1:])
+        elif keyword == "USE":
+            pin.use = " ".join(tokens[1:])
+        elif keyword == "GROUNDSENSITIVITY":
+            pin.groundsensitivity = " ".join(tokens[1:])
+        elif keyword == "SUPPLYSENSITIVITY":
+            pin.supplysensitivity = " ".join(tokens[1:])
+        elif keyword.startswith("ANTENNA") and len(tokens) >= 2 and _is_number(tokens[1]):
+            layer = tokens[tokens.index("LAYER") + 1] if "LAYER" in tokens[:-1] else None
+            pin.antenna.append(Antenna(keyword, float(tokens[1]), layer))
+    return pin
+
+
+def _read_geometry(statements, end_name=None):
+    """Read LAYER/RECT/POLYGON statements up to 'END' (or 'END end_name').
+
+    Returns ({layer: [[x1, y1, x2, y2], ...]}, line index of the END).
+    RECT ITERATE ... DO/STEP arrays are expanded; polygons are kept as
+    their bounding box. PATH, VIA and WIDTH statements are skipped.
+    """
+    layer_rects = {}
+    current = None
+    last = None
+
+    for tokens, first, last in statements:
+        keyword = tokens[0]
+        if keyword == "END":
+            if end_name is None or tokens[1:2] == [end_name]:
+                break
+        elif keyword == "LAYER" and len(tokens) > 1:
+            current = layer_rects.setdefault(tokens[1], [])
+        elif keyword in ("RECT", "POLYGON") and current is not None:
+            values, steps = _geometry_values(tokens[1:])
+            if len(values) < 4:
+                continue
+            xs, ys = values[0::2], values[1::2]
+            rect = [min(xs), min(ys), max(xs), max(ys)]
+            if steps is None:
+                current.append(rect)
+            else:
+                num_x, num_y, step_x, step_y = steps
+                for i in range(int(num_x)):
+                    for j in range(int(num_y)):
+                        dx, dy = i * step_x, j * step_y
+                        current.append([rect[0] + dx, rect[1] + dy, rect[2] + dx, rect[3] + dy])
+
+    return {layer: rects for layer, rects in layer_rects.items() if rects}, last
+
+
+def _is_number(token):
+    try:
+        float(token)
+        return True
+    except ValueError:
+        return False
+
+
+def _numbers(tokens):
+    return [float(t) for t in tokens if _is_number(t)]
+
+
+def _geometry_values(tokens):
+    """Coordinates of a RECT/POLYGON statement and its (nx, ny, sx, sy) DO/STEP, if any."""
+    steps = None
+    if "DO" in tokens:
+        do = tokens.index("DO")
+        steps = _numbers(tokens[do + 1:])
+        steps = steps if len(steps) == 4 else None
+        tokens = tokens[:do]
+    if tokens and tokens[0] == "MASK":
+        tokens = tokens[2:]
+    return _numbers(tokens), steps
+
+
+def load_lef_file(file_path, cancel_token=None):
+    """Parse one LEF file, or take it from the library (or design) cache.
+
+    Returns (LefParser, section summary, elapsed seconds). Also the process
+    pool entry point of LefLoadWorker, so it only uses picklable values.
+    """
+    progress = ParseProgress(cancel_token=cancel_token)
+    progress.enter("CACHE LOAD")
+    library = LibraryCache() if library_cache_enabled() else None
+    cache = DesignCache()
+    if library is not None:
+        key = content_hash(file_path)
+        lefParser = library.load(file_path, key)
+    else:
+        lefParser = cache.load_lef(file_path)
+
+    if lefParser is None:
+        progress.enter("READ")
+        # newline='' keeps line ends as they are on disk, so that line
+        # lengths add up to byte offsets for the lazy macro bodies.
+        with open(file_path, 'r', encoding='utf-8', errors='surrogateescape', newline='') as f:
+            lef_text = f.read()
+        lefParser = LefParser(lef_text, progress, source_path=file_path)
+        lefParser.progress = None
+        progress.enter("CACHE WRITE")
+        if library is not None:
+            # Continue from the entry: macro bodies then come from the shared mapping.
+            lefParser = library.save(file_path, lefParser, key) or lefParser
+        else:
+            cache.save_lef(file_path, lefParser)
+    progress.finish()
+
+    return lefParser, progress.summary(), progress.elapsed()
+
+
+class LefLoadWorker(QObject):
+    """Loads a list of LEF files off the GUI thread, one file per pool process.
+
+    LEF_READ_MT=<n> bounds the pool at n processes (default: one per core,
+    never more than there are files); a single file is parsed in this
+    thread, without a pool. Results are emitted once, in the order the
+    files were given, whatever order the workers finish in.
+    """
+    finished = pyqtSignal(dict)
+
+    def __init__(self, file_paths, cancel_token=None):
+        super().__init__()
+        self.file_paths = list(file_paths)
+        self.cancel_token = cancel_token if cancel_token is not None else CancelToken()
+
+        num_workers = os.environ.get("LEF_READ_MT", "")
+        if num_workers.isdigit() and int(num_workers) > 0:
+            self.num_workers = int(num_workers)
+        else:
+            self.num_workers = os.cpu_count() or 1
+        self.num_workers = max(1, min(self.num_workers, len(self.file_paths)))
+
+    @pyqtSlot()
+    def run(self):
+        started = time.perf_counter()
+        try:
+            results = self.load()
+        except ParseCancelled:
+            self._emit_finished([], started, cancelled=True)
+            return
+        except Exception as e:
+            # Pool start-up or the wait itself failed; report it, or pending never drops.
+            logging.exception("Parse LEF files failed")
+            self._emit_finished([], started, error=f"{type(e).__name__}: {e}")
+            return
+        self._emit_finished(results, started)
+
+    def _emit_finished(self, results, started, cancelled=False, error=None):
+        self.finished.emit({
+            "results": results,
+            "cancelled": cancelled,
+            "error": error,
+            "elapsed": time.perf_counter() - started
+        })
+
+    def cancel(self):
+        """Ask the running load to stop; safe to call from any thread."""
+        self.cancel_token.cancel()
+
+    def load(self):
+        """[(file_path, LefParser or None, summary, elapsed, error)] in file order."""
+        if self.num_workers == 1:
+            results = []
+            for file_path in self.file_paths:
+                self.cancel_token.raise_if_cancelled()
+                results.append(self._result(file_path, lambda: load_lef_file(file_path, self.cancel_token)))
+            return results
+
+        pool_context = multiprocessing.get_context("spawn")
+        # Not a 'with' block, whose exit would wait for the libraries in flight on a cancel.
+        pool = ProcessPoolExecutor(max_workers=self.num_workers, mp_context=pool_context)
+        try:
+            futures = [(file_path, pool.submit(load_lef_file, file_path)) for file_path in self.file_paths]
+            # Poll so that a cancel does not wait for the largest library.
+            while not all(future.done() for _, future in futures):
+                self.cancel_token.raise_if_cancelled()
+                wait([future for _, future in futures], timeout=0.1, return_when=FIRST_COMPLETED)
+        except BaseException:
+            abandon_pool(pool)
+            raise
+        pool.shutdown()
+        return [self._result(file_path, future.result) for file_path, future in futures]
+
+    @staticmethod
+    def _result(file_path, load):
+        try:
+            lefParser, summary, elapsed = load()
+        except ParseCancelled:
+            raise
+        except Exception as e:
+            return file_path, None, [], 0.0, f"{type(e).__name__}: {e}"
+        return file_path, lefParser, summary, elapsed, None
+
+
+class LefParserImplement(QObject):
+
+    lef_parser_finished_signal = pyqtSignal(str)     # all LEF files of a load are merged
+    lef_parser_cancelled_signal = pyqtSignal(str)
+
     def __init__(self):
+        super().__init__()
 
         self.parser_dict = {}
+        self.registry = MacroRegistry()
+        self._tech = None
+        self.generation = 0     # bumped whenever the loaded libraries change
+        self.pending = 0        # parse_all() loads not finished or cancelled yet
+
+        self.all_workers = []
+        self.all_threads = []
 
     def parse(self, file_path):
+        """Load one LEF file synchronously."""
         if file_path:
-            with open(file_path, 'r') as f:
-                lef_text = f.read()
-                lefParser = LefParser(lef_text)
-                self.parser_dict[file_path] = lefParser
+            lefParser, summary, elapsed = load_lef_file(file_path)
+            self.add_parser(file_path, lefParser)
+            log_section_summary(f"Parse LEF {file_path} finished", summary, elapsed)
+
+    def parse_all(self, file_paths):
+        """Load LEF files in a LefLoadWorker thread; emits lef_parser_finished_signal once all are in."""
+        file_paths = [f for f in file_paths if f]
+        if not file_paths:
+            self.lef_parser_finished_signal.emit("LEF ready: no LEF files.")
+            return
+
+        worker = LefLoadWorker(file_paths)
+        thread = QThread()
+        self.pending += 1
+
+        self.all_workers.append(worker)
+        self.all_threads.append(thread)
+
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+
+        worker.finished.connect(self.on_parse_finished)
+        worker.finished.connect(thread.quit)
+        thread.finished.connect(thread.deleteLater)
+        thread.start()
+
+        logging.info(f"Parse {len(file_paths)} LEF files in {worker.num_workers} processes started...")
+
+    def cancel(self):
+        """Cancel every LEF load still in progress."""
+        for worker in self.all_workers:
+            worker.cancel()
+
+    def on_parse_finished(self, result):
+        self.pending -= 1
+        if result["cancelled"]:
+            logging.info(f"Parse LEF cancelled after {result['elapsed']:.2f} s")
+            self.lef_parser_cancelled_signal.emit("LEF parser cancelled.")
+            return
+
+        if result.get("error") is not None:
+            logging.error(f"Parse LEF files failed: {result['error']}")
+            self.lef_parser_finished_signal.emit("LEF parser failed.")
+            return
+
+        for file_path, lefParser, summary, elapsed, error in result["results"]:
+            if lefParser is None:
+                logging.error(f"Parse LEF {file_path} failed: {error}")
+                continue
+            self.add_parser(file_path, lefParser)
+            log_section_summary(f"Parse LEF {file_path} finished", summary, elapsed)
+
+        logging.info(f"LEF ready: {len(self.registry)} macros from {len(self.parser_dict)} files "
+                     f"in {result['elapsed']:.2f} s")
+        self.lef_parser_finished_signal.emit("LEF ready.")
+
+    def add_parser(self, file_path, lefParser):
+        """Register a loaded LEF file; files added earlier take precedence for duplicate macros."""
+        self._tech = None
+        self.generation += 1
+        if file_path in self.parser_dict:
+            # Reloading a file: rebuild so it keeps its place in the precedence order.
+            self.parser_dict[file_path] = lefParser
+            self.registry = MacroRegistry()
+            for path, parser in self.parser_dict.items():
+                self.registry.add_library(path, parser.get_macros())
+        else:
+            self.parser_dict[file_path] = lefParser
+            self.registry.add_library(file_path, lefParser.get_macros())
+
+    def clear(self):
+        """Drop every loaded LEF file."""
+        self.parser_dict.clear()
+        self.registry = MacroRegistry()
+        self._tech = None
+        self.generation += 1
 
     def get_macro(self, cell_name):
-        for l, parser in self.parser_dict.items():
-            macros = parser.get_macros()
-            if cell_name in macros:
-                return macros[cell_name]
-            
-        return None
-    
-
-
+        """Macro of a cell; the first loaded LEF file that defines it wins."""
+        return self.registry.get(cell_name)
+
+    def get_tech(self):
+        """TechModel of the layers, vias and via rules of all loaded LEF files (built on first use)."""
+        if self._tech is None:
+            self._tech = TechModel.from_lef_parsers(self.parser_dict.values())
+        return self._tech
@@ -0,0 +1,108 @@
+import re
+
+# Keywords that open a block (or close one) and therefore form a statement
+# on their own when their line carries no ';'.
+_OPENERS = {"MACRO", "PIN", "OBS", "PORT", "END", "SITE", "LAYER", "VIA", "VIARULE",
+            "NONDEFAULTRULE", "UNITS", "PROPERTYDEFINITIONS", "ARRAY",
+            "BEGINEXT", "ENDEXT", "DENSITY", "FLOORPLAN", "TIMING"}
+# SPACING opens the top level SPACING ... END SPACING block only when it
+# stands alone on its line; inside a LAYER it starts a rule that may go on
+# over several lines up to its ';'.
+_ALONE_OPENERS = {"SPACING"}
+
+_QUOTED_TOKEN_RE = re.compile(r'"[^"]*"|;|[^\s;"]+')
+
+
+def _strip_comment(line):
+    """Drop a '#' comment, leaving '#' inside quoted strings alone."""
+    pos = line.find('#')
+    while pos >= 0:
+        if line.count('"', 0, pos) % 2 == 0:
+            return line[:pos]
+        pos = line.find('#', pos + 1)
+    return line
+
+
+def lef_statements(lines, cursor=None):
+    """Split LEF lines into statements in one pass.
+
+    Yields (tokens, first_line, last_line) with the terminating ';' removed;
+    tokens[0] is upper-cased since LEF keywords are case-insensitive.
+    A statement ends at ';', or at the end of its line when it starts with a
+    block keyword such as 'MACRO INV' or 'END INV'. Quoted strings may hold
+    ';' and span lines; they stay one token, quotes included.
+
+    `cursor` is a one-element list holding the index of the next line to
+    read. Right after a block keyword statement has been yielded, the
+    caller may move it forward to skip the block without tokenizing it
+    (see find_block_end).
+    """
+    if cursor is None:
+        cursor = [0]
+    num_lines = len(lines)
+
+    tokens = []
+    first = 0
+    in_quote = False
+    quoted = []
+    quote_start = 0
+
+    while cursor[0] < num_lines:
+        index = cursor[0]
+        cursor[0] = index + 1
+        line = lines[index]
+        line_start = index
+        if in_quote:
+            quoted.append(line)
+            if line.count('"') % 2 == 0:
+                continue
+            line = "".join(quoted)
+            line_start = quote_start
+            in_quote = False
+        else:
+            if '#' in line:
+                line = _strip_comment(line)
+            if '"' in line and line.count('"') % 2 == 1:
+                quoted = [line]
+                quote_start = index
+                in_quote = True
+                continue
+
+        if '"' in line:
+            line_tokens = _QUOTED_TOKEN_RE.findall(line)
+        else:
+            line_tokens = line.replace(';', ' ; ').split()
+        if not line_tokens:
+            continue
+
+        for token in line_tokens:
+            if token == ';':
+                if tokens:
+                    tokens[0] = tokens[0].upper()
+                    yield tokens, first, index
+                tokens = []
+            else:
+                if not tokens:
+                    first = line_start
+                tokens.append(token)
+
+        if tokens and first == line_start and (tokens[0].upper() in _OPENERS or
+                                               (len(tokens) == 1 and tokens[0].upper() in _ALONE_OPENERS)):
+            tokens[0] = tokens[0].upper()
+            yield tokens, first, index
+            tokens = []
+
+    if tokens:
+        tokens[0] = tokens[0].upper()
+        yield tokens, first, num_lines - 1
+
+
+def find_block_end(lines, start, name):
+    """Index of the first line from `start` that reads 'END name', or len(lines)."""
+    for index in range(start, len(lines)):
+        line = lines[index].lstrip()
+        if line[:3].upper() == "END":
+            parts = line.split(None, 2)
+            if len(parts) > 1 and parts[1] == name and parts[0].upper() == "END":
+                return index
+    return len(lines)
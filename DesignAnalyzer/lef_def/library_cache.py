@@ -0,0 +1,353 @@
+import hashlib
+import logging
+import mmap
+import os
+import pickle
+import struct
+import threading
+import weakref
+
+import numpy as np
+
+from global_name_index import gname_index
+
+########################################################################
+#
+# Shared cache of parsed LEF libraries.
+#
+#   <library cache dir>/<content hash>.lefcache
+#
+# Entries are keyed by a hash of the LEF contents, not its path, so every
+# copy of tech.lef or nangate45.lef in any design directory maps to one
+# entry, and editing a LEF makes a new entry instead of reading a stale one.
+#
+# An entry is a single file:
+#
+#   MAGIC | header length (u64) | header pickle | arrays, 64-byte aligned
+#
+# The pickled header holds the small parts (sites, layers, vias, via rules,
+# property definitions and the macro header fields). Pin and OBS geometry,
+# pin attributes and the raw macro text sit in flat arrays that are read
+# through a read-only mmap. Every process that opens the entry shares the
+# same page-cache pages, and a macro body is only decoded when its pins
+# are first used, like a lazy LEF macro.
+#
+# The directory is LEF_LIBRARY_CACHE_DIR if set, else
+# ~/.cache/design_analyzer/lef. LEF_LIBRARY_CACHE=0 or DESIGN_CACHE=0
+# disables it.
+#
+########################################################################
+
+LIBRARY_CACHE_VERSION = 1
+
+_MAGIC = b"DALEFLB\0"
+_ALIGN = 64
+
+
+def library_cache_enabled():
+    return (os.environ.get("LEF_LIBRARY_CACHE", "1") != "0"
+            and os.environ.get("DESIGN_CACHE", "1") != "0")
+
+
+def library_cache_dir():
+    return (os.environ.get("LEF_LIBRARY_CACHE_DIR")
+            or os.path.join(os.path.expanduser("~"), ".cache", "design_analyzer", "lef"))
+
+
+def content_hash(file_path):
+    """Hash of the whole file contents (LEF files are small enough to read fully)."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(struct.pack("<I", LIBRARY_CACHE_VERSION))
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class LibraryEntry:
+    """An open .lefcache file; serves lazy macro bodies from its mmap.
+
+    Pickles as its path, so LefParsers loaded from the library cache can
+    be sent between processes; the receiving side maps the file again, once
+    per process (see open_entry).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mm = None
+        self.header = None
+        self.arrays = None
+        self._layer_name_ids = weakref.WeakKeyDictionary()    # name table -> entry layer id -> name id
+        self._open()
+
+    def _open(self):
+        with open(self.path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mm[:len(_MAGIC)] != _MAGIC:
+            mm.close()
+            raise ValueError(f"{self.path} is not a LEF library cache file")
+
+        start = len(_MAGIC)
+        (header_len,) = struct.unpack_from("<Q", mm, start)
+        start += 8
+        header = pickle.loads(mm[start:start + header_len])
+        if header.get("version") != LIBRARY_CACHE_VERSION:
+            mm.close()
+            raise ValueError(f"{self.path} has library cache version {header.get('version')}")
+
+        data_start = _aligned(start + header_len)
+        arrays = {}
+        for name, (dtype, shape, offset) in header["arrays"].items():
+            count = int(np.prod(shape))
+            if count == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+                continue
+            arrays[name] = np.frombuffer(mm, dtype=dtype, count=count,
+                                         offset=data_start + offset).reshape(shape)
+
+        self._mm = mm
+        self.header = header
+        self.arrays = arrays
+
+    def __reduce__(self):
+        return open_entry, (self.path,)
+
+    def load_body(self, macro, index, _unused=None):
+        """Fill pins, OBS and raw text of macro `index` from the arrays."""
+        from lef_parser import Pin, PinPort, Antenna   # lef_parser imports this module
+
+        a = self.arrays
+        layer_names = self.header["layer_names"]
+        rects = a["rects"]
+        rect_layers = a["rect_layers"]
+
+        def layer_rects(begin, end):
+            out = {}
+            for layer_id, rect in zip(rect_layers[begin:end].tolist(), rects[begin:end].tolist()):
+                out.setdefault(layer_names[layer_id], []).append(rect)
+            return out
+
+        pin_begin, pin_end = int(a["macro_pins"][index]), int(a["macro_pins"][index + 1])
+        pin_meta = pickle.loads(_blob(a, 2 * index))
+
+        pins = {}
+        for pin_index, (name, direction, use, ground, supply, antenna) in zip(
+                range(pin_begin, pin_end), pin_meta):
+            pin = Pin()
+            pin.direction, pin.use = direction, use
+            pin.groundsensitivity, pin.supplysensitivity = ground, supply
+            pin.antenna = [Antenna(*values) for values in antenna]
+            port_begin, port_end = int(a["pin_ports"][pin_index]), int(a["pin_ports"][pin_index + 1])
+            for rect_begin, rect_end in a["port_rects"][port_begin:port_end].tolist():
+                pin.ports.append(PinPort(layer_rects(rect_begin, rect_end)))
+            pins[name] = pin
+
+        macro._pins = pins
+        obs_begin, obs_end = a["macro_obs"][index].tolist()
+        macro._obs = layer_rects(obs_begin, obs_end)
+        macro._raw = _blob(a, 2 * index + 1).decode('utf-8', 'surrogateescape')
+
+    def load_shapes(self, index):
+        """MacroShapes of macro `index`, sliced from the arrays without building pin dicts."""
+        from lef_parser import MacroShapes
+
+        a = self.arrays
+        name_table = gname_index.current()
+        layer_name_ids = self._layer_name_ids.get(name_table)
+        if layer_name_ids is None:
+            layer_name_ids = np.array(name_table.set_many(self.header["layer_names"]), dtype=np.int32)
+            self._layer_name_ids[name_table] = layer_name_ids
+
+        pin_begin, pin_end = int(a["macro_pins"][index]), int(a["macro_pins"][index + 1])
+        port_begin, port_end = int(a["pin_ports"][pin_begin]), int(a["pin_ports"][pin_end])
+        ports = a["port_rects"][port_begin:port_end]
+        obs_begin, obs_end = a["macro_obs"][index].tolist()
+
+        # Ports, then OBS, are stored back to back for each macro.
+        begin = int(ports[0, 0]) if len(ports) else obs_begin
+        rects_before_port = np.concatenate(([0], np.cumsum(ports[:, 1] - ports[:, 0])))
+        pin_ports = a["pin_ports"][pin_begin:pin_end + 1] - port_begin
+        pin_counts = rects_before_port[pin_ports[1:]] - rects_before_port[pin_ports[:-1]]
+
+        offsets = np.concatenate(([0], np.cumsum(pin_counts), [np.sum(pin_counts) + obs_end - obs_begin]))
+        pin_ids = np.repeat(np.append(np.arange(pin_end - pin_begin, dtype=np.int32), -1),
+                            np.append(pin_counts, obs_end - obs_begin))
+        pin_names = [meta[0] for meta in pickle.loads(_blob(a, 2 * index))]
+
+        return MacroShapes(pin_names, pin_ids.astype(np.int32),
+                           layer_name_ids[a["rect_layers"][begin:obs_end]],
+                           a["rects"][begin:obs_end].astype(np.float32),
+                           offsets.astype(np.int32))
+
+    def lef_parser(self):
+        """A LefParser whose macros load their bodies from this entry."""
+        from lef_parser import LefParser, Macro, Foreign
+
+        header = self.header
+        parser = LefParser.__new__(LefParser)
+        parser.text = None
+        parser.progress = None
+        parser.source = self    # keeps the entry mapped for as long as the parser lives
+        parser.sites = header["sites"]
+        parser.layers = header["layers"]
+        parser.vias = header["vias"]
+        parser.via_rules = header["via_rules"]
+        parser.property_definitions = header["property_definitions"]
+
+        parser.macros = {}
+        for index, (name, class_, origin, foreign, size, symmetry, site) in enumerate(header["macros"]):
+            macro = Macro(name, None)
+            macro.class_, macro.origin, macro.size = class_, origin, size
+            macro.symmetry, macro.site = symmetry, site
+            macro.foreign = Foreign(*foreign) if foreign is not None else None
+            macro._body = (self, index, None)
+            parser.macros[name] = macro
+        return parser
+
+
+# entry path -> LibraryEntry, shared by every parser of this process. Weak,
+# so an entry is unmapped once the last parser (or macro) using it is gone.
+_open_entries = weakref.WeakValueDictionary()
+_open_entries_lock = threading.Lock()
+
+
+def open_entry(path):
+    """The LibraryEntry of an entry file, mapping it on first use in this process."""
+    with _open_entries_lock:
+        entry = _open_entries.get(path)
+        if entry is None:
+            entry = LibraryEntry(path)
+            _open_entries[path] = entry
+        return entry
+
+
+class LibraryCache:
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or library_cache_dir()
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.lefcache")
+
+    def load(self, file_path, key=None):
+        """LefParser of file_path from the library cache, or None when it has no entry."""
+        if not library_cache_enabled():
+            return None
+        path = self.entry_path(key or content_hash(file_path))
+        if not os.path.exists(path):
+            return None
+        try:
+            entry = open_entry(path)
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError) as e:
+            logging.warning(f"Ignoring LEF library cache {path}: {e}")
+            return None
+
+        logging.info(f"LEF {file_path} loaded from library cache {path}")
+        return entry.lef_parser()
+
+    def save(self, file_path, lef_parser, key=None):
+        """Write lef_parser as the entry of file_path (materializes every lazy macro body).
+
+        Returns a LefParser backed by the new entry, or None if it could not be written.
+        """
+        if not library_cache_enabled():
+            return None
+        path = self.entry_path(key or content_hash(file_path))
+        tmp = f"{path}.tmp{os.getpid()}"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp, 'wb') as f:
+                _write_entry(f, lef_parser)
+            os.replace(tmp, path)
+            return open_entry(path).lef_parser()
+        except OSError as e:
+            logging.warning(f"Could not write LEF library cache for {file_path}: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return None
+
+
+def _write_entry(f, lef_parser):
+    layer_ids = {}
+    rects, rect_layers = [], []
+    port_rects, pin_ports, macro_pins, macro_obs = [], [0], [0], []
+    blobs = bytearray()
+    macro_blobs = [0]    # blob 2i: pickled pin attributes of macro i, blob 2i + 1: its raw text
+    macro_headers = []
+
+    def add_rects(layer_rects):
+        for layer, layer_rect_list in layer_rects.items():
+            layer_id = layer_ids.setdefault(layer, len(layer_ids))
+            rects.extend(layer_rect_list)
+            rect_layers.extend([layer_id] * len(layer_rect_list))
+
+    for name, macro in lef_parser.get_macros().items():
+        foreign = (macro.foreign.name, macro.foreign.coords) if macro.foreign is not None else None
+        macro_headers.append((name, macro.class_, macro.origin, foreign, macro.size,
+                              macro.symmetry, macro.site))
+
+        pin_meta = []
+        for pin_name, pin in macro.pins.items():
+            pin_meta.append((pin_name, pin.direction, pin.use, pin.groundsensitivity,
+                             pin.supplysensitivity, [(a.type, a.value, a.layer) for a in pin.antenna]))
+            for port in pin.ports:
+                port_begin = len(rects)
+                add_rects(port.layer_rects)
+                port_rects.append((port_begin, len(rects)))
+            pin_ports.append(len(port_rects))
+        macro_pins.append(len(pin_ports) - 1)
+
+        obs_begin = len(rects)
+        add_rects(macro.obs)
+        macro_obs.append((obs_begin, len(rects)))
+
+        blobs += pickle.dumps(pin_meta, protocol=pickle.HIGHEST_PROTOCOL)
+        macro_blobs.append(len(blobs))
+        blobs += (macro.raw or "").encode('utf-8', 'surrogateescape')
+        macro_blobs.append(len(blobs))
+
+    arrays = {
+        "rects": np.array(rects, dtype=np.float64).reshape(len(rects), 4),
+        "rect_layers": np.array(rect_layers, dtype=np.int32),
+        "port_rects": np.array(port_rects, dtype=np.int64).reshape(len(port_rects), 2),
+        "pin_ports": np.array(pin_ports, dtype=np.int64),
+        "macro_pins": np.array(macro_pins, dtype=np.int64),
+        "macro_obs": np.array(macro_obs, dtype=np.int64).reshape(len(macro_obs), 2),
+        "macro_blobs": np.array(macro_blobs, dtype=np.int64),
+        "blobs": np.frombuffer(bytes(blobs), dtype=np.uint8),
+    }
+
+    specs = {}
+    offset = 0
+    for name, array in arrays.items():
+        specs[name] = (array.dtype.str, array.shape, offset)
+        offset = _aligned(offset + array.nbytes)
+
+    header = pickle.dumps({
+        "version": LIBRARY_CACHE_VERSION,
+        "sites": lef_parser.get_sites(),
+        "layers": lef_parser.get_layers(),
+        "vias": lef_parser.get_vias(),
+        "via_rules": lef_parser.get_via_rules(),
+        "property_definitions": lef_parser.get_property_definitions(),
+        "macros": macro_headers,
+        "layer_names": list(layer_ids),
+        "arrays": specs,
+    }, protocol=pickle.HIGHEST_PROTOCOL)
+
+    f.write(_MAGIC)
+    f.write(struct.pack("<Q", len(header)))
+    f.write(header)
+    data_start = _aligned(f.tell())
+    f.write(b"\0" * (data_start - f.tell()))
+    for name, array in arrays.items():
+        f.seek(data_start + specs[name][2])
+        f.write(np.ascontiguousarray(array).tobytes())
+
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _blob(arrays, index):
+    offsets = arrays["macro_blobs"]
+    return arrays["blobs"][int(offsets[index]):int(offsets[index + 1])].tobytes()
@@ -0,0 +1,114 @@
+import logging
+
+import numpy as np
+
+from global_name_index import gname_index
+
+
+class MacroRegistry:
+    """All macros of the loaded LEF files, keyed by cell name id.
+
+    Precedence: the first LEF file that defines a macro wins. A macro defined
+    again by a later file is ignored and logged, so lookups match the old
+    walk over the files in load order.
+
+    Besides the Macro objects, the registry keeps dense arrays indexed by
+    cell name id (width and height in microns, macro class id, and whether
+    a macro is defined at all), so a whole component table can be resolved
+    with one gather: registry.widths[cell_name_ids].
+    """
+
+    def __init__(self):
+        self._macros = {}    # cell_name_id -> Macro
+        self._sources = {}   # cell_name_id -> LEF file that defined it
+
+        self.class_names = []    # class id -> CLASS string, e.g. 'CORE'
+        self._class_ids = {}
+
+        self.widths = np.zeros(0, dtype=np.float64)
+        self.heights = np.zeros(0, dtype=np.float64)
+        self.class_ids = np.zeros(0, dtype=np.int32)    # -1: no CLASS
+        self.defined = np.zeros(0, dtype=bool)
+
+    def add_library(self, file_path, macros):
+        """Register the macros ({name: Macro}) of one LEF file; returns how many were new."""
+        names = list(macros)
+        ids = gname_index.set_many(names)
+        self._grow(len(gname_index))
+
+        added = 0
+        duplicates = []
+        for name, name_id in zip(names, ids):
+            if name_id in self._macros:
+                duplicates.append(name)
+                continue
+
+            macro = macros[name]
+            self._macros[name_id] = macro
+            self._sources[name_id] = file_path
+            added += 1
+
+            if len(macro.size) >= 2:
+                self.widths[name_id], self.heights[name_id] = macro.size[:2]
+            self.class_ids[name_id] = self._class_id(macro.class_)
+            self.defined[name_id] = True
+
+        if duplicates:
+            shown = ", ".join(duplicates[:10]) + (", ..." if len(duplicates) > 10 else "")
+            logging.warning(f"{len(duplicates)} macros of {file_path} ignored, already defined by an "
+                            f"earlier LEF: {shown}")
+        return added
+
+    def _class_id(self, class_):
+        if class_ is None:
+            return -1
+        class_id = self._class_ids.get(class_)
+        if class_id is None:
+            class_id = len(self.class_names)
+            self.class_names.append(class_)
+            self._class_ids[class_] = class_id
+        return class_id
+
+    def _grow(self, size):
+        if size <= len(self.defined):
+            return
+        capacity = max(size, 2 * len(self.defined))
+        extra = capacity - len(self.defined)
+        self.widths = np.concatenate((self.widths, np.zeros(extra, dtype=np.float64)))
+        self.heights = np.concatenate((self.heights, np.zeros(extra, dtype=np.float64)))
+        self.class_ids = np.concatenate((self.class_ids, np.full(extra, -1, dtype=np.int32)))
+        self.defined = np.concatenate((self.defined, np.zeros(extra, dtype=bool)))
+
+    # Lookups
+    def get(self, cell_name):
+        if not gname_index.has_name(cell_name):
+            return None
+        return self._macros.get(gname_index.get_id(cell_name))
+
+    def get_by_id(self, cell_name_id):
+        return self._macros.get(cell_name_id)
+
+    def source(self, cell_name_id):
+        """LEF file the macro was taken from, or None."""
+        return self._sources.get(cell_name_id)
+
+    def lookup(self, cell_name_ids):
+        """Vectorized (found, width, height, class_id) of an array of cell name ids.
+
+        Ids the registry has never seen (beyond the arrays) count as not found.
+        """
+        cell_name_ids = np.asarray(cell_name_ids, dtype=np.int64)
+        found = np.zeros(len(cell_name_ids), dtype=bool)
+        in_range = (cell_name_ids >= 0) & (cell_name_ids < len(self.defined))
+        ids = np.where(in_range, cell_name_ids, 0)
+        if len(self.defined):
+            found = in_range & self.defined[ids]
+            return found, self.widths[ids], self.heights[ids], np.where(found, self.class_ids[ids], -1)
+        zeros = np.zeros(len(cell_name_ids))
+        return found, zeros, zeros, np.full(len(cell_name_ids), -1, dtype=np.int32)
+
+    def __contains__(self, cell_name_id):
+        return cell_name_id in self._macros
+
+    def __len__(self):
+        return len(self._macros)
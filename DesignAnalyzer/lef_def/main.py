@@ -1,8 +1,13 @@
 import sys
 import os
+import logging
 
 import re
 
+import numpy as np
+
+from PyQt5.QtWidgets import QProgressBar, QComboBox
+
 # Append the absolute path of ../src to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
@@ -14,24 +19,33 @@ from predicates import Predicates, PredicateBase
 
 from global_name_index import gname_index
 
-from design_data import DesignData
-
-from def_parser import DefParserImplement
-from lef_parser import LefParserImplement
+from workspace import WorkspaceManager
 
 
 class LefDefPredicate(PredicateBase):
-    def __init__(self, _defParserImplement, _lefParserImplement, design_data):
+    """Base of the LEF/DEF predicates; they always run on the active design workspace."""
+
+    def __init__(self, workspaces):
         super().__init__()
 
-        self.defParserImplement = _defParserImplement
-        self.lefParserImplement = _lefParserImplement
-        self.design_data = design_data
+        self.workspaces = workspaces
+
+    @property
+    def defParserImplement(self):
+        return self.workspaces.active.defParserImplement
+
+    @property
+    def lefParserImplement(self):
+        return self.workspaces.active.lefParserImplement
+
+    @property
+    def design_data(self):
+        return self.workspaces.active.design_data
 
 
 class GetViasForLayer(LefDefPredicate):
-    def __init__(self, _defParserImplement, _lefParserImplement, design_data):
-        super().__init__(_defParserImplement, _lefParserImplement, design_data)
+    def __init__(self, workspaces):
+        super().__init__(workspaces)
 
         self.args = {
             'layer': None,  # Layer name to search for vias
@@ -46,28 +60,28 @@ class GetViasForLayer(LefDefPredicate):
         return result
 
 class GetInstanceCoords(LefDefPredicate):
-    def __init__(self, _defParserImplement, _lefParserImplement, design_data):
-        super().__init__(_defParserImplement, _lefParserImplement, design_data)
+    def __init__(self, workspaces):
+        super().__init__(workspaces)
 
         self.args = {
             'name': None,  # Regular expression to match instance names
         }
 
-        # Ensure the design data is resolved before running this predicate
-        self.design_data.resolveCompToInst()
-
     def run(self):
+        # Resolves only if LEF or DEF changed since the last resolution.
+        self.design_data.ensure_instances()
+
         name_regex = self.args["name"]
 
         # all_inst = list(self.design_data.instData.instance_data)
     
         result = []
         compiled_regex = re.compile(name_regex)
-        components = self.defParserImplement.get_components()
-        for comp in components:
-            instance_name = gname_index.getName(comp.inst_name_id)
+        # Only resolved instances can be drawn.
+        inst_name_ids = list(self.design_data.instData.instance_data)
+        for inst_name_id, instance_name in zip(inst_name_ids, gname_index.get_names(inst_name_ids)):
             if compiled_regex.search(instance_name):
-                result.append(comp.inst_name_id)
+                result.append(inst_name_id)
 
         self.setOutputObject("inst", result)
         
@@ -75,10 +89,226 @@ class GetInstanceCoords(LefDefPredicate):
     
 
 
+class ConnectivityPredicate(LefDefPredicate):
+    """Base of the predicates over design_data.connectivity; outputs inst_name_ids as "inst"."""
+
+    def connectivity(self):
+        self.design_data.ensure_instances()
+        self.design_data.ensure_nets()
+        return self.design_data.connectivity
+
+    def instance_rows(self, connectivity, name_regex):
+        compiled_regex = re.compile(name_regex)
+        inst_name_ids = connectivity.inst_name_ids.tolist()
+        return [row for row, name in enumerate(gname_index.get_names(inst_name_ids))
+                if compiled_regex.search(name)]
+
+    def set_instances(self, connectivity, rows):
+        # Components whose macro is missing from LEF are in the graph but not placed.
+        inst_name_ids = connectivity.inst_name_ids[np.asarray(rows, dtype=np.int64)]
+        result = inst_name_ids[self.design_data.instData.instance_data.resolved(inst_name_ids)].tolist()
+        self.setOutputObject("inst", result)
+        return result
+
+    @staticmethod
+    def optional_int(value):
+        return int(value) if value not in (None, "") else None
+
+
+class GetNetFanout(ConnectivityPredicate):
+    def __init__(self, workspaces):
+        super().__init__(workspaces)
+
+        self.args = {
+            'net': None,  # Net name
+        }
+
+    def run(self):
+        connectivity = self.connectivity()
+        net_name = self.args["net"]
+        net = connectivity.net_row(gname_index.get_id(net_name)) if gname_index.has_name(net_name) else None
+        if net is None:
+            logging.warning(f"Net {net_name} not found.")
+            return self.set_instances(connectivity, [])
+        return self.set_instances(connectivity, connectivity.fanout(net))
+
+
+class GetFaninCone(ConnectivityPredicate):
+    def __init__(self, workspaces):
+        super().__init__(workspaces)
+
+        self.args = {
+            'name': None,       # Regular expression to match instance names
+            'depth': None,      # Levels to go back, all if empty
+        }
+
+    def run(self):
+        connectivity = self.connectivity()
+        rows = self.instance_rows(connectivity, self.args["name"])
+        cone = connectivity.fanin_cone(rows, depth=self.optional_int(self.args["depth"]))
+        return self.set_instances(connectivity, cone)
+
+
+class GetNeighbors(ConnectivityPredicate):
+    def __init__(self, workspaces):
+        super().__init__(workspaces)
+
+        self.args = {
+            'name': None,        # Regular expression to match instance names
+            'depth': None,       # Net hops, 1 if empty
+            'max_fanout': None,  # Skip nets with more pins (clock, reset), none if empty
+        }
+
+    def run(self):
+        connectivity = self.connectivity()
+        rows = self.instance_rows(connectivity, self.args["name"])
+        depth = self.optional_int(self.args["depth"]) or 1
+        found = connectivity.neighbors(rows, depth, self.optional_int(self.args["max_fanout"]))
+        return self.set_instances(connectivity, found)
+
+
+class SpatialPredicate(LefDefPredicate):
+    """Base of the predicates over the instance spatial index; outputs inst_name_ids as "inst"."""
+
+    def number(self, name, default=None):
+        value = self.args.get(name)
+        if value in (None, ""):
+            if default is None:
+                raise ValueError(f"Argument '{name}' is required.")
+            return default
+        return float(value)
+
+    def set_instances(self, inst_name_ids):
+        result = np.asarray(inst_name_ids).tolist()
+        self.setOutputObject("inst", result)
+        return result
+
+
+class GetInstancesInWindow(SpatialPredicate):
+    def __init__(self, workspaces):
+        super().__init__(workspaces)
+
+        self.args = {'x1': None, 'y1': None, 'x2': None, 'y2': None}    # Window in microns
+
+    def run(self):
+        window = [self.number(name) for name in ('x1', 'y1', 'x2', 'y2')]
+        return self.set_instances(self.design_data.instances_in_window(window))
+
+
+class GetInstancesAtPoint(SpatialPredicate):
+    def __init__(self, workspaces):
+        super().__init__(workspaces)
+
+        self.args = {'x': None, 'y': None}    # Point in microns
+
+    def run(self):
+        return self.set_instances(self.design_data.instances_at(self.number('x'), self.number('y')))
+
+
+class GetInstancesOverlappingRegion(SpatialPredicate):
+    def __init__(self, workspaces):
+        super().__init__(workspaces)
+
+        self.args = {
+            'region': None,  # DEF REGION name; empty for the placement blockages
+        }
+
+    def run(self):
+        rects = self.design_data.region_rects(self.args['region'])
+        if not len(rects):
+            logging.warning(f"No rectangles for region '{self.args['region'] or 'BLOCKAGES'}'.")
+        return self.set_instances(self.design_data.instances_overlapping(rects))
+
+
+class GetNearestInstances(SpatialPredicate):
+    def __init__(self, workspaces):
+        super().__init__(workspaces)
+
+        self.args = {'x': None, 'y': None, 'k': None}    # Point in microns, number of instances (1)
+
+    def run(self):
+        k = int(self.number('k', 1))
+        return self.set_instances(self.design_data.nearest_instances(self.number('x'), self.number('y'), k))
+
+
+class GetInstancesWithinDistance(SpatialPredicate):
+    def __init__(self, workspaces):
+        super().__init__(workspaces)
+
+        self.args = {'x': None, 'y': None, 'distance': None}    # Point and distance in microns
+
+    def run(self):
+        found = self.design_data.instances_within(self.number('x'), self.number('y'), self.number('distance'))
+        return self.set_instances(found)
+
+
+class GetModuleInstances(LefDefPredicate):
+    def __init__(self, workspaces):
+        super().__init__(workspaces)
+
+        self.args = {
+            'module': None,  # Hierarchical module path, e.g. u_core/u_alu
+        }
+
+    def run(self):
+        hierarchy = self.design_data.instance_hierarchy()
+        node = hierarchy.find(self.args["module"])
+        if node is None:
+            logging.warning(f"Module {self.args['module']} not found.")
+            result = []
+        else:
+            result = hierarchy.subtree_ids(node).tolist()
+
+        self.setOutputObject("inst", result)
+        return result
+
+
+class GetModuleStats(LefDefPredicate):
+    def __init__(self, workspaces):
+        super().__init__(workspaces)
+
+        self.args = {
+            'module': None,  # Hierarchical module path, the top level if empty
+            'depth': None,   # Levels of submodules to list, 1 if empty
+        }
+
+    def run(self):
+        depth = int(self.args["depth"]) if self.args["depth"] not in (None, "") else 1
+        stats = self.design_data.module_stats(self.args["module"] or "", depth)
+        if stats is None:
+            logging.warning(f"Module {self.args['module']} not found.")
+            stats = ([], [], [])
+        modules, counts, areas = stats
+
+        self.setOutputObject("module", modules)
+        self.setOutputObject("instances", counts)
+        self.setOutputObject("area", [round(area, 3) for area in areas])
+        return modules
+
+
+class GetModuleNets(LefDefPredicate):
+    def __init__(self, workspaces):
+        super().__init__(workspaces)
+
+        self.args = {
+            'module': None,  # Hierarchical module path
+        }
+
+    def run(self):
+        hierarchy = self.design_data.net_hierarchy()
+        node = hierarchy.find(self.args["module"])
+        if node is None:
+            logging.warning(f"Module {self.args['module']} not found.")
+            result = []
+        else:
+            result = gname_index.get_names(hierarchy.subtree_ids(node))
+
+        self.setOutputObject("net", result)
+        return result
+
+
 class LoadDesignToolItem(ToolBarItemAbstract):
-    def __init__(self, all_input_tabs,
-                    defParserImplement, lefParserImplement, designData,
-                    drawManager):
+    def __init__(self, all_input_tabs, workspaces, drawManager):
         super().__init__("Load Design")
 
         self.all_input_tabs = all_input_tabs
@@ -86,12 +316,26 @@ class LoadDesignToolItem(ToolBarItemAbstract):
         self.lefListWidget = self.all_input_tabs["LEF"].get_file_list_widget()
         self.defListWidget = self.all_input_tabs["DEF"].get_file_list_widget()
 
-        self.lefParserImplement = lefParserImplement
-        self.defParserImplement = defParserImplement
-
-        self.design_data = designData
+        self.workspaces = workspaces
         self.drawManager = drawManager
 
+        # Components are resolved once the LEF libraries and every DEF file are in.
+        self.lef_pending = False
+        self.def_pending = 0
+        self.load_cancelled = False
+
+        for workspace in self.workspaces.workspaces.values():
+            self.slotWorkspaceCreated(workspace)
+        self.workspaces.workspace_created_signal.connect(self.slotWorkspaceCreated)
+        self.workspaces.active_changed_signal.connect(self.slotActiveChanged)
+
+    def slotWorkspaceCreated(self, workspace):
+        workspace.lefParserImplement.lef_parser_finished_signal.connect(self.slotLefParserFinished)
+        workspace.lefParserImplement.lef_parser_cancelled_signal.connect(self.slotLoadCancelled)
+        workspace.defParserImplement.def_parser_finished_signal.connect(self.slotDefParserFinished)
+        workspace.defParserImplement.def_parser_cancelled_signal.connect(self.slotLoadCancelled)
+        workspace.design_data.instances_ready_signal.connect(self.slotInstancesReady)
+
     def onClick(self):
         self.loadLefDef()
         
@@ -101,21 +345,154 @@ class LoadDesignToolItem(ToolBarItemAbstract):
         lef_list = [self.lefListWidget.item(i).text() for i in range(self.lefListWidget.count())]
         def_list = [self.defListWidget.item(i).text() for i in range(self.defListWidget.count())]
 
-        for l in lef_list:
-            self.lefParserImplement.parse(l)
+        # Every load goes to a workspace of its own, named after the first DEF file.
+        first_def = next((d for d in def_list if d), "")
+        design_name = os.path.splitext(os.path.basename(first_def))[0] or "design"
+        workspace = self.workspaces.create(design_name)
+        if workspace is None:
+            return
+
+        self.lef_pending = True
+        self.def_pending = len([d for d in def_list if d])
+        self.load_cancelled = False
+
+        workspace.lefParserImplement.parse_all(lef_list)
 
         for d in def_list:
-            self.defParserImplement.parse(d)
+            workspace.defParserImplement.parse(d)
 
-        self.defParserImplement.def_parser_finished_signal.connect(self.slotDefParserFinished)
+    def slotLefParserFinished(self, message):
+        self.lef_pending = False
+        self.resolveWhenLoaded()
 
     def slotDefParserFinished(self, message):
-        self.design_data.resolveCompToInst()
-        
-        self.drawManager.load_design_instances(self.design_data.inst_rtree, 
-                            self.design_data.instData)
+        self.def_pending -= 1
+        self.resolveWhenLoaded()
+
+    def slotLoadCancelled(self, message):
+        self.load_cancelled = True
+
+    def resolveWhenLoaded(self):
+        if self.lef_pending or self.def_pending > 0:
+            return
+        if self.load_cancelled:
+            logging.info("Design load cancelled, instances not resolved.")
+            return
+
+        design_data = self.workspaces.active.design_data
+        design_data.ensure_instances()
+        design_data.ensure_nets()
+
+    def slotInstancesReady(self, generation):
+        self.drawDesign(self.workspaces.active)
+
+    def slotActiveChanged(self, workspace):
+        self.drawDesign(workspace)
+
+    def drawDesign(self, workspace):
+        design_data = workspace.design_data
+        if design_data.inst_index is None:
+            self.drawManager.clear()
+            return
+        self.drawManager.load_design_instances(design_data.inst_index, 
+                            design_data.instData)
         
 
+class DensityMapToolItem(ToolBarItemAbstract):
+    """Toggles the placement density heat map over the layout."""
+
+    def __init__(self, workspaces, drawManager, resolution=256):
+        super().__init__("Density Map")
+
+        self.workspaces = workspaces
+        self.drawManager = drawManager
+        self.resolution = resolution
+        self.shown = False
+
+        for workspace in self.workspaces.workspaces.values():
+            self.slotWorkspaceCreated(workspace)
+        self.workspaces.workspace_created_signal.connect(self.slotWorkspaceCreated)
+        self.workspaces.active_changed_signal.connect(self.slotActiveChanged)
+
+    def slotWorkspaceCreated(self, workspace):
+        workspace.design_data.instances_ready_signal.connect(self.slotInstancesReady)
+
+    def onClick(self):
+        self.shown = not self.shown
+        if self.shown:
+            self.draw()
+        else:
+            self.drawManager.hide_density()
+
+    def slotInstancesReady(self, generation):
+        if self.shown:
+            self.draw()
+
+    def slotActiveChanged(self, workspace):
+        if not self.shown:
+            return
+        if workspace.design_data.inst_index is None:
+            self.drawManager.hide_density()
+        else:
+            self.draw()
+
+    def draw(self):
+        density_map = self.workspaces.active.design_data.density(self.resolution)
+        self.drawManager.draw_density(density_map)
+        logging.info(f"Density map {density_map.nx}x{density_map.ny}, peak utilization "
+                     f"{density_map.utilization.max():.2f}")
+
+
+class CancelLoadToolItem(ToolBarItemAbstract):
+    def __init__(self, workspaces):
+        super().__init__("Cancel Load")
+
+        self.workspaces = workspaces
+
+    def onClick(self):
+        logging.info("Cancelling LEF/DEF load...")
+        self.workspaces.active.lefParserImplement.cancel()
+        self.workspaces.active.defParserImplement.cancel()
+
+
+class UnloadDesignToolItem(ToolBarItemAbstract):
+    """Unloads the active design and frees its memory."""
+
+    def __init__(self, workspaces):
+        super().__init__("Unload Design")
+
+        self.workspaces = workspaces
+
+    def onClick(self):
+        self.workspaces.unload(self.workspaces.active.name)
+
+
+class DesignSelector:
+    """Toolbar combo box of the resident designs; picking one makes it active."""
+
+    def __init__(self, workspaces):
+        self.workspaces = workspaces
+
+        self.combo = QComboBox()
+        self.combo.setMinimumContentsLength(16)
+        self.combo.activated.connect(self.slotActivated)
+
+        self.workspaces.workspaces_changed_signal.connect(self.refresh)
+        self.workspaces.active_changed_signal.connect(self.refresh)
+        self.refresh()
+
+    def refresh(self, *args):
+        self.combo.blockSignals(True)
+        self.combo.clear()
+        self.combo.addItems(self.workspaces.names())
+        self.combo.setCurrentText(self.workspaces.active.name)
+        self.combo.blockSignals(False)
+
+    def slotActivated(self, index):
+        if not self.workspaces.activate(self.combo.itemText(index)):
+            self.refresh()
+
+
 class LefDefUI(MainUI):
     def __init__(self):
         super().__init__()
@@ -125,31 +502,121 @@ class LefDefUI(MainUI):
         self.bottomArea.create_input_tab("LEF")
         self.bottomArea.create_input_tab("DEF")
 
-        self.defParserImplement = DefParserImplement()
-        self.lefParserImplement = LefParserImplement()
-
-        self.design_data = DesignData(self.lefParserImplement, self.defParserImplement)
+        # One workspace per loaded design; predicates and tools use the active one.
+        self.workspaces = WorkspaceManager()
 
         self.loadDesignToolbarItem = LoadDesignToolItem(self.bottomArea.all_input_tabs,
-                                self.defParserImplement, self.lefParserImplement,
-                                self.design_data,
+                                self.workspaces,
                                 self.drawManager)
         
         self.menu.createToolbarItem(self.loadDesignToolbarItem)
+
+        self.cancelLoadToolbarItem = CancelLoadToolItem(self.workspaces)
+        self.menu.createToolbarItem(self.cancelLoadToolbarItem)
+
+        self.densityMapToolbarItem = DensityMapToolItem(self.workspaces, self.drawManager)
+        self.menu.createToolbarItem(self.densityMapToolbarItem)
+
+        self.designSelector = DesignSelector(self.workspaces)
+        self.menu.toolbar.addWidget(self.designSelector.combo)
+
+        self.unloadDesignToolbarItem = UnloadDesignToolItem(self.workspaces)
+        self.menu.createToolbarItem(self.unloadDesignToolbarItem)
+
+        self.workspaces.active_changed_signal.connect(self.slotActiveDesignChanged)
+
+        self.create_load_status()
         
         self.registerLefDefPredicates()
         
 
+    def create_load_status(self):
+        self.loadProgressBar = QProgressBar()
+        self.loadProgressBar.setRange(0, 100)
+        self.loadProgressBar.setMaximumWidth(200)
+        self.loadProgressBar.hide()
+        self.statusBar().addPermanentWidget(self.loadProgressBar)
+
+        for workspace in self.workspaces.workspaces.values():
+            self.connectLoadStatus(workspace)
+        self.workspaces.workspace_created_signal.connect(self.connectLoadStatus)
+
+    def connectLoadStatus(self, workspace):
+        workspace.defParserImplement.def_parser_progress_signal.connect(self.slotDefParserProgress)
+        workspace.defParserImplement.def_parser_finished_signal.connect(self.slotDefParserDone)
+        workspace.defParserImplement.def_parser_cancelled_signal.connect(self.slotDefParserDone)
+        workspace.lefParserImplement.lef_parser_finished_signal.connect(self.slotLefParserDone)
+        workspace.lefParserImplement.lef_parser_cancelled_signal.connect(self.slotLefParserDone)
+
+    def slotActiveDesignChanged(self, workspace):
+        self.setWindowTitle(f"LefDef UI - {workspace.name}")
+
+    def slotDefParserProgress(self, info):
+        total = max(info["total_bytes"], 1)
+        self.loadProgressBar.show()
+        self.loadProgressBar.setValue(int(100 * info["bytes"] / total))
+
+        self.statusBar().showMessage(
+            f"{os.path.basename(info['file_path'])}: {info['section'] or ''}  "
+            f"{info['bytes'] / 2**20:.0f} / {total / 2**20:.0f} MB  "
+            f"{info['records_per_sec']:.0f} records/s")
+
+    def slotDefParserDone(self, message):
+        self.loadProgressBar.hide()
+        self.statusBar().showMessage(message, 5000)
+
+    def slotLefParserDone(self, message):
+        self.statusBar().showMessage(message, 5000)
+        
+
     def registerLefDefPredicates(self):
 
-        viaObj = GetViasForLayer(self.defParserImplement, self.lefParserImplement,
-                                 self.design_data)
+        viaObj = GetViasForLayer(self.workspaces)
         self.all_predicates.addPredicate("via - search based on layer etc", ["layer"], viaObj)
 
-        instObj = GetInstanceCoords(self.defParserImplement, self.lefParserImplement,
-                                    self.design_data)
+        instObj = GetInstanceCoords(self.workspaces)
         self.all_predicates.addPredicate("instances - search by name regexp, location etc", ["name"], instObj)
 
+        fanoutObj = GetNetFanout(self.workspaces)
+        self.all_predicates.addPredicate("fanout - sink instances of a net", ["net"], fanoutObj)
+
+        faninObj = GetFaninCone(self.workspaces)
+        self.all_predicates.addPredicate("fanin cone - instances driving instances matching a name regexp",
+                                         ["name", "depth"], faninObj)
+
+        neighborsObj = GetNeighbors(self.workspaces)
+        self.all_predicates.addPredicate("neighbors - instances connected within depth net hops",
+                                         ["name", "depth", "max_fanout"], neighborsObj)
+
+        windowObj = GetInstancesInWindow(self.workspaces)
+        self.all_predicates.addPredicate("instances - in a window x1 y1 x2 y2 (microns)",
+                                         ["x1", "y1", "x2", "y2"], windowObj)
+
+        pointObj = GetInstancesAtPoint(self.workspaces)
+        self.all_predicates.addPredicate("instances - at a point x y (microns)", ["x", "y"], pointObj)
+
+        regionObj = GetInstancesOverlappingRegion(self.workspaces)
+        self.all_predicates.addPredicate("instances - overlapping a DEF region, or the placement blockages",
+                                         ["region"], regionObj)
+
+        nearestObj = GetNearestInstances(self.workspaces)
+        self.all_predicates.addPredicate("instances - k nearest to a point x y (microns)", ["x", "y", "k"],
+                                         nearestObj)
+
+        withinObj = GetInstancesWithinDistance(self.workspaces)
+        self.all_predicates.addPredicate("instances - within a distance of a point x y (microns)",
+                                         ["x", "y", "distance"], withinObj)
+
+        moduleObj = GetModuleInstances(self.workspaces)
+        self.all_predicates.addPredicate("hierarchy - instances under a module", ["module"], moduleObj)
+
+        moduleStatsObj = GetModuleStats(self.workspaces)
+        self.all_predicates.addPredicate("hierarchy - instance count and area per submodule",
+                                         ["module", "depth"], moduleStatsObj)
+
+        moduleNetsObj = GetModuleNets(self.workspaces)
+        self.all_predicates.addPredicate("hierarchy - nets under a module", ["module"], moduleNetsObj)
+
 
 
 if __name__ == "__main__":
@@ -0,0 +1,166 @@
+import logging
+import os
+import threading
+import time
+
+import psutil
+
+
+class ParseCancelled(Exception):
+    """Raised inside a parse when its CancelToken has been cancelled."""
+
+
+class CancelToken:
+    """Thread-safe cancellation flag shared between the GUI and a parse worker."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise ParseCancelled()
+
+
+def abandon_pool(pool):
+    """Stop a ProcessPoolExecutor without waiting for the tasks in flight.
+
+    Queued tasks are cancelled and the worker processes terminated, so a
+    cancel returns at once instead of waiting for the largest task (which
+    shutdown(wait=True), e.g. leaving a 'with' block, would do).
+    """
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+class SectionStats:
+    __slots__ = ('seconds', 'rss_delta', 'records')
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.rss_delta = 0
+        self.records = 0
+
+
+class ParseProgress:
+    """Section timing, throttled progress reports and cancellation for one file load.
+
+    The parser calls enter(section) when a section starts and record() once
+    per record. Every RECORD_STRIDE records the cancel token is checked and,
+    at most once per `interval` seconds, `report(dict)` is called with the
+    bytes consumed (from `position()`), records/s and the current section.
+    Time and RSS growth are accumulated per section name for summary().
+    """
+    RECORD_STRIDE = 256
+
+    def __init__(self, total_bytes=0, position=None, report=None, cancel_token=None, interval=0.25):
+        self.total_bytes = total_bytes
+        self.position = position or (lambda: 0)
+        self.report = report
+        self.cancel_token = cancel_token
+        self.interval = interval
+
+        self.sections = {}
+        self.records = 0
+
+        self._process = psutil.Process(os.getpid())
+        self._start = time.perf_counter()
+        self._last_report = self._start
+        self._last_records = 0
+
+        self._section = None
+        self._section_start = self._start
+        self._section_rss = self._process.memory_info().rss
+        self._section_records = 0
+
+    # Parser hooks
+    def enter(self, section):
+        """Close the running section and start accounting to `section`."""
+        if section == self._section:
+            return
+        self._close_section()
+        self._section = section
+        self.check_cancelled()
+        self._emit(force=True)
+
+    def record(self, count=1):
+        self.records += count
+        if self.records - self._last_records >= self.RECORD_STRIDE:
+            self._last_records = self.records
+            self.check_cancelled()
+            self._emit()
+
+    def add(self, section, seconds, records=0, rss_delta=0):
+        """Account work done elsewhere (e.g. in a worker process) to a section."""
+        stats = self.sections.setdefault(section, SectionStats())
+        stats.seconds += seconds
+        stats.records += records
+        stats.rss_delta += rss_delta
+        self.records += records
+        self._section_records += records    # not part of the running section
+        self._emit()
+
+    def check_cancelled(self):
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+
+    def finish(self):
+        self._close_section()
+        self._section = None
+        self._emit(force=True)
+
+    # Reporting
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def snapshot(self) -> dict:
+        elapsed = self.elapsed()
+        return {
+            "section": self._section,
+            "bytes": self.position(),
+            "total_bytes": self.total_bytes,
+            "records": self.records,
+            "records_per_sec": self.records / elapsed if elapsed > 0 else 0.0,
+            "elapsed": elapsed,
+        }
+
+    def summary(self) -> list:
+        """[(section, seconds, rss_delta_bytes, records)] in the order sections were first seen."""
+        return [(name, s.seconds, s.rss_delta, s.records) for name, s in self.sections.items()]
+
+    def _close_section(self):
+        now = time.perf_counter()
+        rss = self._process.memory_info().rss
+        if self._section is not None:
+            stats = self.sections.setdefault(self._section, SectionStats())
+            stats.seconds += now - self._section_start
+            stats.rss_delta += rss - self._section_rss
+            stats.records += self.records - self._section_records
+        self._section_start = now
+        self._section_rss = rss
+        self._section_records = self.records
+
+    def _emit(self, force=False):
+        if self.report is None:
+            return
+        now = time.perf_counter()
+        if force or now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report(self.snapshot())
+
+
+def log_section_summary(title, summary, elapsed):
+    """Log a ParseProgress.summary() one section per line (shows up in the Logs tab)."""
+    logging.info(f"{title}: {elapsed:.2f} s")
+    for name, seconds, rss_delta, records in summary:
+        rate = f", {records / seconds:.0f} records/s" if records and seconds > 0 else ""
+        logging.info(f"    {name}: {seconds:.2f} s, RSS {rss_delta / 2**20:+.1f} MB, "
+                     f"{records} records{rate}")
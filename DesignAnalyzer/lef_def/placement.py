@@ -0,0 +1,163 @@
+import numpy as np
+
+from component_table import ORIENTATIONS
+
+########################################################################
+#
+# Placement of macro geometry into die coordinates.
+#
+# A DEF orientation maps macro coordinates (x, y), with the macro's lower
+# left corner at (0, 0), to
+#
+#     (x', y') = A @ (x, y) + B @ (width, height)
+#
+# so that the placed macro again has its lower left corner at (0, 0) and the
+# DEF location is added on top. A and B per orientation code are the
+# tables below (rows follow component_table.ORIENTATIONS); OpenDB's
+# R0/R90/R180/R270/MY/MXR90/MX/MYR90 for N/W/S/E/FN/FW/FS/FE.
+#
+########################################################################
+
+_ORIENT_MATRIX = {
+    "N":  ((1, 0), (0, 1)),
+    "W":  ((0, -1), (1, 0)),
+    "S":  ((-1, 0), (0, -1)),
+    "E":  ((0, 1), (-1, 0)),
+    "FN": ((-1, 0), (0, 1)),
+    "FW": ((0, 1), (1, 0)),
+    "FS": ((1, 0), (0, -1)),
+    "FE": ((0, -1), (-1, 0)),
+}
+
+# Shift of the rotated box back to the first quadrant, as a matrix on (width, height).
+_ORIENT_SHIFT = {
+    "N":  ((0, 0), (0, 0)),
+    "W":  ((0, 1), (0, 0)),
+    "S":  ((1, 0), (0, 1)),
+    "E":  ((0, 0), (1, 0)),
+    "FN": ((1, 0), (0, 0)),
+    "FW": ((0, 0), (0, 0)),
+    "FS": ((0, 0), (0, 1)),
+    "FE": ((0, 1), (1, 0)),
+}
+
+ORIENT_MATRICES = np.array([_ORIENT_MATRIX[o] for o in ORIENTATIONS], dtype=np.float64)
+ORIENT_SHIFTS = np.array([_ORIENT_SHIFT[o] for o in ORIENTATIONS], dtype=np.float64)
+
+
+def _rect_matrix(matrix):
+    """4x4 map of (x1, y1, x2, y2) under a signed axis permutation, keeping x1 <= x2, y1 <= y2."""
+    rect = np.zeros((4, 4))
+    for i in range(2):
+        j = int(np.flatnonzero(matrix[i])[0])
+        if matrix[i][j] > 0:
+            rect[i, j], rect[i + 2, j + 2] = 1, 1
+        else:
+            rect[i, j + 2], rect[i + 2, j] = -1, -1
+    return rect
+
+# Every DEF orientation is a signed axis permutation, so a rect maps to a rect
+# by one 4x4 matrix (no corner min/max needed).
+ORIENT_RECT_MATRICES = np.array([_rect_matrix(m) for m in ORIENT_MATRICES])
+
+
+def transform_rects(rects, size, locations, orient_ids, origin=(0.0, 0.0)):
+    """Place the rects of one macro for every instance of it in one vectorized pass.
+
+    rects: (n, 4) x1, y1, x2, y2 in LEF macro coordinates; `origin` is the
+    macro ORIGIN, so rects + origin puts the macro's lower left at (0, 0).
+    size: macro (width, height). locations: (N, 2) instance locations in
+    the same units as rects. orient_ids: (N,) orientation codes.
+
+    Returns (N, n, 4) normalized (x1 <= x2, y1 <= y2) rects in die
+    coordinates, float64.
+    """
+    rects = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+    locations = np.asarray(locations, dtype=np.float64).reshape(-1, 2)
+    orient_ids = np.asarray(orient_ids, dtype=np.intp)
+
+    shifted = rects + np.tile(np.asarray(origin, dtype=np.float64), 2)
+    offsets = ORIENT_SHIFTS[orient_ids] @ np.asarray(size, dtype=np.float64) + locations   # (N, 2)
+    offsets = np.tile(offsets, 2)[:, None, :]
+
+    placed = np.empty((len(orient_ids), len(rects), 4))
+    orients = np.unique(orient_ids)
+    if len(orients) == 1:
+        placed[:] = (shifted @ ORIENT_RECT_MATRICES[orients[0]].T)[None] + offsets
+        return placed
+    for orient in orients:
+        mask = orient_ids == orient
+        placed[mask] = (shifted @ ORIENT_RECT_MATRICES[orient].T)[None] + offsets[mask]
+    return placed
+
+
+# W, E, FW, FE turn the macro by 90 degrees, so width and height swap.
+ORIENT_TURNED = np.abs(ORIENT_MATRICES[:, 0, 1]) > 0
+
+
+def placed_size(size, orient_ids):
+    """(N, 2) width and height of a macro placed with each orientation.
+
+    `size` is one (width, height) or an (N, 2) array, one per orientation.
+    """
+    orient_ids = np.asarray(orient_ids, dtype=np.intp)
+    size = np.broadcast_to(np.asarray(size, dtype=np.float64), (len(orient_ids), 2))
+    return np.where(ORIENT_TURNED[orient_ids][:, None], size[:, ::-1], size)
+
+
+def instance_bboxes(locations, sizes, orient_ids):
+    """(N, 4) die bboxes of placed instances, all orientations in one pass.
+
+    locations: (N, 2) DEF locations; sizes: (N, 2) macro width and height
+    in the same units; orient_ids: (N,) orientation codes. The macro
+    boundary is (0, 0, width, height) once its ORIGIN is applied, and every
+    orientation shifts its rotated box back to the first quadrant, so the
+    bbox is the location plus the placed size; transform_rects places the
+    macro's own geometry the same way.
+    """
+    locations = np.asarray(locations, dtype=np.float64).reshape(-1, 2)
+    return np.hstack((locations, locations + placed_size(sizes, orient_ids)))
+
+
+def place_macro_shapes(macro, locations, orient_ids, rows=None):
+    """Place a macro's MacroShapes for all its instances.
+
+    `rows` optionally selects shape rows (e.g. shapes.pin_rows(p) or a layer
+    mask). Returns ((N, n, 4) rects, the MacroShapes); row r of every
+    instance has shapes.pin_ids[r] and shapes.layer_ids[r].
+    """
+    shapes = macro.shapes
+    rects = shapes.rects if rows is None else shapes.rects[rows]
+    origin = macro.origin[:2] if len(macro.origin) >= 2 else (0.0, 0.0)
+    size = macro.size[:2] if len(macro.size) >= 2 else (0.0, 0.0)
+    return transform_rects(rects, size, locations, orient_ids, origin), shapes
+
+
+def dbu_to_microns(values, design_units):
+    """DEF database units to microns, one multiply over the whole array."""
+    return np.asarray(values, dtype=np.float64) * (1.0 / float(design_units))
+
+
+def place_component_shapes(components, registry, design_units):
+    """Place the pin and OBS shapes of every component, one transform per macro.
+
+    Yields (cell_name_id, component row indices, placed (N, n, 4) rects in
+    microns, MacroShapes) for each macro that is used and defined.
+    """
+    cell_name_ids = components.cell_name_ids
+    locations = dbu_to_microns(components.locations, design_units)
+    orient_ids = components.orient_ids
+
+    order = np.argsort(cell_name_ids, kind='stable')
+    sorted_ids = cell_name_ids[order]
+    starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]]) if len(order) else []
+    ends = list(starts[1:]) + [len(order)] if len(order) else []
+
+    for start, end in zip(starts, ends):
+        cell_name_id = int(sorted_ids[start])
+        macro = registry.get_by_id(cell_name_id)
+        if macro is None:
+            continue
+        rows = order[start:end]
+        placed, shapes = place_macro_shapes(macro, locations[rows], orient_ids[rows])
+        yield cell_name_id, rows, placed, shapes
@@ -0,0 +1,120 @@
+import numpy as np
+
+from array import array
+
+from column_table import ColumnTable
+
+
+class WireTable(ColumnTable):
+    """Centre-line wire segments; width 0 means the layer's default width."""
+    COLUMNS = (
+        ("x1", np.int32), ("y1", np.int32),
+        ("x2", np.int32), ("y2", np.int32),
+        ("width", np.int32),
+        ("net_id", np.int32),
+        ("layer_id", np.int32),
+    )
+    NAME_ID_COLUMNS = ("net_id", "layer_id")
+
+
+class ViaInstanceTable(ColumnTable):
+    COLUMNS = (
+        ("x", np.int32), ("y", np.int32),
+        ("via_id", np.int32),
+        ("net_id", np.int32),
+    )
+    NAME_ID_COLUMNS = ("via_id", "net_id")
+
+
+class RouteRectTable(ColumnTable):
+    """RECT / POLYGON shapes of a route (polygons are kept as their bounding box)."""
+    COLUMNS = (
+        ("x1", np.int32), ("y1", np.int32),
+        ("x2", np.int32), ("y2", np.int32),
+        ("net_id", np.int32),
+        ("layer_id", np.int32),
+    )
+    NAME_ID_COLUMNS = ("net_id", "layer_id")
+
+
+class NetRouting:
+    """Routing geometry of a NETS or SPECIALNETS section as flat arrays.
+
+    Net i of the section owns wires[wire_offsets[i]:wire_offsets[i+1]], and
+    likewise for vias and rects, so per-net results are segment reductions
+    and per-layer results are a bincount over layer_id.
+    """
+
+    def __init__(self):
+        self.wires = WireTable()
+        self.vias = ViaInstanceTable()
+        self.rects = RouteRectTable()
+
+        self.net_ids = array('i')
+        self.wire_offsets = array('q', [0])
+        self.via_offsets = array('q', [0])
+        self.rect_offsets = array('q', [0])
+
+    def end_net(self, net_id):
+        """Close the current net: everything appended since the last call belongs to it."""
+        self.net_ids.append(net_id)
+        self.wire_offsets.append(len(self.wires))
+        self.via_offsets.append(len(self.vias))
+        self.rect_offsets.append(len(self.rects))
+
+    def __len__(self):
+        return len(self.net_ids)
+
+    def extend(self, other):
+        for offsets, other_offsets, table in ((self.wire_offsets, other.wire_offsets, self.wires),
+                                              (self.via_offsets, other.via_offsets, self.vias),
+                                              (self.rect_offsets, other.rect_offsets, self.rects)):
+            base = len(table)
+            offsets.extend(base + o for o in other_offsets[1:])
+
+        self.wires.extend(other.wires)
+        self.vias.extend(other.vias)
+        self.rects.extend(other.rects)
+        self.net_ids.extend(other.net_ids)
+
+    def remap_ids(self, remap):
+        self.wires.remap_ids(remap)
+        self.vias.remap_ids(remap)
+        self.rects.remap_ids(remap)
+        self.net_ids = array('i', (int(remap[i]) for i in self.net_ids))
+
+    def name_ids(self):
+        """Sorted unique name ids of the nets, layers and vias."""
+        return np.unique(np.concatenate((self.wires.name_ids(), self.vias.name_ids(), self.rects.name_ids(),
+                                         np.frombuffer(self.net_ids, dtype=np.int32).astype(np.int64))))
+
+    # Vectorized queries
+    def net_wires(self, net_index):
+        start, end = self.wire_offsets[net_index], self.wire_offsets[net_index + 1]
+        return {name: column[start:end] for name, column in self.wires.columns().items()}
+
+    def segment_lengths(self) -> np.ndarray:
+        """Manhattan length of every wire segment, in database units."""
+        w = self.wires.columns()
+        return (np.abs(w["x2"].astype(np.int64) - w["x1"])
+                + np.abs(w["y2"].astype(np.int64) - w["y1"]))
+
+    def wirelength_per_net(self) -> np.ndarray:
+        counts = np.diff(np.array(self.wire_offsets, dtype=np.int64))
+        owner = np.repeat(np.arange(len(self), dtype=np.int64), counts)
+        return np.bincount(owner, weights=self.segment_lengths(), minlength=len(self))
+
+    def wirelength_per_layer(self):
+        """Return (layer_ids, total_length) arrays."""
+        layer_ids, inverse = np.unique(self.wires.column("layer_id"), return_inverse=True)
+        return layer_ids, np.bincount(inverse, weights=self.segment_lengths(), minlength=len(layer_ids))
+
+    def wires_by_layer(self):
+        """Map layer_id -> column dict of that layer's segments (stable within a layer)."""
+        columns = self.wires.columns()
+        order = np.argsort(columns["layer_id"], kind='stable')
+        layer_ids, starts = np.unique(columns["layer_id"][order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+
+        return {int(layer_id): {name: column[order[start:end]] for name, column in columns.items()}
+                for layer_id, start, end in zip(layer_ids, starts, ends)}
@@ -0,0 +1,303 @@
+import logging
+import os
+
+import numpy as np
+from rtree import index
+
+########################################################################
+#
+# Spatial indexes over (N, 4) bboxes (x1, y1, x2, y2) with integer ids.
+#
+# Every backend is static (built once from arrays) and answers a window
+# query with a NumPy id array, touching boxes included as in rtree:
+#
+#   RTreeIndex    libspatialindex, bulk loaded (STR). Good all-rounder.
+#   GridIndex     uniform bins, each box filed under the bin of its lower
+#                 left corner. Best for near-uniform standard cell rows.
+#   HilbertIndex  packed R-tree: boxes sorted along a Hilbert curve and
+#                 grouped bottom-up into fixed-size nodes, walked one level
+#                 at a time with NumPy.
+#
+# SPATIAL_INDEX=rtree|grid|hilbert selects the backend build_spatial_index
+# uses (default rtree). benchmarks/bench_spatial_index.py times all three
+# on a design and prints which one to pick.
+#
+########################################################################
+
+
+class SpatialIndex:
+    """Interface of the static spatial indexes."""
+
+    name = None
+
+    def query(self, window) -> np.ndarray:
+        """Ids of the boxes intersecting window (x1, y1, x2, y2)."""
+        raise NotImplementedError
+
+    def get_bounds(self):
+        """[x1, y1, x2, y2] around all boxes, as rtree's Index.get_bounds()."""
+        raise NotImplementedError
+
+    def intersection(self, window):
+        """rtree-style alias of query()."""
+        return self.query(window)
+
+    def boxes(self, ids):
+        """(n, 4) boxes of the given ids."""
+        if getattr(self, "_rows", None) is None:
+            self._rows = np.full(int(self.ids.max()) + 1 if len(self.ids) else 0, -1, dtype=np.int64)
+            self._rows[self.ids] = np.arange(len(self.ids))
+        return self.bboxes[self._rows[np.asarray(ids, dtype=np.int64)]]
+
+    def within_distance(self, point, distance):
+        """Ids of the boxes at most `distance` from point (x, y); 0 inside a box."""
+        x, y = point
+        ids = self.query((x - distance, y - distance, x + distance, y + distance))
+        return ids[box_distances(self.boxes(ids), x, y) <= distance]
+
+    def nearest(self, point, k=1):
+        """Ids of the k boxes nearest to point (x, y), nearest first (ties by id).
+
+        Searches a square window around the point that doubles until it holds
+        k boxes within its half width, so only the neighbourhood is tested.
+        """
+        if k <= 0 or not len(self):
+            return np.zeros(0, dtype=np.int64)
+        x, y = point
+        x1, y1, x2, y2 = self.get_bounds()
+        reach = max(abs(x - x1), abs(x - x2), abs(y - y1), abs(y - y2), 1e-9)
+        radius = max(np.sqrt(max((x2 - x1) * (y2 - y1), 1e-18) * k / len(self)), 1e-9)
+        while True:
+            ids = self.query((x - radius, y - radius, x + radius, y + radius))
+            distances = box_distances(self.boxes(ids), x, y)
+            inside = distances <= radius
+            if np.count_nonzero(inside) >= k or radius >= 2 * reach:
+                order = np.lexsort((ids[inside], distances[inside]))[:k]
+                return ids[inside][order]
+            radius *= 2
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+def box_distances(bboxes, x, y):
+    """Euclidean distance from (x, y) to each box, 0 for the boxes containing it."""
+    dx = np.maximum(np.maximum(bboxes[:, 0] - x, x - bboxes[:, 2]), 0.0)
+    dy = np.maximum(np.maximum(bboxes[:, 1] - y, y - bboxes[:, 3]), 0.0)
+    return np.hypot(dx, dy)
+
+
+class _ArrayIndex(SpatialIndex):
+    """Base of the NumPy backends: keeps the ids and boxes for the exact test."""
+
+    def __init__(self, ids, bboxes):
+        self.ids = np.ascontiguousarray(ids, dtype=np.int64)
+        self.bboxes = np.ascontiguousarray(bboxes, dtype=np.float64).reshape(-1, 4)
+
+    def get_bounds(self):
+        if not len(self.bboxes):
+            return [np.inf, np.inf, -np.inf, -np.inf]
+        return [float(self.bboxes[:, 0].min()), float(self.bboxes[:, 1].min()),
+                float(self.bboxes[:, 2].max()), float(self.bboxes[:, 3].max())]
+
+    def _filter(self, rows, window):
+        """Ids of the candidate rows whose box really intersects the window."""
+        x1, y1, x2, y2 = window
+        boxes = self.bboxes[rows]
+        hit = (boxes[:, 0] <= x2) & (boxes[:, 2] >= x1) & (boxes[:, 1] <= y2) & (boxes[:, 3] >= y1)
+        return self.ids[rows[hit]]
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class RTreeIndex(SpatialIndex):
+    """libspatialindex R-tree, bulk loaded."""
+
+    name = "rtree"
+
+    def __init__(self, ids, bboxes):
+        self.ids = np.ascontiguousarray(ids, dtype=np.int64)
+        self.bboxes = np.ascontiguousarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        self.rtree = bulk_load_rtree(self.ids, self.bboxes)
+
+    def query(self, window):
+        if hasattr(self.rtree, "intersection_v"):
+            x1, y1, x2, y2 = window
+            ids, _ = self.rtree.intersection_v(np.array([[x1, y1]], dtype=np.float64),
+                                               np.array([[x2, y2]], dtype=np.float64))
+            return ids.astype(np.int64, copy=False)
+        return np.fromiter(self.rtree.intersection(window), dtype=np.int64)
+
+    def get_bounds(self):
+        return self.rtree.get_bounds()
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class GridIndex(_ArrayIndex):
+    """Uniform bins over the bounding box, in CSR form.
+
+    A box is filed under the bin of its lower left corner only, so it is
+    stored once. Boxes up to one bin wide and high are found by widening the
+    query by one bin to the left and below; larger boxes (macros, blocks)
+    are kept in a separate list that every query tests. Bins are ordered
+    row by row, so the candidates of a query are one contiguous slice per
+    bin row.
+    """
+
+    name = "grid"
+
+    def __init__(self, ids, bboxes, bin_size=None, per_bin=4):
+        super().__init__(ids, bboxes)
+        boxes = self.bboxes
+        count = len(boxes)
+        bounds = self.get_bounds() if count else [0.0, 0.0, 1.0, 1.0]
+        self.origin = np.array(bounds[:2])
+
+        if bin_size is None:
+            # Enough bins for about per_bin boxes each, but not smaller than
+            # a typical cell, so most boxes fit in one bin.
+            area = max((bounds[2] - bounds[0]) * (bounds[3] - bounds[1]), 1e-12)
+            typical = np.median(np.maximum(boxes[:, 2:] - boxes[:, :2], 0.0), axis=0).max() if count else 1.0
+            bin_size = max(np.sqrt(area * per_bin / max(count, 1)), typical, 1e-9)
+        self.bin_size = float(bin_size)
+
+        self.nx = max(int(np.ceil((bounds[2] - bounds[0]) / self.bin_size)), 1)
+        self.ny = max(int(np.ceil((bounds[3] - bounds[1]) / self.bin_size)), 1)
+
+        extent = boxes[:, 2:] - boxes[:, :2]
+        large = (extent > self.bin_size).any(axis=1)
+        self.large_rows = np.flatnonzero(large)
+
+        small_rows = np.flatnonzero(~large)
+        ix, iy = self._bin_of(boxes[small_rows, 0], boxes[small_rows, 1])
+        bins = iy * self.nx + ix
+        order = np.argsort(bins, kind='stable')
+        self.rows = small_rows[order]
+        self.bin_offsets = np.zeros(self.nx * self.ny + 1, dtype=np.int64)
+        np.cumsum(np.bincount(bins, minlength=self.nx * self.ny), out=self.bin_offsets[1:])
+
+    def _bin_of(self, x, y):
+        ix = np.clip(((x - self.origin[0]) // self.bin_size).astype(np.int64), 0, self.nx - 1)
+        iy = np.clip(((y - self.origin[1]) // self.bin_size).astype(np.int64), 0, self.ny - 1)
+        return ix, iy
+
+    def query(self, window):
+        x1, y1, x2, y2 = window
+        ix0, iy0 = self._bin_of(np.array([x1 - self.bin_size]), np.array([y1 - self.bin_size]))
+        ix1, iy1 = self._bin_of(np.array([x2]), np.array([y2]))
+        ix0, iy0, ix1, iy1 = int(ix0[0]), int(iy0[0]), int(ix1[0]), int(iy1[0])
+
+        starts = self.bin_offsets[np.arange(iy0, iy1 + 1) * self.nx + ix0]
+        ends = self.bin_offsets[np.arange(iy0, iy1 + 1) * self.nx + ix1 + 1]
+        candidates = [self.rows[s:e] for s, e in zip(starts.tolist(), ends.tolist()) if e > s]
+        candidates.append(self.large_rows)
+        return self._filter(np.concatenate(candidates), window)
+
+
+class HilbertIndex(_ArrayIndex):
+    """Packed static R-tree with leaves in Hilbert order of the box centers.
+
+    levels[0] holds the boxes of the leaf nodes (node_size boxes each),
+    levels[1] the boxes of groups of node_size leaves, and so on up to a
+    level with at most node_size nodes. A query tests one level at a time
+    and only expands the children of the nodes that hit.
+    """
+
+    name = "hilbert"
+
+    def __init__(self, ids, bboxes, node_size=16):
+        super().__init__(ids, bboxes)
+        self.node_size = node_size
+
+        centers = (self.bboxes[:, :2] + self.bboxes[:, 2:]) / 2
+        order = np.argsort(_hilbert_keys(centers), kind='stable')
+        self.ids = self.ids[order]
+        self.bboxes = self.bboxes[order]
+
+        self.levels = []
+        boxes = self.bboxes
+        while len(boxes) > node_size:
+            boxes = _group_bounds(boxes, node_size)
+            self.levels.append(boxes)
+
+    def query(self, window):
+        x1, y1, x2, y2 = window
+        if not self.levels:
+            return self._filter(np.arange(len(self.bboxes)), window)
+
+        nodes = np.arange(len(self.levels[-1]))
+        for level in range(len(self.levels) - 1, -1, -1):
+            boxes = self.levels[level][nodes]
+            hit = (boxes[:, 0] <= x2) & (boxes[:, 2] >= x1) & (boxes[:, 1] <= y2) & (boxes[:, 3] >= y1)
+            below = len(self.levels[level - 1]) if level else len(self.bboxes)
+            nodes = _children(nodes[hit], self.node_size, below)
+        return self._filter(nodes, window)
+
+
+def _group_bounds(boxes, size):
+    """Bounds of consecutive groups of `size` boxes (the last one may be short)."""
+    starts = np.arange(0, len(boxes), size)
+    return np.column_stack((np.minimum.reduceat(boxes[:, 0], starts), np.minimum.reduceat(boxes[:, 1], starts),
+                            np.maximum.reduceat(boxes[:, 2], starts), np.maximum.reduceat(boxes[:, 3], starts)))
+
+
+def _children(nodes, size, limit):
+    children = (nodes[:, None] * size + np.arange(size)).ravel()
+    return children[children < limit]
+
+
+def _hilbert_keys(points, order=16):
+    """Hilbert curve index of points scaled onto a 2**order grid."""
+    if not len(points):
+        return np.zeros(0, dtype=np.int64)
+    low = points.min(axis=0)
+    span = np.maximum(points.max(axis=0) - low, 1e-12)
+    side = (1 << order) - 1
+    x = ((points[:, 0] - low[0]) / span[0] * side).astype(np.int64)
+    y = ((points[:, 1] - low[1]) / span[1] * side).astype(np.int64)
+
+    keys = np.zeros(len(points), dtype=np.int64)
+    s = 1 << (order - 1)
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        keys += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the curve stays continuous.
+        flip = ~ry & rx
+        x = np.where(flip, side - x, x)
+        y = np.where(flip, side - y, y)
+        swap = ~ry
+        x, y = np.where(swap, y, x), np.where(swap, x, y)
+        s >>= 1
+    return keys
+
+
+def bulk_load_rtree(ids, bboxes):
+    """R-tree of (N, 4) bboxes built by libspatialindex bulk loading (STR packing).
+
+    Uses rtree's NumPy array interface when it has one (rtree >= 1.1) and
+    falls back to a generator stream, which is bulk loaded too.
+    """
+    if len(ids) == 0:
+        return index.Index()
+
+    ids = np.ascontiguousarray(ids, dtype=np.int64)
+    bboxes = np.ascontiguousarray(bboxes, dtype=np.float64)
+    if hasattr(index.Index, "_create_idx_from_array"):
+        return index.Index((ids, np.ascontiguousarray(bboxes[:, :2]), np.ascontiguousarray(bboxes[:, 2:])))
+    return index.Index((id_, bbox, None) for id_, bbox in zip(ids.tolist(), bboxes.tolist()))
+
+
+BACKENDS = {backend.name: backend for backend in (RTreeIndex, GridIndex, HilbertIndex)}
+
+
+def build_spatial_index(ids, bboxes, backend=None):
+    """Spatial index of the given backend, else SPATIAL_INDEX, else rtree."""
+    backend = backend or os.environ.get("SPATIAL_INDEX", "rtree")
+    if backend not in BACKENDS:
+        logging.warning(f"Unknown SPATIAL_INDEX '{backend}', using rtree.")
+        backend = "rtree"
+    return BACKENDS[backend](ids, bboxes)
@@ -0,0 +1,266 @@
+import logging
+
+import numpy as np
+
+from lef_reader import lef_statements
+
+########################################################################
+#
+# Technology model built from the LEF LAYER, VIA and VIARULE blocks.
+#
+# Layers get dense ids in LEF order (the order of the stack). Their rules
+# are kept in NumPy arrays indexed by layer id, so track, density and
+# RUDY-style code reads a pitch or width with one index instead of parsing
+# the raw blocks. Values are in LEF microns.
+#
+########################################################################
+
+LAYER_TYPES = ("ROUTING", "CUT", "MASTERSLICE", "OVERLAP", "IMPLANT", "OTHER")
+DIRECTIONS = ("NONE", "HORIZONTAL", "VERTICAL")
+
+LAYER_TYPE_CODE = {name: code for code, name in enumerate(LAYER_TYPES)}
+DIRECTION_CODE = {name: code for code, name in enumerate(DIRECTIONS)}
+
+
+class SpacingTable:
+    """SPACINGTABLE PARALLELRUNLENGTH: spacing[i, j] applies from widths[i] and prl[j] on."""
+    __slots__ = ('prl', 'widths', 'spacing')
+
+    def __init__(self, prl, widths, spacing):
+        self.prl = prl
+        self.widths = widths
+        self.spacing = spacing
+
+    def lookup(self, width, prl):
+        i = max(int(np.searchsorted(self.widths, width, side='right')) - 1, 0)
+        j = max(int(np.searchsorted(self.prl, prl, side='right')) - 1, 0)
+        return float(self.spacing[i, j])
+
+
+class TechModel:
+    """Layers, vias and via rules of the loaded LEF files.
+
+    Per-layer arrays (indexed by layer id): type_ids, direction_ids,
+    pitch and offset ((N, 2), x and y; a single PITCH value fills both),
+    width, min_width, spacing (the smallest plain SPACING or table entry),
+    area, and routing_index (0 for the lowest routing layer, -1 for the
+    others). spacing_tables[layer_id] is a SpacingTable or None.
+
+    Via rectangles are stored flat: the rectangles of via v are
+    via_rects[via_rect_offsets[v]:via_rect_offsets[v + 1]], on layers
+    via_rect_layer_ids of the same slice.
+
+    The first LEF file that defines a layer, via or via rule wins, as for
+    macros.
+    """
+
+    def __init__(self):
+        self.layer_names = []
+        self._layer_ids = {}
+        self._layers = []    # per layer dict while loading
+
+        self.via_names = []
+        self._via_ids = {}
+        self._via_layers = []    # per via {layer name: rects}
+
+        self.via_rule_names = []
+        self._via_rule_ids = {}
+        self.via_rule_generate = []      # VIARULE ... GENERATE
+        self._via_rule_layers = []       # per rule, layer names in order
+
+        self._build()
+
+    @classmethod
+    def from_lef_parsers(cls, parsers):
+        tech = cls()
+        for parser in parsers:
+            tech.add_library(parser)
+        tech._build()
+        return tech
+
+    def add_library(self, lefParser):
+        """Add the layers, vias and via rules of one LefParser (call _build() afterwards)."""
+        for name, raw in lefParser.get_layers().items():
+            if name not in self._layer_ids:
+                self._layer_ids[name] = len(self.layer_names)
+                self.layer_names.append(name)
+                self._layers.append(_read_layer(raw))
+
+        for name, via in lefParser.get_vias().items():
+            if name not in self._via_ids:
+                self._via_ids[name] = len(self.via_names)
+                self.via_names.append(name)
+                self._via_layers.append(via["layers"])
+
+        for name, raw in lefParser.get_via_rules().items():
+            if name not in self._via_rule_ids:
+                generate, layers = _read_via_rule(raw)
+                self._via_rule_ids[name] = len(self.via_rule_names)
+                self.via_rule_names.append(name)
+                self.via_rule_generate.append(generate)
+                self._via_rule_layers.append(layers)
+
+    def _build(self):
+        layers = self._layers
+        num_layers = len(layers)
+
+        self.type_ids = np.array([LAYER_TYPE_CODE[l["type"]] for l in layers], dtype=np.int8)
+        self.direction_ids = np.array([DIRECTION_CODE[l["direction"]] for l in layers], dtype=np.int8)
+        self.pitch = np.array([l["pitch"] for l in layers], dtype=np.float64).reshape(num_layers, 2)
+        self.offset = np.array([l["offset"] for l in layers], dtype=np.float64).reshape(num_layers, 2)
+        self.width = np.array([l["width"] for l in layers], dtype=np.float64)
+        self.min_width = np.array([l["min_width"] for l in layers], dtype=np.float64)
+        self.spacing = np.array([l["spacing"] for l in layers], dtype=np.float64)
+        self.area = np.array([l["area"] for l in layers], dtype=np.float64)
+        self.spacing_tables = [l["spacing_table"] for l in layers]
+
+        routing = self.type_ids == LAYER_TYPE_CODE["ROUTING"]
+        self.routing_index = np.full(num_layers, -1, dtype=np.int32)
+        self.routing_index[routing] = np.arange(int(routing.sum()), dtype=np.int32)
+
+        # Via rules refer to layers by name; resolve them now all layers are known.
+        self.via_rule_layer_ids = [[self._layer_ids[n] for n in names if n in self._layer_ids]
+                                   for names in self._via_rule_layers]
+
+        offsets = [0]
+        layer_ids = []
+        rects = []
+        unknown = set()
+        for via_layers in self._via_layers:
+            for layer, layer_rects in via_layers.items():
+                layer_id = self._layer_ids.get(layer)
+                if layer_id is None:
+                    unknown.add(layer)
+                    continue
+                layer_ids.extend([layer_id] * len(layer_rects))
+                rects.extend(layer_rects)
+            offsets.append(len(rects))
+        if unknown:
+            logging.warning(f"Via rectangles on undefined layers skipped: {', '.join(sorted(unknown))}")
+
+        self.via_rect_offsets = np.array(offsets, dtype=np.int64)
+        self.via_rect_layer_ids = np.array(layer_ids, dtype=np.int32)
+        self.via_rects = np.array(rects, dtype=np.float64).reshape(len(rects), 4)
+
+    # Lookups
+    def layer_id(self, name):
+        """Id of a layer, or None."""
+        return self._layer_ids.get(name)
+
+    def via_id(self, name):
+        return self._via_ids.get(name)
+
+    def via_rule_id(self, name):
+        return self._via_rule_ids.get(name)
+
+    def layer_type(self, layer_id) -> str:
+        return LAYER_TYPES[self.type_ids[layer_id]]
+
+    def direction(self, layer_id) -> str:
+        return DIRECTIONS[self.direction_ids[layer_id]]
+
+    def routing_layers(self) -> np.ndarray:
+        """Ids of the routing layers, bottom up."""
+        return np.flatnonzero(self.routing_index >= 0)
+
+    def track_pitch(self) -> np.ndarray:
+        """Pitch between the tracks of each layer: y pitch for HORIZONTAL, x pitch otherwise."""
+        horizontal = self.direction_ids == DIRECTION_CODE["HORIZONTAL"]
+        return np.where(horizontal, self.pitch[:, 1], self.pitch[:, 0])
+
+    def spacing_for(self, layer_id, width=0.0, prl=0.0):
+        """Required spacing of a wire of `width` running in parallel over `prl`."""
+        table = self.spacing_tables[layer_id]
+        if table is None:
+            return float(self.spacing[layer_id])
+        return table.lookup(width, prl)
+
+    def via_shapes(self, via_id):
+        """(layer ids, (n, 4) rects) of a via."""
+        begin, end = self.via_rect_offsets[via_id], self.via_rect_offsets[via_id + 1]
+        return self.via_rect_layer_ids[begin:end], self.via_rects[begin:end]
+
+    def num_layers(self):
+        return len(self.layer_names)
+
+
+def _read_layer(raw):
+    layer = {"type": "OTHER", "direction": "NONE", "pitch": [np.nan, np.nan], "offset": [np.nan, np.nan],
+             "width": np.nan, "min_width": np.nan, "spacing": np.nan, "area": np.nan,
+             "spacing_table": None}
+    spacings = []
+
+    for tokens, first, last in lef_statements(raw.splitlines()):
+        keyword = tokens[0]
+        values = _numbers(tokens[1:])
+        if keyword == "TYPE" and len(tokens) > 1:
+            layer["type"] = tokens[1].upper() if tokens[1].upper() in LAYER_TYPE_CODE else "OTHER"
+        elif keyword == "DIRECTION" and len(tokens) > 1:
+            layer["direction"] = tokens[1].upper() if tokens[1].upper() in DIRECTION_CODE else "NONE"
+        elif keyword in ("PITCH", "OFFSET") and values:
+            layer[keyword.lower()] = [values[0], values[1] if len(values) > 1 else values[0]]
+        elif keyword == "WIDTH" and values:
+            layer["width"] = values[0]
+        elif keyword == "MINWIDTH" and values:
+            layer["min_width"] = values[0]
+        elif keyword == "AREA" and values:
+            layer["area"] = values[0]
+        elif keyword == "SPACING" and len(tokens) == 2 and values:
+            # Only plain SPACING; ENDOFLINE, ADJACENTCUTS etc. are conditional rules.
+            spacings.append(values[0])
+        elif keyword == "SPACINGTABLE":
+            table = _read_spacing_table(tokens)
+            if table is not None:
+                layer["spacing_table"] = table
+                spacings.append(float(table.spacing[0, 0]))
+
+    if np.isnan(layer["min_width"]):
+        layer["min_width"] = layer["width"]
+    if spacings:
+        layer["spacing"] = min(spacings)
+    return layer
+
+
+def _read_spacing_table(tokens):
+    """SpacingTable of a 'SPACINGTABLE PARALLELRUNLENGTH ... WIDTH ...' statement, or None."""
+    upper = [t.upper() for t in tokens]
+    if "PARALLELRUNLENGTH" not in upper:
+        return None
+    prl_at = upper.index("PARALLELRUNLENGTH")
+    width_at = [i for i, t in enumerate(upper) if t == "WIDTH"]
+    if not width_at:
+        return None
+
+    prl = _numbers(tokens[prl_at + 1:width_at[0]])
+    widths = []
+    rows = []
+    for k, at in enumerate(width_at):
+        end = width_at[k + 1] if k + 1 < len(width_at) else len(tokens)
+        row = _numbers(tokens[at + 1:end])
+        if len(row) != len(prl) + 1:
+            return None
+        widths.append(row[0])
+        rows.append(row[1:])
+    return SpacingTable(np.array(prl), np.array(widths), np.array(rows))
+
+
+def _read_via_rule(raw):
+    """(GENERATE flag, layer names in order) of a VIARULE block."""
+    generate = False
+    layers = []
+    for tokens, first, last in lef_statements(raw.splitlines()):
+        if tokens[0] == "VIARULE":
+            generate = any(t.upper() == "GENERATE" for t in tokens[2:])
+        elif tokens[0] == "LAYER" and len(tokens) > 1:
+            layers.append(tokens[1])
+    return generate, layers
+
+
+def _numbers(tokens):
+    values = []
+    for token in tokens:
+        try:
+            values.append(float(token))
+        except ValueError:
+            pass
+    return values
@@ -0,0 +1,185 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+from parse_progress import CancelToken, abandon_pool
+from spatial_index import build_spatial_index, HilbertIndex
+
+########################################################################
+#
+# Tile-partitioned analysis.
+#
+# The die is split into rectangular tiles holding about the same number of
+# objects (a k-d split on the box centers, alternating on the longer side
+# of each region). A box is owned by the tile that holds its center; a tile
+# also gets, as halo, every other box reaching into its region widened by
+# `halo`, so an analysis sees the neighbours of its boundary objects.
+#
+# map_tiles() runs a module-level function on every tile, in a spawn
+# process pool (TILE_MT=<n> processes, default one per core) or in this
+# process for one worker, and returns the per-tile results in tile order,
+# or what `reduce` makes of them.
+#
+# To count boundary effects once, an analysis either reports owned
+# objects only (Tile.owned) or, for pairs and areas, only what a tile owns
+# by a reference point (Tile.owns_points), e.g. the lower left corner of
+# the intersection of two boxes.
+#
+########################################################################
+
+
+class Tile:
+    """One tile of a TilePartition, as sent to a worker.
+
+    ids and bboxes are the owned boxes followed by the halo boxes; owned
+    is True for the first ones. region is the tile's own area, clipped to
+    the die; ownership of points uses half-open bounds that are open to
+    infinity on the die border, so every point belongs to exactly one tile.
+    """
+    __slots__ = ('index', 'region', 'ids', 'bboxes', 'owned', '_bounds', 'backend', '_spatial_index')
+
+    def __init__(self, index, region, bounds, ids, bboxes, owned, backend=None):
+        self.index = index
+        self.region = region
+        self._bounds = bounds
+        self.ids = ids
+        self.bboxes = bboxes
+        self.owned = owned
+        self.backend = backend
+        self._spatial_index = None
+
+    @property
+    def spatial_index(self):
+        """Spatial index over all boxes of the tile (owned and halo), built on first use."""
+        if self._spatial_index is None:
+            self._spatial_index = build_spatial_index(self.ids, self.bboxes, self.backend)
+        return self._spatial_index
+
+    def owns_points(self, x, y):
+        """Mask of the points (x, y arrays) that belong to this tile."""
+        x1, y1, x2, y2 = self._bounds
+        return (x >= x1) & (x < x2) & (y >= y1) & (y < y2)
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__ if name != '_spatial_index'}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._spatial_index = None
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class TilePartition:
+    """Balanced k-d tiling of (N, 4) bboxes; see the module comment."""
+
+    def __init__(self, ids, bboxes, num_tiles, halo=0.0, backend=None):
+        self.ids = np.ascontiguousarray(ids, dtype=np.int64)
+        self.bboxes = np.ascontiguousarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        self.halo = float(halo)
+        self.backend = backend
+
+        centers = (self.bboxes[:, :2] + self.bboxes[:, 2:]) / 2
+        if len(self.bboxes):
+            die = np.concatenate((self.bboxes[:, :2].min(axis=0), self.bboxes[:, 2:].max(axis=0)))
+        else:
+            die = np.zeros(4)
+        self.die = die
+
+        self.regions = []      # (x1, y1, x2, y2) per tile, clipped to the die
+        self._bounds = []      # the same with the die border at infinity
+        self.owner = np.zeros(len(self.ids), dtype=np.int32)
+        unbounded = np.array([-np.inf, -np.inf, np.inf, np.inf])
+        self._split(np.arange(len(self.ids)), centers, unbounded, max(int(num_tiles), 1))
+
+        # Halo lookups go through one static index over all boxes, by row.
+        self._rows_index = HilbertIndex(np.arange(len(self.ids)), self.bboxes)
+
+    def _split(self, rows, centers, bounds, num_tiles):
+        if num_tiles == 1 or len(rows) < 2:
+            self.owner[rows] = len(self.regions)
+            self._bounds.append(bounds)
+            self.regions.append(np.concatenate((np.maximum(bounds[:2], self.die[:2]),
+                                                np.minimum(bounds[2:], self.die[2:]))))
+            for _ in range(num_tiles - 1):     # nothing left to split: empty tiles
+                self._bounds.append(np.array([bounds[2], bounds[3], bounds[2], bounds[3]]))
+                self.regions.append(self.regions[-1][[2, 3, 2, 3]])
+            return
+
+        region = np.concatenate((np.maximum(bounds[:2], self.die[:2]), np.minimum(bounds[2:], self.die[2:])))
+        axis = 0 if region[2] - region[0] >= region[3] - region[1] else 1
+        left_tiles = num_tiles // 2
+        values = centers[rows, axis]
+        cut = float(np.partition(values, len(values) * left_tiles // num_tiles)[len(values) * left_tiles // num_tiles])
+
+        left = values < cut
+        left_bounds, right_bounds = bounds.copy(), bounds.copy()
+        left_bounds[axis + 2] = cut
+        right_bounds[axis] = cut
+        self._split(rows[left], centers, left_bounds, left_tiles)
+        self._split(rows[~left], centers, right_bounds, num_tiles - left_tiles)
+
+    def tile(self, index):
+        """The Tile with its owned boxes and its halo."""
+        owned_rows = np.flatnonzero(self.owner == index)
+        x1, y1, x2, y2 = self.regions[index]
+        h = self.halo
+        near = self._rows_index.query((x1 - h, y1 - h, x2 + h, y2 + h))
+        halo_rows = np.sort(near[self.owner[near] != index])
+        rows = np.concatenate((owned_rows, halo_rows))
+        owned = np.zeros(len(rows), dtype=bool)
+        owned[:len(owned_rows)] = True
+        return Tile(index, self.regions[index], self._bounds[index], self.ids[rows], self.bboxes[rows], owned,
+                    self.backend)
+
+    def tiles(self):
+        for index in range(len(self.regions)):
+            yield self.tile(index)
+
+    def __len__(self):
+        return len(self.regions)
+
+
+def tile_workers():
+    """Process count of map_tiles: TILE_MT=<n>, else one per core."""
+    num_workers = os.environ.get("TILE_MT", "")
+    if num_workers.isdigit() and int(num_workers) > 0:
+        return int(num_workers)
+    return os.cpu_count() or 1
+
+
+def map_tiles(func, partition, reduce=None, num_workers=None, cancel_token=None):
+    """Run func(tile) on every tile of the partition.
+
+    func must be a module-level function (it is pickled to the workers).
+    Returns the results in tile order, or reduce(results). A cancel through
+    cancel_token raises ParseCancelled.
+    """
+    cancel_token = cancel_token if cancel_token is not None else CancelToken()
+    num_workers = max(1, min(num_workers or tile_workers(), len(partition)))
+
+    if num_workers == 1:
+        results = []
+        for tile in partition.tiles():
+            cancel_token.raise_if_cancelled()
+            results.append(func(tile))
+    else:
+        pool_context = multiprocessing.get_context("spawn")
+        # Not a 'with' block, whose exit would wait for the tiles in flight on a cancel.
+        pool = ProcessPoolExecutor(max_workers=num_workers, mp_context=pool_context)
+        try:
+            futures = [pool.submit(func, tile) for tile in partition.tiles()]
+            while not all(future.done() for future in futures):
+                cancel_token.raise_if_cancelled()
+                wait(futures, timeout=0.1, return_when=FIRST_COMPLETED)
+            results = [future.result() for future in futures]
+        except BaseException:
+            abandon_pool(pool)
+            raise
+        pool.shutdown()
+
+    return reduce(results) if reduce is not None else results
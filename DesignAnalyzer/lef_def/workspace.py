@@ -0,0 +1,172 @@
+import ctypes
+import gc
+import logging
+import os
+
+import psutil
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from global_name_index import gname_index, make_name_index
+from def_parser import DefParserImplement
+from lef_parser import LefParserImplement
+from design_data import DesignData
+
+########################################################################
+#
+# Design workspaces.
+#
+# Every loaded design lives in its own DesignWorkspace: a name table, the
+# LEF and DEF parsers with their data, and the DesignData derived from
+# them (instances, spatial index, connectivity, ...). Nothing is shared,
+# so ids, units and components of one design never mix with another's.
+#
+# The WorkspaceManager keeps several designs resident. Activating one
+# swaps the `active` reference and the table behind gname_index, nothing
+# is copied or rebuilt. Switching is refused while the active design is
+# still loading, since the parse threads intern into the active table.
+#
+# unload() drops a workspace and reclaims its memory: the parsers and
+# derived data are cleared, a full gc pass breaks any remaining cycles
+# and malloc_trim returns the freed heap to the OS (glibc only; the large
+# NumPy buffers are unmapped as soon as they are freed anyway).
+#
+########################################################################
+
+
+class DesignWorkspace:
+    """One design: its name table, parsers and derived data."""
+
+    def __init__(self, name, name_index=None):
+        self.name = name
+        self.name_index = name_index if name_index is not None else make_name_index()
+        self.lefParserImplement = LefParserImplement()
+        self.defParserImplement = DefParserImplement()
+        self.design_data = DesignData(self.lefParserImplement, self.defParserImplement)
+
+    def is_loading(self):
+        return self.lefParserImplement.pending > 0 or self.defParserImplement.pending > 0
+
+    def is_empty(self):
+        return not self.lefParserImplement.parser_dict and not self.defParserImplement.parser_dict
+
+    def release(self):
+        """Drop the parsed and derived data; the workspace is not used afterwards."""
+        self.design_data.clear()
+        self.defParserImplement.clear()
+        self.lefParserImplement.clear()
+        self.name_index = None
+
+
+class WorkspaceManager(QObject):
+    """The resident design workspaces, in load order, and the active one."""
+
+    workspace_created_signal = pyqtSignal(object)   # DesignWorkspace
+    active_changed_signal = pyqtSignal(object)      # the DesignWorkspace now active
+    workspaces_changed_signal = pyqtSignal(list)    # names
+
+    def __init__(self, name="design"):
+        super().__init__()
+
+        self.workspaces = {}    # name -> DesignWorkspace
+        # The first workspace adopts the table gname_index started with.
+        self.active = DesignWorkspace(name, gname_index.current())
+        self.workspaces[name] = self.active
+
+    def names(self):
+        return list(self.workspaces)
+
+    def get(self, name):
+        return self.workspaces.get(name)
+
+    def _unique_name(self, name):
+        unique, n = name, 1
+        while unique in self.workspaces:
+            n += 1
+            unique = f"{name}-{n}"
+        return unique
+
+    def _busy(self):
+        if self.active.is_loading():
+            logging.warning(f"Design {self.active.name} is still loading; cancel the load first.")
+            return True
+        return False
+
+    def create(self, name):
+        """Activate a new, empty workspace for a design, or None while a load is running.
+
+        An empty active workspace is reused (and renamed) rather than kept around.
+        """
+        if self._busy():
+            return None
+        if self.active.is_empty():
+            workspace = self.workspaces.pop(self.active.name)
+            workspace.name = self._unique_name(name)
+            self.workspaces[workspace.name] = workspace
+        else:
+            workspace = DesignWorkspace(self._unique_name(name))
+            self.workspaces[workspace.name] = workspace
+            self.workspace_created_signal.emit(workspace)
+        self._set_active(workspace)
+        self.workspaces_changed_signal.emit(self.names())
+        return workspace
+
+    def activate(self, name):
+        """Make a resident design the active one; False if unknown or a load is running."""
+        workspace = self.workspaces.get(name)
+        if workspace is None:
+            logging.warning(f"No design {name} loaded.")
+            return False
+        if workspace is self.active:
+            return True
+        if self._busy():
+            return False
+        self._set_active(workspace)
+        return True
+
+    def _set_active(self, workspace):
+        self.active = workspace
+        gname_index.use(workspace.name_index)
+        self.active_changed_signal.emit(workspace)
+
+    def unload(self, name):
+        """Drop a design and reclaim its memory; the last one is replaced by an empty workspace."""
+        workspace = self.workspaces.get(name)
+        if workspace is None:
+            logging.warning(f"No design {name} loaded.")
+            return False
+        if workspace.is_loading():
+            logging.warning(f"Design {name} is still loading; cancel the load first.")
+            return False
+
+        rss_before = resident_mb()
+        del self.workspaces[name]
+        if workspace is self.active:
+            if not self.workspaces:
+                replacement = DesignWorkspace("design")
+                self.workspaces[replacement.name] = replacement
+                self.workspace_created_signal.emit(replacement)
+            # Listeners move to the new active design before the old data goes.
+            self._set_active(next(reversed(self.workspaces.values())))
+
+        workspace.release()
+        del workspace
+        reclaim_memory()
+        self.workspaces_changed_signal.emit(self.names())
+
+        logging.info(f"Unloaded design {name}: resident memory {rss_before:.0f} -> {resident_mb():.0f} MB")
+        return True
+
+
+def reclaim_memory():
+    """Full gc pass, then hand the freed heap back to the OS where malloc_trim exists."""
+    collected = gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+    return collected
+
+
+def resident_mb():
+    """Resident set size of this process in MB."""
+    return psutil.Process(os.getpid()).memory_info().rss / 2**20
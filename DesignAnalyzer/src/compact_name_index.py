@@ -0,0 +1,181 @@
+import threading
+
+from array import array
+
+from typing import Optional
+
+
+class CompactNameIndex:
+    """NameIndex backend that keeps names in one contiguous byte buffer.
+
+    Name i is stored as the UTF-8 bytes buf[offsets[i]:offsets[i+1]]. With
+    prefix compression on, only the leaf after the last '/' goes into the
+    buffer and parents[i] points at the hierarchy path ('u_core/u_alu/add_123')
+    in a small side table shared by all its leaves; without it the whole
+    name is the leaf and parents[i] is -1.
+
+    The hash index is an open-addressing table of ids (array('i'), -1 for
+    empty) probed by comparing (parent, leaf bytes) against the buffer, so no
+    Python string is kept per name. A name costs its leaf bytes plus about
+    20 bytes of arrays, instead of a str object and two container entries.
+
+    The API and the concurrency rules match NameIndex: reads do not lock,
+    inserts take the lock and re-check under it.
+    """
+
+    _EMPTY = -1
+    _MIN_SLOTS = 1024
+
+    def __init__(self, compress_prefixes: bool = True):
+        self.compress_prefixes = compress_prefixes
+
+        self._buf = bytearray()
+        self._offsets = array('q', [0])
+        self._parents = array('i')
+
+        # Hierarchy paths are few compared to leaves, so a plain dict/list suffices.
+        self._prefix_to_id = {}
+        self._prefixes = []
+
+        self._slots = array('i', [self._EMPTY]) * self._MIN_SLOTS
+        self._lock = threading.Lock()
+
+    # Encoding
+    def _split(self, name: str):
+        """(parent prefix id or -1, leaf bytes) of a name; the prefix is not interned."""
+        if self.compress_prefixes:
+            prefix, sep, leaf = name.rpartition('/')
+            if sep:
+                return self._prefix_to_id.get(prefix, -2), leaf.encode('utf-8')
+        return -1, name.encode('utf-8')
+
+    def _find(self, slots, parent: int, leaf: bytes) -> int:
+        """Slot index holding (parent, leaf), or of the empty slot that ends its probe."""
+        mask = len(slots) - 1
+        i = hash((parent, leaf)) & mask
+        buf, offsets, parents = self._buf, self._offsets, self._parents
+        while True:
+            id_ = slots[i]
+            if id_ == self._EMPTY:
+                return i
+            if parents[id_] == parent and buf[offsets[id_]:offsets[id_ + 1]] == leaf:
+                return i
+            i = (i + 1) & mask
+
+    def _lookup(self, name: str) -> Optional[int]:
+        parent, leaf = self._split(name)
+        if parent == -2:
+            return None
+        slots = self._slots
+        id_ = slots[self._find(slots, parent, leaf)]
+        return None if id_ == self._EMPTY else id_
+
+    def _insert_locked(self, name: str) -> int:
+        id_ = self._lookup(name)
+        if id_ is not None:
+            return id_
+
+        parent = -1
+        if self.compress_prefixes:
+            prefix, sep, leaf = name.rpartition('/')
+            if sep:
+                parent = self._prefix_to_id.get(prefix)
+                if parent is None:
+                    parent = len(self._prefixes)
+                    self._prefixes.append(prefix)
+                    self._prefix_to_id[prefix] = parent
+                name = leaf
+        leaf = name.encode('utf-8')
+
+        # Store the name before publishing its id in the hash table.
+        id_ = len(self._parents)
+        self._buf += leaf
+        self._offsets.append(len(self._buf))
+        self._parents.append(parent)
+
+        if (id_ + 1) * 3 > len(self._slots) * 2:
+            self._grow()
+        slots = self._slots
+        slots[self._find(slots, parent, leaf)] = id_
+        return id_
+
+    def _grow(self):
+        slots = array('i', [self._EMPTY]) * (len(self._slots) * 2)
+        buf, offsets, parents = self._buf, self._offsets, self._parents
+        mask = len(slots) - 1
+        for id_ in range(len(parents)):
+            i = hash((parents[id_], bytes(buf[offsets[id_]:offsets[id_ + 1]]))) & mask
+            while slots[i] != self._EMPTY:
+                i = (i + 1) & mask
+            slots[i] = id_
+        self._slots = slots
+
+    # NameIndex API
+    def set(self, name: str) -> int:
+        id_ = self._lookup(name)
+        if id_ is not None:
+            return id_
+        with self._lock:
+            return self._insert_locked(name)
+
+    def set_many(self, names) -> list:
+        """Intern a batch of names, taking the lock at most once; returns their ids in order."""
+        if not isinstance(names, list):
+            names = list(names)
+        ids = [self._lookup(name) for name in names]
+        if None not in ids:
+            return ids
+
+        with self._lock:
+            for i, id_ in enumerate(ids):
+                if id_ is None:
+                    ids[i] = self._insert_locked(names[i])
+        return ids
+
+    def merge(self, other) -> list:
+        """Intern every name of another index; returns the other-id -> self-id remap."""
+        return self.set_many(other.names())
+
+    def get_id(self, name: str) -> int:
+        """Return ID of the name if it exists, else raise KeyError."""
+        id_ = self._lookup(name)
+        if id_ is None:
+            raise KeyError(f"Name '{name}' not found in NameIndex")
+        return id_
+
+    def getName(self, id_: int) -> str:
+        """Return name associated with ID, else raise KeyError."""
+        if not 0 <= id_ < len(self._parents):
+            raise KeyError(f"ID {id_} not found in NameIndex")
+        leaf = self._buf[self._offsets[id_]:self._offsets[id_ + 1]].decode('utf-8')
+        parent = self._parents[id_]
+        return leaf if parent < 0 else f"{self._prefixes[parent]}/{leaf}"
+
+    def get_names(self, ids) -> list:
+        """Names of a sequence of IDs (e.g. a NumPy id column), else raise KeyError."""
+        if hasattr(ids, "tolist"):
+            ids = ids.tolist()
+        getName = self.getName
+        return [getName(id_) for id_ in ids]
+
+    def has_name(self, name: str) -> bool:
+        """Check if a name exists in the index."""
+        return self._lookup(name) is not None
+
+    def has_id(self, id_: int) -> bool:
+        """Check if an ID exists in the index."""
+        return 0 <= id_ < len(self._parents)
+
+    def names(self) -> list:
+        """Snapshot of all names, ordered by ID."""
+        return self.get_names(range(len(self._parents)))
+
+    def __len__(self) -> int:
+        """Return number of names indexed."""
+        return len(self._parents)
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the buffer and arrays (prefix table excluded)."""
+        return (len(self._buf) + self._offsets.itemsize * len(self._offsets)
+                + self._parents.itemsize * len(self._parents)
+                + self._slots.itemsize * len(self._slots))
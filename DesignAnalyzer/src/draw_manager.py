@@ -2,7 +2,7 @@ from PyQt5.QtWidgets import QGraphicsScene, QGraphicsView, QGraphicsRectItem, QW
 from PyQt5.QtCore import Qt, QRectF, QPointF, QTimer
 from PyQt5.QtGui import QBrush, QColor, QCursor, QPen, QPainter, QFont
 
-from rtree import index
+import numpy as np
 
 
 class DrawManager:
@@ -38,20 +38,39 @@ class DrawManager:
         self._current_scale = 1.0
 
 
-    def load_design_instances(self, rtree, designInstances):
+    def load_design_instances(self, spatial_index, designInstances):
 
         self.designInstances = designInstances
 
 
-        visible_bbox = rtree.get_bounds()
+        visible_bbox = spatial_index.get_bounds()
 
-        visible_ids = list(rtree.intersection(visible_bbox))
+        visible_ids = spatial_index.query(visible_bbox)
 
         self.draw_instances(visible_ids, QColor(0, 0, 0))
 
 
+    def clear(self):
+        """Remove the drawn design, e.g. when no design is active."""
+        self.designInstances = None
+        self.drawArea.hideDensity()
+        self.drawArea.drawRects([])
+
     def draw_instances(self, instList, color):
 
+        if self.designInstances is None:
+            return
+        instance_data = self.designInstances.instance_data
+        if hasattr(instance_data, "locations"):
+            # Array-backed instances: gather all bboxes at once.
+            bboxes = instance_data.locations(instList)
+            x = np.minimum(bboxes[:, 0], bboxes[:, 2])
+            y = np.minimum(bboxes[:, 1], bboxes[:, 3])
+            w = np.abs(bboxes[:, 2] - bboxes[:, 0])
+            h = np.abs(bboxes[:, 3] - bboxes[:, 1])
+            self.drawArea.drawRects(list(zip(x.tolist(), y.tolist(), w.tolist(), h.tolist())))
+            return
+
         rect_list = []
 
         for i in instList:
@@ -67,6 +86,13 @@ class DrawManager:
 
         self.drawArea.drawRects(rect_list)
 
+    def draw_density(self, density_map, max_value=1.0):
+        """Show a density.DensityMap as a heat map over the layout; utilization over max_value saturates."""
+        self.drawArea.showDensity(density_map.utilization, density_map.extent, max_value)
+
+    def hide_density(self):
+        self.drawArea.hideDensity()
+
     def draw_instances_1(self, instList, color):
 
         min_x, min_y, max_x, max_y = self.bounding_box
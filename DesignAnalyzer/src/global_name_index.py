@@ -1,55 +1,144 @@
+import os
 import sys
 import threading
 
+from compact_name_index import CompactNameIndex
+
 class NameIndex:
+    """Bidirectional name <-> integer-id table.
+
+    Ids are dense, start at 0 and are never removed, so reads need no lock:
+    a name is appended to id_to_name before it is published in name_to_id,
+    and a reader that finds an id in the dict always finds its name in the
+    list. Only inserting a new name takes the lock (checked again under it).
+
+    Parsers running in parallel can intern into their own local NameIndex
+    and fold it in afterwards with merge(), which returns the local-id ->
+    global-id remap.
+    """
+
     def __init__(self):
         self.name_to_id = {}
-        self.id_to_name = {}
-        self._counter = 0
+        self.id_to_name = []
         self._lock = threading.Lock()
 
     def set(self, name: str) -> int:
+        id_ = self.name_to_id.get(name)
+        if id_ is not None:
+            return id_
+
         name = sys.intern(name)  # Ensure a single memory allocation
         with self._lock:
-            if name in self.name_to_id:
-                return self.name_to_id[name]
-            id_ = self._counter
-            self._counter += 1
-            self.name_to_id[name] = id_
-            self.id_to_name[id_] = name
+            id_ = self.name_to_id.get(name)
+            if id_ is None:
+                id_ = len(self.id_to_name)
+                self.id_to_name.append(name)
+                self.name_to_id[name] = id_
             return id_
 
+    def set_many(self, names) -> list:
+        """Intern a batch of names, taking the lock at most once; returns their ids in order."""
+        if not isinstance(names, list):
+            names = list(names)
+        name_to_id = self.name_to_id
+        ids = [name_to_id.get(name) for name in names]
+        if None not in ids:
+            return ids
+
+        with self._lock:
+            for i, id_ in enumerate(ids):
+                if id_ is not None:
+                    continue
+                name = names[i]
+                id_ = name_to_id.get(name)
+                if id_ is None:
+                    name = sys.intern(name)
+                    id_ = len(self.id_to_name)
+                    self.id_to_name.append(name)
+                    name_to_id[name] = id_
+                ids[i] = id_
+        return ids
+
+    def merge(self, other: "NameIndex") -> list:
+        """Intern every name of another index; returns the other-id -> self-id remap."""
+        return self.set_many(other.names())
+
     def get_id(self, name: str) -> int:
         """Return ID of the name if it exists, else raise KeyError."""
-        name = sys.intern(name)
-        with self._lock:
-            if name not in self.name_to_id:
-                raise KeyError(f"Name '{name}' not found in NameIndex")
-            return self.name_to_id[name]
+        id_ = self.name_to_id.get(name)
+        if id_ is None:
+            raise KeyError(f"Name '{name}' not found in NameIndex")
+        return id_
 
     def getName(self, id_: int) -> str:
         """Return name associated with ID, else raise KeyError."""
-        with self._lock:
-            if id_ not in self.id_to_name:
-                raise KeyError(f"ID {id_} not found in NameIndex")
-            return self.id_to_name[id_]
+        if not 0 <= id_ < len(self.id_to_name):
+            raise KeyError(f"ID {id_} not found in NameIndex")
+        return self.id_to_name[id_]
+
+    def get_names(self, ids) -> list:
+        """Names of a sequence of IDs (e.g. a NumPy id column), else raise KeyError."""
+        id_to_name = self.id_to_name
+        if hasattr(ids, "tolist"):
+            ids = ids.tolist()
+        try:
+            if ids and min(ids) < 0:
+                raise IndexError
+            return [id_to_name[id_] for id_ in ids]
+        except IndexError:
+            bad = next(id_ for id_ in ids if not 0 <= id_ < len(id_to_name))
+            raise KeyError(f"ID {bad} not found in NameIndex") from None
 
     def has_name(self, name: str) -> bool:
         """Check if a name exists in the index."""
-        name = sys.intern(name)
-        with self._lock:
-            return name in self.name_to_id
+        return name in self.name_to_id
 
     def has_id(self, id_: int) -> bool:
         """Check if an ID exists in the index."""
-        with self._lock:
-            return id_ in self.id_to_name
+        return 0 <= id_ < len(self.id_to_name)
+
+    def names(self) -> list:
+        """Snapshot of all names, ordered by ID."""
+        return self.id_to_name[:]
 
     def __len__(self) -> int:
         """Return number of names indexed."""
-        with self._lock:
-            return len(self.name_to_id)
+        return len(self.id_to_name)
 
-# Global Name-mapping
-gname_index = NameIndex()
+def make_name_index():
+    """NameIndex backend selected by NAME_INDEX: 'dict' (default), 'compact' or 'compact-flat'."""
+    backend = os.environ.get("NAME_INDEX", "dict")
+    if backend == "compact":
+        return CompactNameIndex(compress_prefixes=True)
+    if backend == "compact-flat":
+        return CompactNameIndex(compress_prefixes=False)
+    return NameIndex()
+
+class ActiveNameIndex:
+    """The name table of the active design.
+
+    Every design workspace has its own table; modules import gname_index
+    once and it forwards to whichever table use() switched in, so changing
+    the active design is a pointer swap. Code that must stay on one table
+    while another may be switched in holds current() instead.
+    """
+
+    def __init__(self, index):
+        self._index = index
 
+    def use(self, index):
+        """Switch in another table; returns the previous one."""
+        previous, self._index = self._index, index
+        return previous
+
+    def current(self):
+        return self._index
+
+    def __getattr__(self, name):
+        return getattr(self._index, name)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+# Global Name-mapping
+gname_index = ActiveNameIndex(make_name_index())
@@ -89,6 +89,7 @@ class PyQtGraphLayoutWithScales(QWidget):
         self.setFixedSize(width, height)
 
         self.rect_items = []
+        self.density_item = None
         self.initUI()
 
     def initUI(self):
@@ -148,13 +149,34 @@ class PyQtGraphLayoutWithScales(QWidget):
             self.view.addItem(item)
             self.rect_items.append(item)
 
-        # Add back grid and crosshairs
+        # Add back the density overlay, grid and crosshairs
+        if self.density_item is not None:
+            self.view.addItem(self.density_item)
         self.view.addItem(self.grid)
         self.view.addItem(self.vLine)
         self.view.addItem(self.hLine)
         self.view.autoRange()
         self.updateRulers()
 
+    def showDensity(self, utilization, extent, max_value=None):
+        """Overlay an (ny, nx) utilization grid over extent (x1, y1, x2, y2) as a heat map."""
+        if self.density_item is None:
+            self.density_item = pg.ImageItem(axisOrder='row-major')
+            self.density_item.setOpacity(0.6)
+            self.density_item.setZValue(10)
+            self.density_item.setColorMap(pg.colormap.get('inferno'))
+            self.view.addItem(self.density_item)
+
+        x1, y1, x2, y2 = extent
+        levels = (0.0, max_value if max_value else max(float(utilization.max()), 1e-9))
+        self.density_item.setImage(utilization, levels=levels)
+        self.density_item.setRect(QRectF(x1, y1, x2 - x1, y2 - y1))
+
+    def hideDensity(self):
+        if self.density_item is not None:
+            self.view.removeItem(self.density_item)
+            self.density_item = None
+
     def updateRulers(self):
         rect = self.view.viewRect()
         self.ruler_x.setRange(rect.left(), rect.right())
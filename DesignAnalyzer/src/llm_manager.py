@@ -4,9 +4,17 @@ from typing import List, Optional
 
 class LLMManager:
     def __init__(self, model_path: str = "mistral-7b-instruct-v0.1.Q4_0.gguf"):
-        self.llm = GPT4All(model_path)
+        self.model_path = model_path
+        self._llm = None
         self.context_lines: List[str] = []
 
+    @property
+    def llm(self) -> GPT4All:
+        """Load the model on first use, so worker processes that import the UI don't pay for it."""
+        if self._llm is None:
+            self._llm = GPT4All(self.model_path)
+        return self._llm
+
     def set_context_lines(self, lines: List[str]):
         """Set the list of lines for RAG-like context retrieval."""
         self.context_lines = lines
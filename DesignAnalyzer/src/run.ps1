@@ -1,2 +1,2 @@
-$env:DEF_READ_MT = "1"
+$env:DEF_READ_MT = "$env:NUMBER_OF_PROCESSORS"
 python main.py